@@ -0,0 +1,243 @@
+"""Deduplication, correlation and storm suppression for maintenance alerts.
+
+Detectors (predict_maintenance_needs, detect_anomalies, drift detection) can
+fire on every rerun or scan. submit_alerts() passes their alert dicts through
+one pipeline per tenant before anything reaches maintenance_alerts:
+
+- Dedup: an alert whose fingerprint (equipment + alert type) matches an open
+  alert seen within DEDUP_WINDOW only bumps that row's occurrence count.
+  Open alerts not seen again within the window expire: they leave the open
+  set but are not marked resolved, which only maintenance does.
+- Correlation: a new alert at a location that already had a new alert within
+  CORRELATION_WINDOW joins that alert's group.
+- Storm suppression: new alerts are rate limited per location with a token
+  bucket. Alerts over the limit are folded into one "Alert Storm" row per
+  location, stored with its location and no equipment.
+
+Open alerts are indexed in memory by fingerprint, so a batch is matched without
+querying the table. The index is reloaded when another process has written
+alerts.
+"""
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+from models import (
+    apply_alert_changes, get_alert_version, get_equipment_locations, get_open_alert_index
+)
+from shards import utc_now
+from tenancy import CURRENT_TENANT, resolve_tenant, tenant_scope
+
+DEDUP_WINDOW = timedelta(hours=6)
+CORRELATION_WINDOW = timedelta(minutes=15)
+# New alerts per location: sustained rate per minute and burst size
+STORM_RATE_PER_MINUTE = 2.0
+STORM_BURST = 10
+STORM_ALERT_TYPE = 'Alert Storm'
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+def alert_fingerprint(equipment_id, alert_type):
+    """Stable identity of an alert condition; severity is left out so escalations merge"""
+    return hashlib.sha1(f'{equipment_id}|{alert_type}'.encode()).hexdigest()[:16]
+
+def _format_time(moment):
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+def _parse_time(value):
+    return datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S')
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, burst, now):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now):
+        elapsed = max((now - self.updated).total_seconds(), 0)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+class AlertPipeline:
+    """Per-tenant alert stage holding the open-alert index and storm buckets"""
+
+    def __init__(self, tenant, dedup_window=DEDUP_WINDOW, correlation_window=CORRELATION_WINDOW,
+                 storm_rate=STORM_RATE_PER_MINUTE, storm_burst=STORM_BURST):
+        self.tenant = tenant
+        self.dedup_window = dedup_window
+        self.correlation_window = correlation_window
+        self.storm_rate = storm_rate
+        self.storm_burst = storm_burst
+        self.lock = threading.Lock()
+        self.open_alerts = {}
+        self.locations = {}
+        self.buckets = {}
+        self.recent_by_location = {}
+        self.version = None
+        self.stats = {'inserted': 0, 'merged': 0, 'suppressed': 0, 'correlated': 0, 'expired': 0}
+
+    def _refresh(self):
+        """Reload the open-alert index if the table changed outside this pipeline"""
+        version = get_alert_version()
+        if version == self.version:
+            return
+        self.open_alerts = {}
+        for alert_id, equipment_id, alert_type, fingerprint, group_id, created_at, last_seen in get_open_alert_index():
+            fingerprint = fingerprint or alert_fingerprint(equipment_id, alert_type)
+            self.open_alerts[fingerprint] = {
+                'id': alert_id,
+                'group_id': group_id or alert_id,
+                'created_at': _parse_time(created_at),
+                'last_seen': _parse_time(last_seen)
+            }
+        self.locations = get_equipment_locations()
+        self.version = version
+
+    def _location(self, alert):
+        return alert.get('location') or self.locations.get(alert['equipment_id'], alert['equipment_id'])
+
+    def _group_for(self, location, now):
+        recent = self.recent_by_location.get(location)
+        if recent is not None and now - recent['created_at'] <= self.correlation_window:
+            return recent
+        return None
+
+    def submit(self, alerts, now=None):
+        """Run alert dicts through dedup, correlation and storm suppression; returns batch stats"""
+        now = now or utc_now()
+        seen_at = _format_time(now)
+        batch = {'inserted': 0, 'merged': 0, 'suppressed': 0, 'correlated': 0, 'expired': 0}
+
+        with self.lock, tenant_scope(self.tenant):
+            self._refresh()
+
+            # Open alerts that went quiet for a whole window expire
+            expired_ids = []
+            for fingerprint, entry in list(self.open_alerts.items()):
+                if now - entry['last_seen'] > self.dedup_window:
+                    expired_ids.append(entry['id'])
+                    del self.open_alerts[fingerprint]
+            batch['expired'] = len(expired_ids)
+
+            merges = {}
+            inserts = []
+            pending = {}
+            storms = {}
+            for alert in alerts:
+                fingerprint = alert_fingerprint(alert['equipment_id'], alert['alert_type'])
+                entry = self.open_alerts.get(fingerprint) or pending.get(fingerprint)
+                if entry is not None:
+                    self._merge(merges, entry, 1, alert['severity'])
+                    entry['last_seen'] = now
+                    batch['merged'] += 1
+                    continue
+
+                location = self._location(alert)
+                bucket = self.buckets.setdefault(
+                    location, TokenBucket(self.storm_rate, self.storm_burst, now)
+                )
+                if not bucket.take(now):
+                    storms[location] = storms.get(location, 0) + 1
+                    batch['suppressed'] += 1
+                    continue
+
+                group = self._group_for(location, now)
+                row = dict(alert, location=location, fingerprint=fingerprint, seen_at=seen_at, group_id=None)
+                if group is not None:
+                    batch['correlated'] += 1
+                    if 'id' in group:
+                        row['group_id'] = group['group_id']
+                    else:
+                        # Group leader is in this batch and has no id yet
+                        row['group_of'] = group['index']
+                entry = {'row': row, 'index': len(inserts), 'created_at': now, 'last_seen': now}
+                inserts.append(entry)
+                pending[fingerprint] = entry
+                if group is None:
+                    self.recent_by_location[location] = entry
+
+            for location, count in storms.items():
+                fingerprint = alert_fingerprint(location, STORM_ALERT_TYPE)
+                entry = self.open_alerts.get(fingerprint) or pending.get(fingerprint)
+                if entry is not None:
+                    self._merge(merges, entry, count, 'High')
+                    entry['last_seen'] = now
+                    continue
+                row = {
+                    'equipment_id': None,
+                    'location': location,
+                    'alert_type': STORM_ALERT_TYPE,
+                    'severity': 'High',
+                    'description': f"Alert rate limit reached at {location}; repeats are counted on this alert",
+                    'fingerprint': fingerprint,
+                    'occurrences': count,
+                    'seen_at': seen_at,
+                    'group_id': None
+                }
+                entry = {'row': row, 'index': len(inserts), 'created_at': now, 'last_seen': now}
+                inserts.append(entry)
+                pending[fingerprint] = entry
+
+            merge_rows = [
+                (alert_id, count, seen_at, severity) for alert_id, (count, severity) in merges.items()
+            ]
+            new_ids = apply_alert_changes([entry['row'] for entry in inserts], merge_rows, expired_ids, seen_at)
+            if new_ids is None:
+                # Nothing was written, so rebuild the index from the table next time
+                self.version = None
+                self.recent_by_location = {
+                    location: entry for location, entry in self.recent_by_location.items() if 'id' in entry
+                }
+                return dict(batch, failed=True)
+
+            for entry, alert_id in zip(inserts, new_ids):
+                row = entry.pop('row')
+                entry['id'] = alert_id
+                entry['group_id'] = row['group_id'] or (new_ids[row['group_of']] if 'group_of' in row else alert_id)
+            self.open_alerts.update(pending)
+            batch['inserted'] = len(inserts)
+            self.version = get_alert_version()
+
+            for key, value in batch.items():
+                self.stats[key] += value
+        return batch
+
+    @staticmethod
+    def _merge(merges, entry, count, severity):
+        if 'id' not in entry:
+            # Repeat of an alert first raised in this same batch
+            entry['row']['occurrences'] = entry['row'].get('occurrences', 1) + count
+            if severity == 'High':
+                entry['row']['severity'] = 'High'
+            return
+        previous_count, previous_severity = merges.get(entry['id'], (0, None))
+        merges[entry['id']] = (previous_count + count, 'High' if 'High' in (severity, previous_severity) else severity)
+
+def get_alert_pipeline(tenant=CURRENT_TENANT):
+    tenant = resolve_tenant(tenant)
+    with _pipelines_lock:
+        if tenant not in _pipelines:
+            _pipelines[tenant] = AlertPipeline(tenant)
+        return _pipelines[tenant]
+
+def submit_alerts(alerts, tenant=CURRENT_TENANT):
+    """Pass detector alert dicts through the tenant's alert pipeline"""
+    return get_alert_pipeline(tenant).submit(alerts)
+
+def anomaly_alerts(equipment_id, readings, anomaly_indices):
+    """Alert dicts for anomalous reading indices found in get_sensor_readings rows"""
+    if not anomaly_indices:
+        return []
+    latest = max(readings[i][6] for i in anomaly_indices)
+    return [{
+        'equipment_id': equipment_id,
+        'alert_type': 'Sensor Anomaly',
+        'severity': 'High' if len(anomaly_indices) > 0.2 * len(readings) else 'Medium',
+        'description': f"{len(anomaly_indices)} anomalous readings, latest at {latest}"
+    }]
@@ -0,0 +1,201 @@
+"""Fleet-wide anomaly screening without model fitting.
+
+All sensors' readings are stacked into one (sensor, time, channel) array,
+padded with NaN, and scored together:
+
+- Robust z-scores per channel: distance from the sensor's median in units of
+  its scaled MAD, so a few extreme readings cannot hide themselves.
+- Mahalanobis distance of each reading from the sensor's centre, using a
+  Ledoit-Wolf shrinkage covariance of the robust z-scores (winsorized at
+  WINSOR_Z). This catches readings whose channels are each plausible but
+  whose combination is not.
+- Window means: the mean robust z-score over every run of WINDOW
+  consecutive readings, which catches level shifts and drifts too small to
+  stand out reading by reading.
+
+Thresholds are set per sensor from its number of readings so that a clean
+sensor is flagged with probability of about false_alarm_rate per scan.
+Sensors with fewer than MIN_OWN_HISTORY readings, such as new ones, are
+scored against the fleet's pooled median and MAD instead of their own.
+
+detect_fleet_anomalies() uses the screen as a pre-filter: only sensors with
+flagged readings go on to the Isolation Forest in detect_anomalies, and new
+sensors keep the screen's flagged readings.
+"""
+from statistics import NormalDist
+
+import numpy as np
+
+from models import detect_anomalies
+
+CHANNELS = ['temperature', 'vibration', 'pressure', 'power_consumption']
+# Channel columns of get_sensor_readings rows
+CHANNEL_SLICE = slice(2, 6)
+# Scales a MAD to a standard deviation for normal data
+MAD_SCALE = 1.4826
+# Statistical efficiency of the MAD relative to the standard deviation for normal data
+MAD_EFFICIENCY = 0.37
+WINSOR_Z = 4.0
+# Readings needed for a sensor's own median, MAD and covariance; matches detect_anomalies
+MIN_OWN_HISTORY = 10
+WINDOW = 10
+FALSE_ALARM_RATE = 0.01
+
+def stack_readings(readings_by_sensor):
+    """(sensor ids, (sensor, time, channel) float array padded with NaN, reading counts)"""
+    sensor_ids = list(readings_by_sensor)
+    lengths = np.array([len(readings_by_sensor[s]) for s in sensor_ids], dtype=np.intp)
+    stack = np.full((len(sensor_ids), max(lengths.max(initial=0), 1), len(CHANNELS)), np.nan)
+    if lengths.sum():
+        values = np.array(
+            [row[CHANNEL_SLICE] for s in sensor_ids for row in readings_by_sensor[s]], dtype=np.float64
+        )
+        sensor = np.repeat(np.arange(len(sensor_ids)), lengths)
+        position = np.arange(len(values)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        stack[sensor, position] = values
+    return sensor_ids, stack, lengths
+
+def _median(values, lengths):
+    """Median along axis 1 of a NaN-padded array, from a sort (NaN sorts last)"""
+    ordered = np.sort(values, axis=1)
+    lower = np.maximum((lengths - 1) // 2, 0)[:, None, None]
+    upper = (lengths // 2)[:, None, None]
+    return (np.take_along_axis(ordered, lower, axis=1) + np.take_along_axis(ordered, upper, axis=1)) / 2
+
+def robust_zscores(stack, lengths):
+    """Robust z-scores per reading and channel; short histories use the fleet's pooled median and MAD"""
+    own = lengths >= MIN_OWN_HISTORY
+    median = _median(stack, lengths)
+    mad = _median(np.abs(stack - median), lengths) * MAD_SCALE
+
+    pooled = stack.reshape(-1, stack.shape[2])
+    pooled = pooled[~np.isnan(pooled).any(axis=1)]
+    if len(pooled):
+        fleet_median = np.median(pooled, axis=0)
+        fleet_mad = np.median(np.abs(pooled - fleet_median), axis=0) * MAD_SCALE
+    else:
+        fleet_median = fleet_mad = np.zeros(stack.shape[2])
+    fleet_mad = np.where(fleet_mad > 0, fleet_mad, 1.0)
+
+    median = np.where(own[:, None, None], median, fleet_median)
+    # A flat channel gets the fleet's spread, so any movement on it still stands out
+    mad = np.where(own[:, None, None] & (mad > 0), mad, fleet_mad)
+    return (stack - median) / mad
+
+def mahalanobis_distances(zscores, lengths):
+    """Squared Mahalanobis distance per reading under a Ledoit-Wolf shrinkage covariance per sensor"""
+    n_channels = zscores.shape[2]
+    valid = ~np.isnan(zscores).any(axis=2)
+    count = np.maximum(valid.sum(axis=1), 1)[:, None]
+
+    clipped = np.where(valid[..., None], np.clip(zscores, -WINSOR_Z, WINSOR_Z), 0)
+    centre = clipped.sum(axis=1) / count
+    centred = np.where(valid[..., None], clipped - centre[:, None], 0)
+    sample = np.einsum('stc,std->scd', centred, centred) / count[..., None]
+
+    # Shrink towards a scaled identity by the Ledoit-Wolf intensity
+    identity = np.eye(n_channels)
+    scale = np.trace(sample, axis1=1, axis2=2) / n_channels
+    target = scale[:, None, None] * identity
+    dispersion = ((sample - target) ** 2).sum(axis=(1, 2))
+    fourth = (centred ** 2).sum(axis=2) ** 2
+    noise = (fourth.sum(axis=1) / count[:, 0] - (sample ** 2).sum(axis=(1, 2))) / count[:, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shrinkage = np.where(dispersion > 0, np.minimum(noise, dispersion) / dispersion, 1.0)
+    covariance = (1 - shrinkage)[:, None, None] * sample + shrinkage[:, None, None] * target
+    # Short histories have no usable covariance; their z-scores are treated as independent
+    short = lengths < MIN_OWN_HISTORY
+    covariance[short] = identity
+    covariance += 1e-9 * identity
+    precision = np.linalg.inv(covariance)
+
+    deviation = np.where(valid[..., None], zscores - np.where(short[:, None], 0, centre)[:, None], 0)
+    distances = np.einsum('stc,scd,std->st', deviation, precision, deviation)
+    return np.where(valid, distances, np.nan)
+
+def window_scores(zscores, lengths, window=WINDOW):
+    """
+    Largest |mean z| * sqrt(window) over the channels for each run of window
+    consecutive readings, NaN where the run passes the end of a sensor's readings
+    """
+    n_windows = zscores.shape[1] - window + 1
+    if n_windows < 1:
+        return np.full((len(zscores), 0), np.nan)
+    clipped = np.nan_to_num(np.clip(zscores, -WINSOR_Z, WINSOR_Z))
+    sums = np.cumsum(np.pad(clipped, ((0, 0), (1, 0), (0, 0))), axis=1)
+    scores = np.abs(sums[:, window:] - sums[:, :n_windows]).max(axis=2) / np.sqrt(window)
+    complete = np.arange(n_windows)[None, :] + window <= lengths[:, None]
+    return np.where(complete, scores, np.nan)
+
+def _student_quantile(z, freedom):
+    """Cornish-Fisher expansion of the Student t quantile at the normal quantile z"""
+    return z + (z ** 3 + z) / (4 * freedom) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * freedom ** 2)
+
+def _thresholds(lengths, n_channels, false_alarm_rate):
+    """Per-sensor |z|, distance and window limits that a clean sensor's readings all stay under"""
+    # The false alarm rate is split between the three tests and spread over every reading
+    tests = np.maximum(lengths, 1)
+    normal = NormalDist()
+    z_limit = np.array([normal.inv_cdf(1 - false_alarm_rate / (6 * n * n_channels)) for n in tests])
+    # A MAD from n readings is as noisy as a standard deviation from MAD_EFFICIENCY * n, so the
+    # own-history limits are Student t quantiles with those degrees of freedom
+    freedom = np.where(lengths >= MIN_OWN_HISTORY, MAD_EFFICIENCY * (tests - 1), np.inf)
+    z_limit = _student_quantile(z_limit, freedom)
+    window_limit = z_limit.copy()
+    # Wilson-Hilferty approximation of the chi-squared quantile with n_channels degrees of freedom
+    tail = np.array([normal.inv_cdf(1 - false_alarm_rate / (3 * n)) for n in tests])
+    spread = 2 / (9 * n_channels)
+    distance_limit = n_channels * (1 - spread + tail * np.sqrt(spread)) ** 3
+    # An estimated covariance inflates distances by about (n - 1) / (n - p - 1) on average
+    distance_limit *= np.where(lengths >= MIN_OWN_HISTORY,
+                               (tests - 1) / np.maximum(tests - n_channels - 1, 1), 1)
+    return z_limit, distance_limit, window_limit
+
+def screen_sensors(readings_by_sensor, false_alarm_rate=FALSE_ALARM_RATE):
+    """
+    Score every sensor's get_sensor_readings rows at once. Returns
+    {sensor_id: {'flagged': reading indices, 'max_zscore', 'max_distance'}};
+    a sensor with flagged readings is suspicious.
+    """
+    if not readings_by_sensor:
+        return {}
+    sensor_ids, stack, lengths = stack_readings(readings_by_sensor)
+    zscores = robust_zscores(stack, lengths)
+    distances = mahalanobis_distances(zscores, lengths)
+    windows = window_scores(zscores, lengths)
+    z_limit, distance_limit, window_limit = _thresholds(lengths, stack.shape[2], false_alarm_rate)
+
+    max_z = np.nan_to_num(np.abs(zscores)).max(axis=2)
+    flagged = (max_z > z_limit[:, None]) | (np.nan_to_num(distances) > distance_limit[:, None])
+    # Every reading of a window over the limit is flagged
+    over = np.nan_to_num(windows) > window_limit[:, None]
+    if over.shape[1]:
+        starts = np.cumsum(np.pad(over, ((0, 0), (WINDOW, WINDOW - 1))), axis=1)
+        flagged |= (starts[:, WINDOW:] - starts[:, :-WINDOW]) > 0
+    max_zscore = max_z.max(axis=1)
+    max_distance = np.nan_to_num(distances).max(axis=1)
+
+    return {
+        sensor_id: {
+            'flagged': np.flatnonzero(flagged[i, :lengths[i]]).tolist(),
+            'max_zscore': float(max_zscore[i]),
+            'max_distance': float(max_distance[i])
+        }
+        for i, sensor_id in enumerate(sensor_ids)
+    }
+
+def detect_fleet_anomalies(readings_by_sensor, contamination=0.1, false_alarm_rate=FALSE_ALARM_RATE):
+    """
+    Anomalous reading indices per sensor: Isolation Forest on the sensors the
+    screen finds suspicious, the screen's own flags for sensors too new to fit
+    """
+    anomalies = {}
+    for sensor_id, screen in screen_sensors(readings_by_sensor, false_alarm_rate).items():
+        if not screen['flagged']:
+            continue
+        readings = readings_by_sensor[sensor_id]
+        if len(readings) >= MIN_OWN_HISTORY:
+            anomalies[sensor_id] = detect_anomalies(readings, contamination)
+        else:
+            anomalies[sensor_id] = screen['flagged']
+    return anomalies
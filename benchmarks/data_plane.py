@@ -0,0 +1,88 @@
+"""Memory per added dashboard session with and without the shared data plane.
+
+    python -m benchmarks.data_plane --sessions 50 --sensors 20 --hours 24
+
+Publishes the iot_fleet and supply_chain_risk artifacts, then opens the given
+number of simulated sessions that each keep the artifacts they loaded. First
+every session unpickles its own copy, as load_precomputed_result did before
+the data plane; then every session takes a lease and a view of the shared
+snapshot. Python heap growth is measured with tracemalloc, and the shared
+segments are reported separately. Runs in a temporary directory and leaves
+guardian_io.db untouched.
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+def _per_session(open_session, sessions):
+    """Heap bytes added per session and seconds per session open"""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    held = []
+    start = time.perf_counter()
+    for _ in range(sessions):
+        held.append(open_session())
+    elapsed = time.perf_counter() - start
+    added = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return added / sessions, elapsed / sessions, held
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--sensors', type=int, default=20)
+    parser.add_argument('--hours', type=int, default=24)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='guardian_data_plane_')
+    os.chdir(workdir)
+
+    from data_plane import get_data_plane
+    from results_store import (
+        get_latest_result, get_latest_result_info, get_result_payload, init_results_tables, save_result
+    )
+    from tasks import iot_fleet, supply_chain_risk
+
+    init_results_tables()
+    save_result('iot_fleet', iot_fleet(args.sensors, args.hours))
+    save_result('supply_chain_risk', supply_chain_risk())
+    artifacts = ['iot_fleet', 'supply_chain_risk']
+
+    def copy_per_session():
+        return {artifact: get_latest_result(artifact)['payload'] for artifact in artifacts}
+
+    plane = get_data_plane()
+
+    def shared_view():
+        session = {}
+        for artifact in artifacts:
+            version = get_latest_result_info(artifact)['version']
+            session[artifact] = plane.lease(artifact, version, lambda: get_result_payload(artifact, version))
+        return session
+
+    # Build the snapshots once so the shared run measures only what a session adds
+    shared_view()
+
+    copied, copy_seconds, held = _per_session(copy_per_session, args.sessions)
+    del held
+    viewed, view_seconds, held = _per_session(shared_view, args.sessions)
+
+    shared = sum(row['bytes'] for row in plane.usage())
+    print(f"{args.sessions} sessions, {args.sensors} sensors x {args.hours}h of readings")
+    print(f"copy per session: {copied / 1e6:8.3f} MB/session  {copy_seconds * 1000:6.2f} ms/session")
+    print(f"shared views:     {viewed / 1e6:8.3f} MB/session  {view_seconds * 1000:6.2f} ms/session "
+          f"(+ {shared / 1e6:.2f} MB shared once)")
+    print(f"reduction:        {copied / max(viewed, 1):8.1f}x per added session")
+    print("leases:", {row['key']: row['leases'] for row in plane.usage()})
+
+    del held
+    gc.collect()
+    print("after sessions end:", {row['key']: row['leases'] for row in plane.usage()})
+    plane.close()
+
+if __name__ == '__main__':
+    main()
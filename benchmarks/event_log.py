@@ -0,0 +1,123 @@
+"""Producer latency, contention and crash replay of the write-ahead event log.
+
+    python -m benchmarks.event_log --readings 20000 --lock-seconds 6
+
+Writes sensor readings through add_sensor_reading directly and through the
+event log, reporting per-call latency and end-to-end throughput. Then holds
+an exclusive lock on the database while a producer writes one reading every
+10 ms: direct writes stall for the busy timeout and the ones that time out are
+dropped, logged writes return at once and are applied after the lock is released. Finally a child process logs
+readings with GUARDIAN_IO_EVENT_LOG_WAIT=1 and dies before they are applied;
+a fresh event log replays them. Runs in a temporary directory and leaves
+guardian_io.db untouched.
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+CHILD = """
+import os, sqlite3, sys
+from models import add_sensor_reading
+from event_log import get_event_log
+blocker = sqlite3.connect('guardian_io.db')
+blocker.execute('BEGIN EXCLUSIVE')
+for i in range(int(sys.argv[1])):
+    add_sensor_reading(f'CRASH_{i}', 20.0, 0.1, 100.0, 50.0)
+# Torn record, as if the process died mid-write
+segment = sorted(os.listdir(get_event_log().directory))[0]
+with open(os.path.join(get_event_log().directory, segment), 'ab') as handle:
+    handle.write(b'\\x10\\x00\\x00')
+os._exit(1)
+"""
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+def _count(prefix):
+    conn = sqlite3.connect('guardian_io.db')
+    count = conn.execute('SELECT COUNT(*) FROM sensor_readings WHERE sensor_id LIKE ?', (prefix + '%',)).fetchone()[0]
+    conn.close()
+    return count
+
+def _produce(prefix, count, interval=0.0):
+    from models import add_sensor_reading
+    latencies, dropped = [], 0
+    for i in range(count):
+        start = time.perf_counter()
+        if not add_sensor_reading(f'{prefix}_{i}', 20.0 + i % 7, 0.1, 100.0, 50.0):
+            dropped += 1
+        latencies.append(time.perf_counter() - start)
+        if interval:
+            time.sleep(interval)
+    return latencies, dropped
+
+def _hold_lock(seconds, ready):
+    conn = sqlite3.connect('guardian_io.db')
+    conn.execute('BEGIN EXCLUSIVE')
+    ready.set()
+    time.sleep(seconds)
+    conn.rollback()
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readings', type=int, default=20000)
+    parser.add_argument('--lock-seconds', type=float, default=6.0)
+    parser.add_argument('--crash-readings', type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='guardian_event_log_')
+    os.chdir(workdir)
+
+    import event_log
+    from models import init_iot_tables
+
+    init_iot_tables()
+
+    print(f"{'mode':<8} {'p50 us':>8} {'p99 us':>8} {'max ms':>8} {'rows/s':>10}")
+    for mode in ['direct', 'logged']:
+        event_log.EVENT_LOG_ENABLED = mode == 'logged'
+        start = time.perf_counter()
+        latencies, dropped = _produce(mode.upper(), args.readings)
+        if mode == 'logged':
+            event_log.get_event_log().flush()
+        elapsed = time.perf_counter() - start
+        assert _count(mode.upper()) == args.readings and not dropped
+        print(f"{mode:<8} {_percentile(latencies, 0.5) * 1e6:>8.1f} {_percentile(latencies, 0.99) * 1e6:>8.1f} "
+              f"{max(latencies) * 1000:>8.2f} {args.readings / elapsed:>10,.0f}")
+    status = event_log.get_event_log().status()
+    print(f"logged: {status['fsyncs']} fsyncs for {status['appended']:,} records")
+
+    count = int(args.lock_seconds / 0.01)
+    print(f"\nwriting {count} readings over {args.lock_seconds:.0f}s while the database is locked")
+    for mode in ['direct', 'logged']:
+        event_log.EVENT_LOG_ENABLED = mode == 'logged'
+        ready = threading.Event()
+        holder = threading.Thread(target=_hold_lock, args=(args.lock_seconds, ready))
+        holder.start()
+        ready.wait()
+        latencies, dropped = _produce(f'LOCKED_{mode}', count, interval=0.01)
+        holder.join()
+        if mode == 'logged':
+            event_log.get_event_log().flush()
+        print(f"{mode:<8} dropped {dropped:>5}  stored {_count(f'LOCKED_{mode}'):>5}  "
+              f"max call {max(latencies) * 1000:>8.1f} ms")
+
+    env = dict(os.environ, GUARDIAN_IO_EVENT_LOG='1', GUARDIAN_IO_EVENT_LOG_WAIT='1',
+               PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                          os.environ.get('PYTHONPATH')])))
+    subprocess.run([sys.executable, '-c', CHILD, str(args.crash_readings)], env=env, check=False)
+    print(f"\ncrashed child logged {args.crash_readings} readings, {_count('CRASH_')} applied before exit")
+    start = time.perf_counter()
+    replayed = event_log.recover_logs()
+    print(f"replayed {replayed} records in {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"{_count('CRASH_')} stored, {len(os.listdir(event_log.EVENT_LOG_DIR)) - 1} orphan logs left")
+
+if __name__ == '__main__':
+    main()
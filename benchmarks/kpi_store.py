@@ -0,0 +1,75 @@
+"""KPI store ingest and query throughput.
+
+    python -m benchmarks.kpi_store --years 3
+
+Backfills hourly history, reloads it from CSV and Parquet files, then times
+the dashboard query paths. Runs in a temporary directory and leaves
+guardian_io.db untouched.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+def _time_query(query, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        frame = query()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, len(frame)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--tenant', default='Manufacturing')
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='guardian_kpis_')
+    os.chdir(workdir)
+
+    import pandas as pd
+    from kpi_store import backfill, get_kpi_history, load_kpi_file, KPI_METRICS
+    from models import init_kpi_tables
+
+    init_kpi_tables(args.tenant)
+
+    start = time.perf_counter()
+    written = backfill(args.tenant, args.years, seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"backfill: {written:,} hourly values in {elapsed:.2f}s ({written / elapsed:,.0f}/s)")
+
+    hourly = get_kpi_history(args.tenant, grain='hourly')
+    hourly.to_csv('hourly.csv', index=False)
+    files = ['hourly.csv']
+    try:
+        hourly.to_parquet('hourly.parquet')
+        files.append('hourly.parquet')
+    except ImportError:
+        print("pyarrow not installed; skipping Parquet load")
+    for path in files:
+        start = time.perf_counter()
+        written = load_kpi_file(path, 'hourly', args.tenant)
+        elapsed = time.perf_counter() - start
+        print(f"load {path}: {written:,} values in {elapsed:.2f}s ({written / elapsed:,.0f}/s)")
+
+    last = hourly['timestamp'].max().normalize()
+    metric = next(iter(KPI_METRICS[args.tenant]))
+    queries = {
+        'daily, last year, all metrics': lambda: get_kpi_history(
+            args.tenant, last - pd.Timedelta(days=364), last),
+        'daily, full history, all metrics': lambda: get_kpi_history(args.tenant),
+        f'hourly, last 90 days, {metric}': lambda: get_kpi_history(
+            args.tenant, last - pd.Timedelta(days=89), last, [metric], 'hourly'),
+        'hourly, last year, all metrics': lambda: get_kpi_history(
+            args.tenant, last - pd.Timedelta(days=364), last, grain='hourly')
+    }
+    print(f"{'query':<40} {'rows':>7} {'median ms':>10}")
+    for name, query in queries.items():
+        median_ms, rows = _time_query(query, args.repeats)
+        print(f"{name:<40} {rows:>7} {median_ms:>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Query result cache latency, invalidation and hit rate.
+
+    python -m benchmarks.query_cache --alerts 20000 --suppliers 2000
+
+Times get_active_alerts, get_suppliers and get_supply_chain_events with the
+cache off and on, checks that an alert write invalidates alert reads but not
+supplier reads, then runs a mixed workload of reads with one write per
+--reads-per-write reads, and finally shrinks the memory bound to show LRU
+eviction. Runs in a temporary directory and leaves guardian_io.db untouched.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+def _mean_ms(run, repeat=50):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--alerts', type=int, default=20000)
+    parser.add_argument('--suppliers', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--reads-per-write', type=int, default=50)
+    parser.add_argument('--operations', type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='guardian_query_cache_')
+    os.chdir(workdir)
+
+    import query_cache
+    from models import (
+        init_iot_tables, init_supply_chain_tables, create_maintenance_alert, create_maintenance_alerts,
+        add_supplier, get_active_alerts, get_suppliers, get_supply_chain_events
+    )
+    from tenancy import get_connection
+
+    init_iot_tables()
+    init_supply_chain_tables()
+    create_maintenance_alerts([
+        {'equipment_id': f'Pump_{i % 500}', 'alert_type': 'Anomaly', 'severity': 'High',
+         'description': f'Reading outside normal range ({i})'}
+        for i in range(args.alerts)
+    ])
+    conn = get_connection()
+    conn.executemany('INSERT INTO suppliers (name, location, risk_score, performance_score) VALUES (?, ?, ?, ?)',
+                     [(f'Supplier {i}', 'USA', random.random() * 100, random.random() * 100)
+                      for i in range(args.suppliers)])
+    conn.executemany('INSERT INTO supply_chain_events (supplier_id, event_type, severity, description) '
+                     'VALUES (?, ?, ?, ?)',
+                     [(i % args.suppliers + 1, 'Delivery Delay', 'High', f'Container {i} delayed')
+                      for i in range(args.events)])
+    conn.commit()
+    conn.close()
+
+    reads = {
+        f'get_active_alerts ({args.alerts:,} rows)': get_active_alerts,
+        f'get_suppliers ({args.suppliers:,} rows)': get_suppliers,
+        f'get_supply_chain_events ({args.events:,} rows)': get_supply_chain_events
+    }
+    print(f"{'read':<42} {'uncached ms':>12} {'cached ms':>10}")
+    for label, read in reads.items():
+        query_cache.QUERY_CACHE_ENABLED = False
+        uncached = _mean_ms(read, repeat=10)
+        query_cache.QUERY_CACHE_ENABLED = True
+        read()
+        print(f"{label:<42} {uncached:>12.2f} {_mean_ms(read):>10.3f}")
+
+    alerts, suppliers = get_active_alerts(), get_suppliers()
+    create_maintenance_alert('Pump_1', 'Anomaly', 'Low', 'Invalidation check')
+    stats = query_cache.query_cache_stats()['functions']
+    hits = stats['get_suppliers']['hits']
+    assert len(get_active_alerts()) == len(alerts) + 1
+    assert get_suppliers() == suppliers
+    stats = query_cache.query_cache_stats()['functions']
+    print(f"\nafter an alert write: get_active_alerts invalidated {stats['get_active_alerts']['invalidated']}x, "
+          f"get_suppliers served from cache ({stats['get_suppliers']['hits'] - hits} hit)")
+
+    query_cache.clear_query_cache()
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for i in range(args.operations):
+        if i % (args.reads_per_write + 1) == args.reads_per_write:
+            if rng.random() < 0.5:
+                create_maintenance_alert(f'Pump_{i}', 'Anomaly', 'Medium', 'Mixed workload')
+            else:
+                add_supplier(f'Supplier x{i}', 'USA', 50, 50)
+        else:
+            rng.choice(list(reads.values()))()
+    elapsed = time.perf_counter() - start
+    stats = query_cache.query_cache_stats()
+    print(f"\nmixed workload: {args.operations:,} operations in {elapsed:.2f}s, "
+          f"one write per {args.reads_per_write} reads, hit rate {stats['hit_rate']:.1%}")
+    for name, row in stats['functions'].items():
+        print(f"  {name:<26} hits {row['hits']:>5}  misses {row['misses']:>4}  hit rate {row['hit_rate']:.1%}")
+    print(f"  {stats['entries']} entries, {stats['bytes'] / 1024 / 1024:.1f} MB estimated")
+
+    query_cache.QUERY_CACHE_MB = stats['bytes'] / 1024 / 1024 * 0.6
+    for days in range(1, 11):
+        get_supply_chain_events(days)
+    stats = query_cache.query_cache_stats()
+    print(f"\nbound {query_cache.QUERY_CACHE_MB:.1f} MB: {stats['entries']} entries, "
+          f"{stats['bytes'] / 1024 / 1024:.1f} MB, {stats['evictions']} evictions")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Monte Carlo supply chain risk scenario throughput.
+
+    python -m benchmarks.risk_scenarios --paths 10000 100000 --horizon 365
+"""
+import argparse
+import time
+import tracemalloc
+
+from supply_chain_data import generate_risk_metrics, generate_supplier_data
+from supply_chain_scenarios import simulate_risk_scenarios
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paths', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--horizon', type=int, default=365)
+    parser.add_argument('--suppliers', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    risk_data = generate_risk_metrics()
+    supplier_data = generate_supplier_data(args.suppliers)
+    # Warm up NumPy's BLAS and allocator before timing
+    simulate_risk_scenarios(risk_data, supplier_data, n_paths=1000, horizon_days=30, seed=0)
+
+    print(f"{'paths':>8} {'days':>5} {'best s':>8} {'paths*days/s':>14} {'peak MiB':>9}")
+    for n_paths in args.paths:
+        timings = []
+        for repeat in range(args.repeats):
+            start = time.perf_counter()
+            simulate_risk_scenarios(risk_data, supplier_data, n_paths=n_paths,
+                                    horizon_days=args.horizon, seed=repeat)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        simulate_risk_scenarios(risk_data, supplier_data, n_paths=n_paths, horizon_days=args.horizon, seed=0)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        best = min(timings)
+        print(f"{n_paths:>8} {args.horizon:>5} {best:>8.3f} {n_paths * args.horizon / best:>14,.0f} "
+              f"{peak / 2 ** 20:>9.1f}")
+
+if __name__ == '__main__':
+    main()
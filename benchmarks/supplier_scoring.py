@@ -0,0 +1,67 @@
+"""Supplier re-ranking latency after a weight change.
+
+    python -m benchmarks.supplier_scoring --suppliers 1000000 --k 10
+
+Builds a supplier table with the value ranges of generate_supplier_data
+(drawn as arrays, since the generator builds rows one at a time), then times
+preparing the scorer and re-ranking for every weight profile with each
+method: the first ranking under a profile, the cached repeat, and top-k by
+argpartition against a full argsort.
+"""
+import argparse
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--suppliers', type=int, default=1_000_000)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    import numpy as np
+    import pandas as pd
+    from schemas import apply_schema
+    from supplier_scoring import METHODS, WEIGHT_PROFILES, get_supplier_scorer
+
+    rng = np.random.default_rng(0)
+    n = args.suppliers
+    suppliers = apply_schema(pd.DataFrame({
+        'risk_score': rng.uniform(1, 10, n).round(2),
+        'performance_score': rng.uniform(60, 100, n).round(2),
+        'delivery_time': rng.uniform(5, 30, n).round(),
+        'quality_score': rng.uniform(80, 100, n).round(2),
+        'cost_variance': rng.uniform(-10, 10, n).round(2)
+    }), 'suppliers')
+
+    start = time.perf_counter()
+    scorer = get_supplier_scorer(suppliers)
+    print(f"{n:,} suppliers, prepare scorer: {(time.perf_counter() - start) * 1000:.0f} ms")
+    start = time.perf_counter()
+    get_supplier_scorer(suppliers)
+    print(f"scorer lookup for the same table: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"{'method':<7} {'profile':<14} {'re-rank ms':>10} {'cached ms':>9} {'top-k ms':>8} {'argsort ms':>10}")
+    for method in METHODS:
+        for profile in WEIGHT_PROFILES:
+            start = time.perf_counter()
+            top = scorer.top_k(args.k, profile, method)
+            rerank = time.perf_counter() - start
+
+            start = time.perf_counter()
+            scores = scorer.scores(profile, method)
+            cached = time.perf_counter() - start
+
+            start = time.perf_counter()
+            scorer.top_k(args.k, profile, method)
+            top_k = time.perf_counter() - start
+
+            start = time.perf_counter()
+            full = np.argsort(-scores, kind='stable')[:args.k]
+            argsort = time.perf_counter() - start
+            assert np.array_equal(scores[top], scores[full])
+
+            print(f"{method:<7} {profile:<14} {rerank * 1000:>10.1f} {cached * 1000:>9.3f} "
+                  f"{top_k * 1000:>8.1f} {argsort * 1000:>10.1f}")
+    print("cache:", scorer.stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Per-tenant query latency with skewed tenant sizes.
+
+    python -m benchmarks.tenant_latency --large-readings 1000000 --small-readings 10000
+
+Loads a large and a small tenant twice: once mixed together in the shared
+database (the pre-tenancy layout) and once split into per-tenant database
+files. It then times the models.py read paths for each tenant. Runs in a
+temporary directory and leaves guardian_io.db untouched.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return (
+        statistics.median(samples) * 1000,
+        samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000
+    )
+
+def _load_tenant(conn, prefix, n_readings, n_alerts, n_suppliers, n_sensors, rng):
+    sensor_ids = [f'{prefix}_SENSOR_{i}' for i in range(n_sensors)]
+    conn.executemany(
+        'INSERT INTO iot_sensors (sensor_id, equipment_id, sensor_type, location) VALUES (?, ?, ?, ?)',
+        [(sid, f'{prefix}_EQ_{i}', 'Multi-Metric', 'Line A') for i, sid in enumerate(sensor_ids)]
+    )
+    values = rng.normal(50, 5, size=(n_readings, 4))
+    minutes = rng.integers(0, 23 * 60, size=n_readings)
+    conn.executemany(
+        "INSERT INTO sensor_readings (sensor_id, temperature, vibration, pressure, power_consumption, timestamp) "
+        "VALUES (?, ?, ?, ?, ?, datetime('now', ?))",
+        (
+            (sensor_ids[i % n_sensors], *values[i].tolist(), f'-{int(minutes[i])} minutes')
+            for i in range(n_readings)
+        )
+    )
+    conn.executemany(
+        'INSERT INTO maintenance_alerts (equipment_id, alert_type, severity, description, is_resolved) '
+        'VALUES (?, ?, ?, ?, ?)',
+        (
+            (f'{prefix}_EQ_{i % n_sensors}', 'Predictive Maintenance', 'High', 'benchmark', bool(i % 2))
+            for i in range(n_alerts)
+        )
+    )
+    conn.executemany(
+        'INSERT INTO suppliers (name, location, risk_score, performance_score) VALUES (?, ?, ?, ?)',
+        ((f'{prefix} Supplier {i}', 'USA', 5.0, 80.0) for i in range(n_suppliers))
+    )
+    conn.commit()
+    return sensor_ids
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--large-readings', type=int, default=1_000_000)
+    parser.add_argument('--small-readings', type=int, default=10_000)
+    parser.add_argument('--large-alerts', type=int, default=50_000)
+    parser.add_argument('--small-alerts', type=int, default=500)
+    parser.add_argument('--repeats', type=int, default=30)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='guardian_tenants_')
+    os.chdir(workdir)
+
+    import models
+    from tenancy import tenant_scope, close_pools
+
+    rng = np.random.default_rng(42)
+    tenants = {
+        'Manufacturing': (args.large_readings, args.large_alerts, 2000, 200),
+        'Healthcare': (args.small_readings, args.small_alerts, 20, 5)
+    }
+
+    # Shared layout: every tenant's rows in guardian_io.db, no tenant key
+    models.init_tenant_databases()
+    shared_sensors = {}
+    conn = models.get_connection(None)
+    for tenant, sizes in tenants.items():
+        shared_sensors[tenant] = _load_tenant(conn, tenant[:3].upper(), *sizes, rng)
+    conn.close()
+
+    # Partitioned layout: one database file per tenant
+    tenant_sensors = {}
+    for tenant, sizes in tenants.items():
+        conn = models.get_connection(tenant)
+        tenant_sensors[tenant] = _load_tenant(conn, tenant[:3].upper(), *sizes, rng)
+        conn.close()
+
+    queries = {
+        'get_sensor_readings': lambda sensors: models.get_sensor_readings(sensors[0]),
+        'get_active_alerts': lambda sensors: models.get_active_alerts(),
+        'get_suppliers': lambda sensors: models.get_suppliers()
+    }
+
+    print(f"{'layout':<12} {'tenant':<14} {'query':<22} {'rows':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for layout, scope, sensors_by_tenant in (
+        ('shared', lambda tenant: None, shared_sensors),
+        ('per-tenant', lambda tenant: tenant, tenant_sensors)
+    ):
+        for tenant in tenants:
+            for name, query in queries.items():
+                with tenant_scope(scope(tenant)):
+                    rows = query(sensors_by_tenant[tenant])
+                    samples = []
+                    for _ in range(args.repeats):
+                        start = time.perf_counter()
+                        query(sensors_by_tenant[tenant])
+                        samples.append(time.perf_counter() - start)
+                p50, p95 = _percentiles(samples)
+                print(f"{layout:<12} {tenant:<14} {name:<22} {len(rows):>8} {p50:>9.2f} {p95:>9.2f}")
+
+    close_pools()
+    print(f"Benchmark databases left in {workdir}")
+
+if __name__ == '__main__':
+    main()
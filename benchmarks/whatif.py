@@ -0,0 +1,71 @@
+"""What-if sensitivity grid latency.
+
+    python -m benchmarks.whatif --steps 101
+
+Times a sensitivity surface of steps x steps scenarios (10,201 at the
+default) from a cold and a warm result cache, plus building its Plotly
+heatmap, against evaluating the same cells one at a time. Also times the
+full three-lever grid of steps^3 scenarios in one call.
+"""
+import argparse
+import time
+
+import numpy as np
+
+def _best_ms(run, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', type=int, default=101)
+    parser.add_argument('--span', type=float, default=20.0)
+    args = parser.parse_args()
+
+    import plotly.graph_objects as go
+    import manufacturing_whatif
+    from data_generator import generate_manufacturing_data
+    from manufacturing_whatif import evaluate_whatif, sensitivity_surface, whatif_baseline
+
+    baseline = whatif_baseline(generate_manufacturing_data())
+    values = np.linspace(-args.span, args.span, args.steps)
+    metric = 'energy_cost_per_good_unit'
+
+    def surface():
+        return sensitivity_surface(baseline, metric, 'efficiency_change', values, 'incident_rate_change', values,
+                                   {'energy_price_change': 10})
+
+    def cold():
+        manufacturing_whatif._results.clear()
+        return surface()
+
+    def per_cell():
+        return np.array([
+            [evaluate_whatif(baseline, x, 10, y)[metric].item() for x in values]
+            for y in values[:10]
+        ])
+
+    cells = args.steps * args.steps
+    cold_ms, result = _best_ms(cold)
+    warm_ms, _ = _best_ms(surface)
+    loop_ms, looped = _best_ms(per_cell, repeat=1)
+    base = evaluate_whatif(baseline)[metric].item()
+    assert np.allclose((looped / base - 1) * 100, result[:10])
+    figure_ms, _ = _best_ms(lambda: go.Figure(go.Heatmap(z=result, x=values, y=values, zmid=0)).to_json())
+
+    print(f"{cells:,} cell surface")
+    print(f"  vectorized, cold cache   {cold_ms:8.2f} ms")
+    print(f"  vectorized, warm cache   {warm_ms:8.2f} ms")
+    print(f"  per-cell loop (est.)     {loop_ms * args.steps / 10:8.0f} ms")
+    print(f"  heatmap figure to JSON   {figure_ms:8.2f} ms")
+
+    full_ms, full = _best_ms(lambda: (manufacturing_whatif._results.clear(),
+                                       evaluate_whatif(baseline, values, values, values))[1], repeat=3)
+    print(f"{full[metric].size:,} cell three-lever grid  {full_ms:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
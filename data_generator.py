@@ -39,6 +39,39 @@ def generate_healthcare_data():
 
     return pd.DataFrame(data)
 
+def generate_hourly_kpis(industry, start, end, seed=None):
+    """Hourly KPI history for an industry with the same trends and seasonality as the daily data"""
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range(start=start, end=end, freq='h', inclusive='left')
+    n = len(hours)
+    t = np.arange(n) / 24
+    yearly = np.sin(2 * np.pi * t / 365)
+    # Day shift peak around 14:00, night trough around 02:00
+    daily = np.sin(2 * np.pi * (hours.hour.to_numpy() - 8) / 24)
+
+    if industry == 'Manufacturing':
+        data = {
+            'timestamp': hours,
+            'production_output': (1000 + 0.1 * t + 50 * yearly) / 24 * (1 + 0.3 * daily) + rng.normal(0, 5, n),
+            'machine_efficiency': 92 + 3 * yearly + rng.normal(0, 2, n),
+            'quality_rate': 97 + rng.uniform(-1.5, 1.5, n),
+            'energy_consumption': (5000 + 200 * yearly) / 24 * (1 + 0.2 * daily) + rng.normal(0, 20, n),
+            'maintenance_incidents': rng.poisson(2 / 24, n)
+        }
+    elif industry == 'Healthcare':
+        data = {
+            'timestamp': hours,
+            'patient_satisfaction': 90 + 5 * yearly + rng.normal(0, 4, n),
+            'bed_occupancy': 80 + 10 * yearly + 5 * daily + rng.normal(0, 5, n),
+            'average_wait_time': 45 + 15 * yearly + 10 * daily + rng.normal(0, 8, n),
+            'staff_availability': 95 + 2 * daily + rng.normal(0, 3, n),
+            'equipment_utilization': 85 + 5 * yearly + 8 * daily + rng.normal(0, 4, n)
+        }
+    else:
+        raise ValueError(f"Unknown industry: {industry}")
+
+    return pd.DataFrame(data)
+
 def predict_metric(df, metric_column, days_to_predict=30):
     """Generate predictions for a given metric using Linear Regression"""
     # Prepare features (days since start)
@@ -64,9 +97,10 @@ def predict_metric(df, metric_column, days_to_predict=30):
         f'predicted_{metric_column}': predictions
     })
 
-def get_manufacturing_predictions():
+def get_manufacturing_predictions(df=None):
     """Get predictions for key manufacturing metrics"""
-    df = generate_manufacturing_data()
+    if df is None:
+        df = generate_manufacturing_data()
     predictions = {}
 
     for metric in ['production_output', 'machine_efficiency', 'quality_rate']:
@@ -75,9 +109,10 @@ def get_manufacturing_predictions():
 
     return predictions
 
-def get_healthcare_predictions():
+def get_healthcare_predictions(df=None):
     """Get predictions for key healthcare metrics"""
-    df = generate_healthcare_data()
+    if df is None:
+        df = generate_healthcare_data()
     predictions = {}
 
     for metric in ['patient_satisfaction', 'bed_occupancy', 'average_wait_time']:
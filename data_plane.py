@@ -0,0 +1,259 @@
+"""Process-wide shared snapshots of precomputed results.
+
+Every Streamlit session used to unpickle its own copy of each precomputed
+artifact. The data plane keeps one read-only snapshot per artifact version
+for the whole server process instead. The numeric, datetime and categorical
+code columns of its DataFrames, and its NumPy arrays, are packed into one
+multiprocessing.shared_memory segment. Sessions get shallow views whose
+columns point into that segment, so an extra session costs a few small
+wrapper objects rather than a copy of the data.
+
+Snapshots are reference counted. Each session holds a lease on the versions
+it is showing, and the lease is released when the session moves to a newer
+version or goes away. A superseded snapshot is freed once no lease is left.
+Writes to a view's columns fail or copy (under pandas copy-on-write) rather
+than changing what other sessions see.
+"""
+import atexit
+import itertools
+import os
+import threading
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+ALIGNMENT = 64
+SESSION_LEASES_KEY = '_data_plane_leases'
+
+_segment_ids = itertools.count()
+_plane = None
+_plane_lock = threading.Lock()
+
+class _Slot:
+    """Placeholder for an array stored in the snapshot's segment"""
+
+    def __init__(self, index):
+        self.index = index
+
+class _FrameTemplate:
+    def __init__(self, columns, index):
+        self.columns = columns
+        self.index = index
+
+def _is_shareable(array):
+    return isinstance(array, np.ndarray) and array.dtype.kind in 'biufcmM' and array.size > 0
+
+def _template(value, arrays):
+    """Replace the arrays inside value with slots, collecting them in arrays"""
+    if isinstance(value, pd.DataFrame):
+        columns = []
+        for position in range(value.shape[1]):
+            name, series = value.columns[position], value.iloc[:, position]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                columns.append((name, 'category', _template(series.cat.codes.to_numpy(), arrays), series.dtype))
+            elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM':
+                columns.append((name, 'array', _template(series.to_numpy(), arrays), None))
+            else:
+                # Strings and other objects are shared by reference
+                columns.append((name, 'object', series.array, None))
+        return _FrameTemplate(columns, value.index)
+    if _is_shareable(value):
+        arrays.append(value)
+        return _Slot(len(arrays) - 1)
+    if isinstance(value, dict):
+        return {key: _template(item, arrays) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_template(item, arrays) for item in value)
+    return value
+
+def _build(template, views):
+    if isinstance(template, _FrameTemplate):
+        data = {}
+        for name, kind, stored, dtype in template.columns:
+            if kind == 'category':
+                data[name] = pd.Categorical.from_codes(_build(stored, views), dtype=dtype, validate=False)
+            elif kind == 'array':
+                data[name] = _build(stored, views)
+            else:
+                data[name] = stored
+        return pd.DataFrame(data, index=template.index, copy=False)
+    if isinstance(template, _Slot):
+        return views[template.index]
+    if isinstance(template, dict):
+        return {key: _build(item, views) for key, item in template.items()}
+    if isinstance(template, (list, tuple)):
+        return type(template)(_build(item, views) for item in template)
+    return template
+
+def _view(value):
+    """Per-session shallow copy: new containers and frame objects over the same column buffers"""
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {key: _view(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_view(item) for item in value)
+    return value
+
+class Snapshot:
+    """One artifact version with its arrays packed into a shared memory segment"""
+
+    def __init__(self, key, version, payload):
+        self.key = key
+        self.version = version
+        self.refs = 0
+        arrays = []
+        template = _template(payload, arrays)
+
+        offsets = []
+        size = 0
+        for array in arrays:
+            size = -(-size // ALIGNMENT) * ALIGNMENT
+            offsets.append(size)
+            size += array.nbytes
+        self.nbytes = size
+        self.segment = None
+        self.unlinked = False
+        if size:
+            name = f'guardian_io_{os.getpid()}_{next(_segment_ids)}'
+            self.segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        views = []
+        for array, offset in zip(arrays, offsets):
+            view = np.ndarray(array.shape, array.dtype, buffer=self.segment.buf, offset=offset)
+            view[...] = array
+            view.flags.writeable = False
+            views.append(view)
+        self.payload = _build(template, views)
+
+    def view(self):
+        return _view(self.payload)
+
+    def free(self):
+        """Release the segment; False while views of it are still alive somewhere"""
+        if self.segment is None:
+            return True
+        self.payload = None
+        if not self.unlinked:
+            # Removing the name is safe while mapped; the memory goes with the last mapping
+            self.segment.unlink()
+            self.unlinked = True
+        try:
+            self.segment.close()
+        except BufferError:
+            return False
+        self.segment = None
+        return True
+
+class Lease:
+    """A session's hold on a snapshot, released when the lease is dropped"""
+
+    def __init__(self, plane, snapshot):
+        # The snapshot was acquired for this lease by DataPlane.snapshot()
+        self.snapshot = snapshot
+        self._finalizer = weakref.finalize(self, plane._release, snapshot)
+
+    def release(self):
+        self._finalizer()
+
+class DataPlane:
+    def __init__(self):
+        # Reentrant: a lease finalizer can run during garbage collection while the lock is held
+        self.lock = threading.RLock()
+        self.current = {}
+        # Superseded snapshots that still have leases or live views
+        self.retired = []
+        self.stats = {'loads': 0, 'hits': 0}
+
+    def snapshot(self, key, version, load, acquire=False):
+        """The shared snapshot of key at version, calling load() once to build it"""
+        with self.lock:
+            snapshot = self.current.get(key)
+            if snapshot is not None and snapshot.version == version:
+                self.stats['hits'] += 1
+                snapshot.refs += acquire
+                return snapshot
+
+        # Built outside the lock so a slow load does not block other artifacts
+        built = Snapshot(key, version, load())
+        with self.lock:
+            snapshot = self.current.get(key)
+            if snapshot is not None and snapshot.version == version:
+                # Another session built the same version first
+                built.free()
+                self.stats['hits'] += 1
+                snapshot.refs += acquire
+                return snapshot
+            self.stats['loads'] += 1
+            self._sweep()
+            if snapshot is None or snapshot.version < version:
+                if snapshot is not None:
+                    self.retired.append(snapshot)
+                self.current[key] = built
+            else:
+                # An older version than the current one; freed once its views are gone
+                self.retired.append(built)
+            built.refs += acquire
+            return built
+
+    def view(self, key, version, load):
+        return self.snapshot(key, version, load).view()
+
+    def lease(self, key, version, load):
+        """(lease, view); keep the lease for as long as the view is in use"""
+        snapshot = self.snapshot(key, version, load, acquire=True)
+        return Lease(self, snapshot), snapshot.view()
+
+    def _release(self, snapshot):
+        with self.lock:
+            snapshot.refs -= 1
+            self._sweep()
+
+    def _sweep(self):
+        self.retired = [
+            snapshot for snapshot in self.retired if snapshot.refs > 0 or not snapshot.free()
+        ]
+
+    def usage(self):
+        """Shared bytes and lease counts per snapshot, current and retired"""
+        with self.lock:
+            rows = [
+                {'key': s.key, 'version': s.version, 'bytes': s.nbytes, 'leases': s.refs, 'retired': False}
+                for s in self.current.values()
+            ]
+            rows += [
+                {'key': s.key, 'version': s.version, 'bytes': s.nbytes, 'leases': s.refs, 'retired': True}
+                for s in self.retired
+            ]
+        return rows
+
+    def close(self):
+        with self.lock:
+            for snapshot in list(self.current.values()) + self.retired:
+                snapshot.free()
+            self.current = {}
+            self.retired = []
+
+def get_data_plane():
+    global _plane
+    with _plane_lock:
+        if _plane is None:
+            _plane = DataPlane()
+            atexit.register(_plane.close)
+        return _plane
+
+def session_view(key, version, load):
+    """
+    Zero-copy view of a snapshot for the current Streamlit session. The session
+    keeps a lease on the version it last viewed for each key.
+    """
+    plane = get_data_plane()
+    if not st.runtime.exists():
+        return plane.view(key, version, load)
+    lease, view = plane.lease(key, version, load)
+    # Replacing the previous lease releases it
+    st.session_state.setdefault(SESSION_LEASES_KEY, {})[key] = lease
+    return view
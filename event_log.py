@@ -0,0 +1,414 @@
+"""Write-ahead event log for sensor readings, supply chain events and alerts.
+
+With GUARDIAN_IO_EVENT_LOG=1, add_sensor_reading, add_supply_chain_event and
+create_maintenance_alert(s) append to a local log instead of writing to
+SQLite themselves, so a busy database no longer makes them drop data:
+
+- Producers encode a record and queue it in memory, which takes a few
+  microseconds.
+- A flusher thread writes queued records to the current segment file and
+  fsyncs once per batch (group commit). A record is durable within
+  FLUSH_INTERVAL. With GUARDIAN_IO_EVENT_LOG_WAIT=1, producers wait for the
+  fsync of their record instead.
+- An applier thread inserts durable records into the tenant databases (and
+  reading shards) in large transactions, retrying while a database is locked.
+  Each transaction also advances that database's event_log_applied
+  checkpoint, so no record is applied twice.
+
+Every process writes its own log directory under EVENT_LOG_DIR and holds a
+lock on it. On start-up, logs left by processes that died are replayed from
+their segment files, skipping what their checkpoints show as applied, and then
+removed. A torn record at the end of a segment, from a crash mid-write, ends
+replay of that segment.
+
+Segment format: records of a 16-byte header (payload length, CRC-32, sequence
+number) followed by a JSON payload [kind, tenant, unix time, values].
+"""
+import atexit
+import fcntl
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import threading
+import time
+import traceback
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+from query_cache import bump_tables
+from shards import ensure_shard, shard_key, sharding_enabled
+from tenancy import current_tenant, tenant_db_path, tenant_shard_dir
+
+EVENT_LOG_ENABLED = os.environ.get('GUARDIAN_IO_EVENT_LOG') == '1'
+EVENT_LOG_WAIT = os.environ.get('GUARDIAN_IO_EVENT_LOG_WAIT') == '1'
+EVENT_LOG_DIR = os.environ.get('GUARDIAN_IO_EVENT_LOG_DIR', 'event_log')
+SEGMENT_BYTES = 16 * 1024 * 1024
+FLUSH_INTERVAL = 0.01
+FLUSH_BYTES = 1024 * 1024
+APPLY_BATCH = 20000
+RETRY_SECONDS = 0.5
+CLOSE_TIMEOUT = 10.0
+
+HEADER = struct.Struct('<IIQ')
+SEGMENT_SUFFIX = '.log'
+
+# Record kind -> (table, value columns, time column)
+KINDS = {
+    'sensor_reading': (
+        'sensor_readings', ['sensor_id', 'temperature', 'vibration', 'pressure', 'power_consumption'], 'timestamp'
+    ),
+    'supply_chain_event': (
+        'supply_chain_events', ['supplier_id', 'event_type', 'severity', 'description'], 'timestamp'
+    ),
+    'maintenance_alert': (
+        'maintenance_alerts', ['equipment_id', 'alert_type', 'severity', 'description'], 'created_at'
+    )
+}
+
+_log = None
+_log_lock = threading.Lock()
+
+def event_log_enabled():
+    return EVENT_LOG_ENABLED
+
+def _sql_time(unix_time):
+    """Unix time in SQLite's CURRENT_TIMESTAMP format"""
+    return datetime.fromtimestamp(unix_time, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def encode_record(sequence, kind, tenant, unix_time, values):
+    payload = json.dumps([kind, tenant, unix_time, values], separators=(',', ':')).encode()
+    return HEADER.pack(len(payload), zlib.crc32(payload), sequence) + payload
+
+def read_segment(path):
+    """(records, valid bytes) of a segment; records are (sequence, kind, tenant, unix time, values)"""
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    records, offset = [], 0
+    while offset + HEADER.size <= len(data):
+        length, crc, sequence = HEADER.unpack_from(data, offset)
+        payload = data[offset + HEADER.size:offset + HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        # A write retried after a failed fsync can repeat records
+        if not records or sequence > records[-1][0]:
+            kind, tenant, unix_time, values = json.loads(payload)
+            records.append((sequence, kind, tenant, unix_time, values))
+        offset += HEADER.size + length
+    return records, offset
+
+def list_segments(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX)
+    )
+
+def _target_path(kind, tenant, unix_time):
+    """Database file a record is applied to"""
+    if kind == 'sensor_reading' and sharding_enabled():
+        from models import init_sensor_readings_shard
+        moment = datetime.fromtimestamp(unix_time, timezone.utc).replace(tzinfo=None)
+        return ensure_shard(shard_key(moment), init_sensor_readings_shard, tenant_shard_dir(tenant))
+    return tenant_db_path(tenant)
+
+def apply_records(log_name, records, connections):
+    """
+    Apply records to their databases, one transaction per database. Returns the
+    sequences that could not be applied because a database was busy or failed.
+    """
+    by_path = {}
+    for record in records:
+        sequence, kind, tenant, unix_time, values = record
+        by_path.setdefault(_target_path(kind, tenant, unix_time), []).append(record)
+
+    failed = []
+    for path, path_records in by_path.items():
+        conn = connections.get(path)
+        if conn is None:
+            conn = connections[path] = sqlite3.connect(path, check_same_thread=False)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS event_log_applied (
+                    log TEXT PRIMARY KEY,
+                    sequence INTEGER NOT NULL
+                )
+            ''')
+            conn.commit()
+        c = conn.cursor()
+        try:
+            c.execute('BEGIN IMMEDIATE')
+            c.execute('SELECT sequence FROM event_log_applied WHERE log = ?', (log_name,))
+            row = c.fetchone()
+            applied = row[0] if row else 0
+
+            rows = {}
+            for sequence, kind, tenant, unix_time, values in path_records:
+                if sequence > applied:
+                    rows.setdefault(kind, []).append(tuple(values) + (_sql_time(unix_time),))
+            for kind, kind_rows in rows.items():
+                table, columns, time_column = KINDS[kind]
+                c.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}, {time_column}) "
+                    f"VALUES ({', '.join('?' * (len(columns) + 1))})",
+                    kind_rows
+                )
+            c.execute('''
+                INSERT INTO event_log_applied (log, sequence) VALUES (?, ?)
+                ON CONFLICT (log) DO UPDATE SET sequence = MAX(sequence, excluded.sequence)
+            ''', (log_name, max(record[0] for record in path_records)))
+            conn.commit()
+            for tenant in {record[2] for record in path_records}:
+                bump_tables({KINDS[record[1]][0] for record in path_records if record[2] == tenant}, tenant)
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            failed.extend(record[0] for record in path_records)
+    return failed
+
+def recover_logs(root=EVENT_LOG_DIR):
+    """Replay and remove the logs of processes that are no longer running; returns records read"""
+    replayed = 0
+    if not os.path.isdir(root):
+        return replayed
+    for name in sorted(os.listdir(root)):
+        directory = os.path.join(root, name)
+        if name.startswith('.') or not os.path.isdir(directory):
+            continue
+        try:
+            lock_file = open(os.path.join(directory, 'lock'), 'a')
+        except FileNotFoundError:
+            # Removed by another process's recovery
+            continue
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # Its process is still running, or another recovery has it
+                continue
+            if not os.path.isdir(directory):
+                continue
+            connections = {}
+            complete = True
+            for path in list_segments(directory):
+                records, _ = read_segment(path)
+                for begin in range(0, len(records), APPLY_BATCH):
+                    batch = records[begin:begin + APPLY_BATCH]
+                    if apply_records(name, batch, connections):
+                        complete = False
+                        break
+                    replayed += len(batch)
+                if not complete:
+                    break
+            for conn in connections.values():
+                conn.close()
+            if complete:
+                shutil.rmtree(directory, ignore_errors=True)
+    return replayed
+
+class EventLog:
+    """Segmented append-only log of this process with its flusher and applier threads"""
+
+    def __init__(self, directory=EVENT_LOG_DIR, name=None):
+        self.root = directory
+        self.name = name or f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.directory = os.path.join(directory, self.name)
+        # Lock the directory before it becomes visible, so no other process takes it for an orphan
+        staging = os.path.join(directory, f'.{self.name}')
+        os.makedirs(staging)
+        self._lock_file = open(os.path.join(staging, 'lock'), 'w')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.rename(staging, self.directory)
+
+        self.lock = threading.Lock()
+        self.flushed = threading.Condition(self.lock)
+        self.sequence = 0
+        self.durable_sequence = 0
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._records = []
+        self._wake_flusher = threading.Event()
+
+        # (first sequence, path) of this log's segments
+        self._segments = []
+        self._segment = None
+        self._segment_bytes = 0
+
+        self._apply_lock = threading.Lock()
+        self._apply_ready = threading.Condition(self._apply_lock)
+        self._applied = threading.Condition(self._apply_lock)
+        # Every record up to this sequence is in its database
+        self.applied_sequence = 0
+        self._to_apply = []
+        self._connections = {}
+        self._closing = False
+        self.stats = {'appended': 0, 'fsyncs': 0, 'applied': 0, 'apply_retries': 0, 'replayed': 0}
+
+        self._flusher = threading.Thread(target=self._flush_loop, name='event-log-flusher', daemon=True)
+        self._applier = threading.Thread(target=self._apply_loop, name='event-log-applier', daemon=True)
+        self._flusher.start()
+        self._applier.start()
+
+    def append(self, kind, values, tenant=None, wait=False):
+        """Queue a record for the log; returns its sequence number"""
+        unix_time = time.time()
+        with self.lock:
+            self.sequence += 1
+            sequence = self.sequence
+            data = encode_record(sequence, kind, tenant, unix_time, values)
+            self._buffer.append(data)
+            self._buffer_bytes += len(data)
+            self._records.append((sequence, kind, tenant, unix_time, values))
+            self.stats['appended'] += 1
+            if self._buffer_bytes >= FLUSH_BYTES:
+                self._wake_flusher.set()
+            if wait:
+                self._wake_flusher.set()
+                while self.durable_sequence < sequence:
+                    self.flushed.wait()
+        return sequence
+
+    def _open_segment(self, first_sequence):
+        if self._segment is not None:
+            self._segment.close()
+        path = os.path.join(self.directory, f'{first_sequence:020d}{SEGMENT_SUFFIX}')
+        self._segment = open(path, 'ab')
+        self._segment_bytes = 0
+        self._segments.append((first_sequence, path))
+        # Make the new file's directory entry durable too
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def _flush_loop(self):
+        while True:
+            self._wake_flusher.wait(FLUSH_INTERVAL)
+            self._wake_flusher.clear()
+            with self.lock:
+                buffer, self._buffer, self._buffer_bytes = self._buffer, [], 0
+                records, self._records = self._records, []
+                closing = self._closing
+            if buffer:
+                try:
+                    self._write(buffer, records)
+                except OSError:
+                    print(f"Event log write failed, retrying:\n{traceback.format_exc()}")
+                    with self.lock:
+                        self._buffer[:0] = buffer
+                        self._buffer_bytes += sum(len(data) for data in buffer)
+                        self._records[:0] = records
+                    time.sleep(RETRY_SECONDS)
+                    continue
+            if closing and not buffer:
+                return
+
+    def _write(self, buffer, records):
+        if self._segment is None or self._segment_bytes >= SEGMENT_BYTES:
+            self._open_segment(records[0][0])
+        data = b''.join(buffer)
+        self._segment.write(data)
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        self._segment_bytes += len(data)
+        with self.lock:
+            self.durable_sequence = records[-1][0]
+            self.stats['fsyncs'] += 1
+            self.flushed.notify_all()
+        with self._apply_lock:
+            self._to_apply.extend(records)
+            self._apply_ready.notify()
+
+    def _apply_loop(self):
+        try:
+            self.stats['replayed'] = recover_logs(self.root)
+        except Exception:
+            print(f"Event log replay failed:\n{traceback.format_exc()}")
+        while True:
+            with self._apply_lock:
+                while not self._to_apply and not self._closing:
+                    self._apply_ready.wait()
+                if not self._to_apply and self._closing and not self._flusher.is_alive():
+                    return
+                batch, self._to_apply = self._to_apply[:APPLY_BATCH], self._to_apply[APPLY_BATCH:]
+            if not batch:
+                time.sleep(FLUSH_INTERVAL)
+                continue
+
+            failed = set(apply_records(self.name, batch, self._connections))
+            with self._apply_lock:
+                self.stats['applied'] += len(batch) - len(failed)
+                if failed:
+                    # Kept in order at the front and retried after a pause
+                    self.stats['apply_retries'] += 1
+                    self._to_apply[:0] = [record for record in batch if record[0] in failed]
+                self.applied_sequence = self._to_apply[0][0] - 1 if self._to_apply else batch[-1][0]
+                self._applied.notify_all()
+            if failed:
+                if self._closing:
+                    return
+                time.sleep(RETRY_SECONDS)
+            self._remove_applied_segments()
+
+    def _remove_applied_segments(self):
+        # A segment can go once the next one starts right after the applied point or earlier
+        while len(self._segments) > 1 and self._segments[1][0] <= self.applied_sequence + 1:
+            os.remove(self._segments.pop(0)[1])
+
+    def flush(self, timeout=None):
+        """Block until everything appended so far is durable and applied; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            target = self.sequence
+            self._wake_flusher.set()
+            while self.durable_sequence < target:
+                if not self.flushed.wait(None if deadline is None else max(deadline - time.monotonic(), 0)):
+                    return False
+        with self._apply_lock:
+            while self.applied_sequence < target:
+                if not self._applied.wait(None if deadline is None else max(deadline - time.monotonic(), 0)):
+                    return False
+        return True
+
+    def status(self):
+        with self.lock:
+            status = dict(self.stats, sequence=self.sequence, durable=self.durable_sequence)
+        with self._apply_lock:
+            status['pending'] = len(self._to_apply)
+            status['applied_through'] = self.applied_sequence
+        status['segments'] = len(self._segments)
+        return status
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """
+        Flush and apply what is left, waiting up to timeout for busy databases.
+        Records still unapplied stay on disk and are replayed by the next process.
+        """
+        applied = self.flush(timeout)
+        with self.lock:
+            self._closing = True
+            self._wake_flusher.set()
+        with self._apply_lock:
+            self._apply_ready.notify()
+        self._flusher.join()
+        self._applier.join(timeout)
+        if self._segment is not None:
+            self._segment.close()
+        for conn in self._connections.values():
+            conn.close()
+        if applied and self.applied_sequence >= self.sequence:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self._lock_file.close()
+
+def get_event_log():
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = EventLog()
+            atexit.register(_log.close)
+        return _log
+
+def append_event(kind, values, wait=EVENT_LOG_WAIT):
+    """Log a record for the current tenant; True once it is queued (or durable, with wait)"""
+    get_event_log().append(kind, list(values), current_tenant(), wait=wait)
+    return True
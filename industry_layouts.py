@@ -1,14 +1,28 @@
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
+from utils import load_stored_result
+from sections import Panel, Source, render_panels, stored_sources
+from tasks import kpi_history
 from data_generator import (
     generate_manufacturing_data, generate_healthcare_data,
     get_manufacturing_predictions, get_healthcare_predictions
 )
+from kpi_analytics import (
+    build_kpi_analytics, get_kpi_analytics, MANUFACTURING_METRICS, MANUFACTURING_CORRELATION_METRICS
+)
 import pandas as pd
+from kpi_store import get_kpi_date_range, default_kpi_window
+import numpy as np
+from manufacturing_whatif import (
+    WHATIF_LEVERS, WHATIF_METRICS, LOWER_IS_BETTER, whatif_baseline, evaluate_whatif, sensitivity_surface
+)
 
-def render_drill_down_view(data, date, metric):
+def render_drill_down_view(data, date, metric, analytics=None):
     """Render detailed drill-down analysis for selected data point"""
+    if analytics is None:
+        analytics = get_kpi_analytics('manufacturing', data, MANUFACTURING_METRICS,
+                                      MANUFACTURING_CORRELATION_METRICS)
     st.subheader(f"Detailed Analysis for {date.strftime('%Y-%m-%d')}")
 
     # Filter data for selected date
@@ -31,8 +45,8 @@ def render_drill_down_view(data, date, metric):
     # Add trend analysis
     st.subheader("Trend Analysis")
 
-    # Calculate 7-day moving averages
-    rolling_data = data.set_index('date').rolling(window=7).mean()
+    # Moving averages are precomputed per dataset version
+    rolling_data = analytics.rolling_series(metric, 7)
 
     fig = go.Figure()
 
@@ -47,7 +61,7 @@ def render_drill_down_view(data, date, metric):
     # Add moving average
     fig.add_trace(go.Scatter(
         x=rolling_data.index,
-        y=rolling_data[metric],
+        y=rolling_data,
         name='7-Day Moving Average',
         line=dict(color='red', dash='dash')
     ))
@@ -61,10 +75,24 @@ def render_drill_down_view(data, date, metric):
 
     st.plotly_chart(fig, use_container_width=True)
 
+    summary = analytics.lookup(date, metric)
+    st.dataframe(
+        pd.DataFrame([
+            {
+                'Window': f"{window} days",
+                'Mean': stats['mean'],
+                'Std Dev': stats['std'],
+                'Z-Score': stats['z_score']
+            }
+            for window, stats in summary['windows'].items()
+        ]).round(2),
+        hide_index=True, use_container_width=True
+    )
+
     # Add correlation analysis
     st.subheader("Correlation Analysis")
-    correlation_metrics = ['production_output', 'machine_efficiency', 'quality_rate', 'energy_consumption']
-    corr_matrix = data[correlation_metrics].corr()
+    correlation_metrics = analytics.correlation_metrics
+    corr_matrix = analytics.correlation_matrix()
 
     fig_corr = px.imshow(
         corr_matrix,
@@ -75,6 +103,122 @@ def render_drill_down_view(data, date, metric):
     fig_corr.update_layout(height=400)
     st.plotly_chart(fig_corr, use_container_width=True)
 
+def select_kpi_window(tenant, key):
+    """Date range picker over stored KPI history; returns task params ({} for the default window)"""
+    stored = get_kpi_date_range(tenant)
+    if stored is None:
+        return {}
+    first, last = stored
+    default_start, default_end = default_kpi_window(tenant)
+    selected = st.date_input(
+        "Date range",
+        value=(default_start.date(), default_end.date()),
+        min_value=first.date(),
+        max_value=last.date(),
+        key=key
+    )
+    if len(selected) != 2 or tuple(selected) == (default_start.date(), default_end.date()):
+        # Default window (or a half-picked range) is served from the precomputed artifact
+        return {}
+    return {'start': selected[0].isoformat(), 'end': selected[1].isoformat()}
+
+def render_whatif_analysis(baseline):
+    """Heatmap of a KPI's change over a grid of two levers, with the third held fixed"""
+    st.subheader("What-If Sensitivity")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        metric = st.selectbox("KPI", list(WHATIF_METRICS), format_func=WHATIF_METRICS.get,
+                              index=list(WHATIF_METRICS).index('energy_cost_per_good_unit'), key='whatif_metric')
+    with col2:
+        x_lever = st.selectbox("X axis", list(WHATIF_LEVERS), format_func=WHATIF_LEVERS.get, key='whatif_x')
+    with col3:
+        y_options = [lever for lever in WHATIF_LEVERS if lever != x_lever]
+        y_lever = st.selectbox("Y axis", y_options, format_func=WHATIF_LEVERS.get,
+                               index=len(y_options) - 1, key='whatif_y')
+    fixed_lever = next(lever for lever in WHATIF_LEVERS if lever not in (x_lever, y_lever))
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        fixed_value = st.slider(WHATIF_LEVERS[fixed_lever], min_value=-50, max_value=50, value=0,
+                                key=f'whatif_fixed_{fixed_lever}')
+    with col2:
+        span = st.slider("Change range (±%)", min_value=5, max_value=50, value=20, step=5, key='whatif_span')
+    with col3:
+        steps = st.select_slider("Grid steps per axis", options=[21, 51, 101], value=101, key='whatif_steps')
+
+    values = np.linspace(-span, span, steps)
+    surface = sensitivity_surface(baseline, metric, x_lever, values, y_lever, values, {fixed_lever: fixed_value})
+    base = evaluate_whatif(baseline)[metric].item()
+
+    fig = go.Figure(go.Heatmap(
+        z=surface, x=values, y=values, zmid=0,
+        colorscale='RdYlGn_r' if metric in LOWER_IS_BETTER else 'RdYlGn',
+        colorbar=dict(title='Change (%)'),
+        hovertemplate=(f'{WHATIF_LEVERS[x_lever]}: %{{x:.1f}}<br>{WHATIF_LEVERS[y_lever]}: %{{y:.1f}}'
+                       '<br>Change: %{z:+.2f}%<extra></extra>')
+    ))
+    fig.update_layout(
+        title=f'{WHATIF_METRICS[metric]} vs. Baseline ({steps * steps:,} Scenarios)',
+        xaxis_title=WHATIF_LEVERS[x_lever],
+        yaxis_title=WHATIF_LEVERS[y_lever],
+        height=450
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    best = np.nanargmin(surface) if metric in LOWER_IS_BETTER else np.nanargmax(surface)
+    row, column = np.unravel_index(best, surface.shape)
+    st.caption(
+        f"Baseline (30-day forecast mean): {base:,.2f}. Best in grid: {surface[row, column]:+.2f}% at "
+        f"{WHATIF_LEVERS[x_lever]} {values[column]:+.1f}, {WHATIF_LEVERS[y_lever]} {values[row]:+.1f}."
+    )
+
+def manufacturing_sources(params, stored=None):
+    """The manufacturing_forecast steps as panel sources; forecasts, analytics and what-if share the history"""
+    return stored_sources(stored, [
+        Source('data', lambda: kpi_history(
+            'Manufacturing', params.get('start'), params.get('end'), generate_manufacturing_data
+        )),
+        Source('predictions', lambda data: get_manufacturing_predictions(data), ['data']),
+        Source('analytics', lambda data: build_kpi_analytics(
+            data, MANUFACTURING_METRICS, MANUFACTURING_CORRELATION_METRICS
+        ), ['data']),
+        Source('whatif_baseline', lambda data: whatif_baseline(data), ['data'])
+    ])
+
+def healthcare_sources(params, stored=None):
+    """The healthcare_forecast steps as panel sources"""
+    return stored_sources(stored, [
+        Source('data', lambda: kpi_history(
+            'Healthcare', params.get('start'), params.get('end'), generate_healthcare_data
+        )),
+        Source('predictions', lambda data: get_healthcare_predictions(data), ['data'])
+    ])
+
+def open_drill_down(event, chart_key, metric, dates):
+    """
+    Open the drill-down for a historical point newly selected on a chart.
+    Forecast points, dates outside the loaded window and a selection already
+    handled are ignored.
+    """
+    points = event.selection.points if event else []
+    # The historical series is each chart's first trace
+    points = [point for point in points if point.get('curve_number', 0) == 0]
+    selected = points[0]['x'] if points else None
+    handled = st.session_state.setdefault('drill_down_handled', {})
+    if handled.get(chart_key) == selected:
+        return
+    handled[chart_key] = selected
+    if selected is not None and (dates == pd.Timestamp(selected)).any():
+        st.session_state.selected_date = pd.Timestamp(selected)
+        st.session_state.selected_metric = metric
+        st.session_state.drill_down_active = True
+        st.rerun()
+
+def close_drill_down():
+    st.session_state.drill_down_active = False
+    st.session_state.selected_date = None
+    st.session_state.selected_metric = None
+
 def render_manufacturing_dashboard():
     st.header("Manufacturing Industry Dashboard")
 
@@ -87,24 +231,37 @@ def render_manufacturing_dashboard():
         st.session_state.selected_metric = None
 
     # Get historical data and predictions
-    df = generate_manufacturing_data()
-    predictions = get_manufacturing_predictions()
-
+    params = select_kpi_window('Manufacturing', 'manufacturing_kpi_window')
+    stored = load_stored_result('manufacturing_forecast', params)
+
+    # Forecasts, analytics and the what-if baseline are computed concurrently once the history is loaded
+    render_panels(manufacturing_sources(params, stored), [
+        Panel("manufacturing KPIs", render_manufacturing_kpis, ['data']),
+        Panel("what-if analysis", lambda whatif_baseline: render_whatif_analysis(whatif_baseline),
+              ['whatif_baseline']),
+        Panel("production trend", render_production_trend, ['data', 'predictions', 'analytics']),
+        Panel("efficiency and quality", render_efficiency_quality, ['data', 'predictions'])
+    ])
+
+def render_manufacturing_kpis(data):
     # KPI metrics row
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Average Production Output", 
-                 f"{df['production_output'].mean():.0f} units",
+                 f"{data['production_output'].mean():.0f} units",
                  "2.5%")
     with col2:
         st.metric("Quality Rate", 
-                 f"{df['quality_rate'].mean():.1f}%",
+                 f"{data['quality_rate'].mean():.1f}%",
                  "0.7%")
     with col3:
         st.metric("Machine Efficiency", 
-                 f"{df['machine_efficiency'].mean():.1f}%",
+                 f"{data['machine_efficiency'].mean():.1f}%",
                  "-0.2%")
 
+def render_production_trend(data, predictions, analytics):
+    df = data
+
     # Production Output with Predictions
     fig_production = go.Figure()
 
@@ -134,24 +291,26 @@ def render_manufacturing_dashboard():
     )
 
     # Handle click events
-    clicked = st.plotly_chart(fig_production, use_container_width=True, key='production_chart')
-    if clicked is not None and len(clicked['points']) > 0:
-        point = clicked['points'][0]
-        st.session_state.selected_date = point['x']
-        st.session_state.selected_metric = 'production_output'
-        st.session_state.drill_down_active = True
-        st.experimental_rerun()
+    clicked = st.plotly_chart(fig_production, use_container_width=True, key='production_chart',
+                              on_select='rerun', selection_mode='points')
+    open_drill_down(clicked, 'production_chart', 'production_output', df['date'])
+
+    # A date picked before the KPI window changed may no longer be loaded
+    selected_date = st.session_state.selected_date
+    loaded = selected_date is not None and (df['date'] == selected_date).any()
+    if st.session_state.drill_down_active and not loaded:
+        close_drill_down()
 
     # Render drill-down view if active
-    if st.session_state.drill_down_active and st.session_state.selected_date:
+    if st.session_state.drill_down_active:
         with st.expander("Detailed Analysis", expanded=True):
-            render_drill_down_view(df, st.session_state.selected_date, st.session_state.selected_metric)
+            render_drill_down_view(df, st.session_state.selected_date, st.session_state.selected_metric,
+                                   analytics)
 
-            if st.button("Close Analysis"):
-                st.session_state.drill_down_active = False
-                st.session_state.selected_date = None
-                st.session_state.selected_metric = None
-                st.experimental_rerun()
+            st.button("Close Analysis", on_click=close_drill_down)
+
+def render_efficiency_quality(data, predictions):
+    df = data
 
     # Efficiency and Quality Rate charts with click functionality
     col1, col2 = st.columns(2)
@@ -181,13 +340,9 @@ def render_manufacturing_dashboard():
             clickmode='event+select'
         )
 
-        clicked = st.plotly_chart(fig_efficiency, use_container_width=True, key='efficiency_chart')
-        if clicked is not None and len(clicked['points']) > 0:
-            point = clicked['points'][0]
-            st.session_state.selected_date = point['x']
-            st.session_state.selected_metric = 'machine_efficiency'
-            st.session_state.drill_down_active = True
-            st.experimental_rerun()
+        clicked = st.plotly_chart(fig_efficiency, use_container_width=True, key='efficiency_chart',
+                                  on_select='rerun', selection_mode='points')
+        open_drill_down(clicked, 'efficiency_chart', 'machine_efficiency', df['date'])
 
     with col2:
         fig_quality = go.Figure()
@@ -214,36 +369,42 @@ def render_manufacturing_dashboard():
             clickmode='event+select'
         )
 
-        clicked = st.plotly_chart(fig_quality, use_container_width=True, key='quality_chart')
-        if clicked is not None and len(clicked['points']) > 0:
-            point = clicked['points'][0]
-            st.session_state.selected_date = point['x']
-            st.session_state.selected_metric = 'quality_rate'
-            st.session_state.drill_down_active = True
-            st.experimental_rerun()
+        clicked = st.plotly_chart(fig_quality, use_container_width=True, key='quality_chart',
+                                  on_select='rerun', selection_mode='points')
+        open_drill_down(clicked, 'quality_chart', 'quality_rate', df['date'])
 
 def render_healthcare_dashboard():
     st.header("Healthcare Industry Dashboard")
 
     # Get historical data and predictions
-    df = generate_healthcare_data()
-    predictions = get_healthcare_predictions()
+    params = select_kpi_window('Healthcare', 'healthcare_kpi_window')
+    stored = load_stored_result('healthcare_forecast', params)
+
+    render_panels(healthcare_sources(params, stored), [
+        Panel("healthcare KPIs", render_healthcare_kpis, ['data']),
+        Panel("patient satisfaction", render_satisfaction_trend, ['data', 'predictions']),
+        Panel("occupancy and wait time", render_occupancy_wait, ['data', 'predictions'])
+    ])
 
+def render_healthcare_kpis(data):
     # KPI metrics row
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Patient Satisfaction", 
-                 f"{df['patient_satisfaction'].mean():.1f}%",
+                 f"{data['patient_satisfaction'].mean():.1f}%",
                  "1.2%")
     with col2:
         st.metric("Bed Occupancy", 
-                 f"{df['bed_occupancy'].mean():.1f}%",
+                 f"{data['bed_occupancy'].mean():.1f}%",
                  "-0.5%")
     with col3:
         st.metric("Avg Wait Time", 
-                 f"{df['average_wait_time'].mean():.0f} min",
+                 f"{data['average_wait_time'].mean():.0f} min",
                  "-2.3%")
 
+def render_satisfaction_trend(data, predictions):
+    df = data
+
     # Patient Satisfaction with Predictions
     fig_satisfaction = go.Figure()
     fig_satisfaction.add_trace(go.Scatter(
@@ -260,6 +421,9 @@ def render_healthcare_dashboard():
     fig_satisfaction.update_layout(title='Patient Satisfaction Trend with 30-Day Forecast')
     st.plotly_chart(fig_satisfaction, use_container_width=True)
 
+def render_occupancy_wait(data, predictions):
+    df = data
+
     # Bed Occupancy and Wait Time Predictions
     col1, col2 = st.columns(2)
     with col1:
@@ -290,4 +454,4 @@ def render_healthcare_dashboard():
             line=dict(dash='dash')
         ))
         fig_wait.update_layout(title='Wait Time Forecast')
-        st.plotly_chart(fig_wait, use_container_width=True)
\ No newline at end of file
+        st.plotly_chart(fig_wait, use_container_width=True)
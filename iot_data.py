@@ -3,6 +3,8 @@ import pandas as pd
 from datetime import datetime, timedelta
 import random
 
+from schemas import apply_schema
+
 def generate_sensor_data(num_sensors=5, hours=24):
     """Generate mock IoT sensor data"""
     equipment_types = ['Pump', 'Motor', 'Compressor', 'Conveyor', 'Robot']
@@ -59,7 +61,35 @@ def generate_sensor_data(num_sensors=5, hours=24):
 
             all_readings.append(reading)
 
-    return pd.DataFrame(all_readings), pd.DataFrame(sensors)
+    return apply_schema(pd.DataFrame(all_readings), 'sensor_readings'), apply_schema(pd.DataFrame(sensors), 'sensors')
+
+SENSOR_CHANNELS = ['temperature', 'vibration', 'pressure', 'power_consumption']
+# Weights of each channel's stability in the overall health score
+HEALTH_WEIGHTS = {'temperature': 0.3, 'vibration': 0.3, 'pressure': 0.2, 'power_consumption': 0.2}
+
+def stack_sensor_readings(readings_df, key='equipment_id', channels=SENSOR_CHANNELS):
+    """
+    Stack readings into a (entity, time, channel) float array, oldest first.
+    Entities with fewer readings are left-padded with NaN.
+    Returns (entity_ids, timestamps, values) where timestamps is (entity, time).
+    """
+    ordered = readings_df.sort_values([key, 'timestamp'], kind='stable')
+    codes, ids = pd.factorize(ordered[key])
+    ids = np.asarray(ids)
+    counts = np.bincount(codes, minlength=len(ids))
+    n_entities, n_times = len(ids), counts.max() if len(counts) else 0
+
+    values = np.full((n_entities, n_times, len(channels)), np.nan, dtype=np.float64)
+    timestamps = np.full((n_entities, n_times), np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    # Position of each row inside its entity, right-aligned so the latest readings line up
+    ends = np.cumsum(counts)
+    row_entity = np.repeat(np.arange(n_entities), counts)
+    row_position = np.arange(len(ordered)) - np.repeat(ends - counts, counts) + np.repeat(n_times - counts, counts)
+
+    values[row_entity, row_position] = ordered[channels].to_numpy(dtype=np.float64)
+    timestamps[row_entity, row_position] = ordered['timestamp'].to_numpy(dtype='datetime64[ns]')
+    return ids, timestamps, values
 
 def predict_maintenance_needs(readings_df, threshold_multiplier=1.5):
     """Predict maintenance needs based on sensor readings"""
@@ -94,27 +124,21 @@ def predict_maintenance_needs(readings_df, threshold_multiplier=1.5):
 
     return predictions
 
+def health_from_moments(means, stds):
+    """
+    Health scores from per-channel means and standard deviations, each an
+    (entity, channel) array in SENSOR_CHANNELS order: 100 minus the weighted
+    coefficient of variation in percent, clamped to [0, 100].
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        channel_scores = 100 - stds / means * 100
+    score = channel_scores @ np.array([HEALTH_WEIGHTS[channel] for channel in SENSOR_CHANNELS])
+    return np.clip(score, 0, 100)
+
 def calculate_health_scores(readings_df):
     """Calculate equipment health scores based on sensor readings"""
-    health_scores = {}
-
-    for equipment_id in readings_df['equipment_id'].unique():
-        equipment_data = readings_df[readings_df['equipment_id'] == equipment_id]
-
-        # Calculate normalized metrics
-        temp_score = 100 - (equipment_data['temperature'].std() / equipment_data['temperature'].mean() * 100)
-        vibr_score = 100 - (equipment_data['vibration'].std() / equipment_data['vibration'].mean() * 100)
-        pressure_score = 100 - (equipment_data['pressure'].std() / equipment_data['pressure'].mean() * 100)
-        power_score = 100 - (equipment_data['power_consumption'].std() / equipment_data['power_consumption'].mean() * 100)
-
-        # Calculate overall health score (weighted average)
-        health_score = (
-            0.3 * temp_score +
-            0.3 * vibr_score +
-            0.2 * pressure_score +
-            0.2 * power_score
-        )
-
-        health_scores[equipment_id] = min(max(health_score, 0), 100)  # Clamp between 0 and 100
-
-    return health_scores
\ No newline at end of file
+    grouped = readings_df.groupby('equipment_id', sort=False, observed=True)[SENSOR_CHANNELS]
+    stats = grouped.agg(['mean', 'std'])
+    means = stats.xs('mean', axis=1, level=1).to_numpy(dtype=np.float64)
+    stds = stats.xs('std', axis=1, level=1).to_numpy(dtype=np.float64)
+    return dict(zip(stats.index, health_from_moments(means, stds)))
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from iot_data import SENSOR_CHANNELS, stack_sensor_readings
+
+# CUSUM slack and decision threshold, in standard deviations of the reference window
+CUSUM_SLACK = 0.5
+CUSUM_THRESHOLD = 10.0
+DEFAULT_WARMUP = 120
+MIN_STD = 1e-6
+
+def _reference(values, start, warmup):
+    """Mean and std of each series' `warmup` readings from `start` (series, channel)"""
+    n_times = values.shape[1]
+    time_index = np.arange(n_times)[None, :, None]
+    in_window = (time_index >= start[:, None, :]) & (time_index < start[:, None, :] + warmup)
+    window = np.where(in_window, values, np.nan)
+    with np.errstate(invalid='ignore'):
+        count = np.sum(~np.isnan(window), axis=1)
+        mean = np.nansum(window, axis=1) / np.maximum(count, 1)
+        var = np.nansum((window - mean[:, None, :]) ** 2, axis=1) / np.maximum(count - 1, 1)
+    return mean, np.maximum(np.sqrt(var), MIN_STD)
+
+def detect_drift_batch(values, warmup=DEFAULT_WARMUP, slack=CUSUM_SLACK, threshold=CUSUM_THRESHOLD,
+                       max_alarms=10):
+    """
+    Two-sided CUSUM over a (series, time, channel) array, vectorized over time.
+
+    Uses S_t = C_t - min(0, min_{j<=t} C_j), where C is the cumulative sum of
+    (z - slack), so each pass is a cumsum and a running minimum rather than a
+    loop over readings. After an alarm, a series learns a new baseline from the
+    next `warmup` readings and the next pass only looks beyond it. The
+    changepoint estimate is where C last hit its running minimum before the alarm.
+
+    Returns a list of (series, channel, direction, onset_index, alarm_index, shift_in_std).
+    """
+    n_series, n_times, n_channels = values.shape
+    time_index = np.arange(n_times)[None, :, None]
+    baseline_start = np.zeros((n_series, n_channels), dtype=np.int64)
+    rows = np.arange(n_series)
+    alarms = []
+
+    for _ in range(max_alarms):
+        # Later passes only revisit the series that alarmed in the previous one
+        subset = values[rows]
+        mean, std = _reference(subset, baseline_start, warmup)
+        z = np.nan_to_num((subset - mean[:, None, :]) / std[:, None, :])
+        active = time_index >= (baseline_start + warmup)[:, None, :]
+
+        first_alarm = np.full(baseline_start.shape, n_times)
+        cumulative_by_direction = {}
+        for direction in (1, -1):
+            cumulative = np.cumsum(np.where(active, direction * z - slack, 0.0), axis=1)
+            statistic = cumulative - np.minimum(np.minimum.accumulate(cumulative, axis=1), 0)
+            exceeded = statistic > threshold
+            alarm_at = np.where(exceeded.any(axis=1), exceeded.argmax(axis=1), n_times)
+            cumulative_by_direction[direction] = (cumulative, alarm_at)
+            first_alarm = np.minimum(first_alarm, alarm_at)
+
+        fired = first_alarm < n_times
+        if not fired.any():
+            break
+
+        for row, channel in zip(*np.nonzero(fired)):
+            alarm = first_alarm[row, channel]
+            direction = 1 if cumulative_by_direction[1][1][row, channel] == alarm else -1
+            start = baseline_start[row, channel] + warmup
+            segment = cumulative_by_direction[direction][0][row, start:alarm + 1, channel]
+            # Last index where the cumulative sum sat at its minimum before the alarm
+            onset = min(start + len(segment) - int(np.argmin(segment[::-1])), alarm)
+            shift = float(np.mean(z[row, onset:alarm + 1, channel]))
+            alarms.append((int(rows[row]), int(channel), direction, int(onset), int(alarm), shift))
+
+        keep = fired.any(axis=1)
+        rows = rows[keep]
+        baseline_start = np.where(fired, first_alarm + 1, n_times)[keep]
+
+    alarms.sort(key=lambda alarm: (alarm[0], alarm[4]))
+    return alarms
+
+class CusumDetector:
+    """
+    Streaming two-sided CUSUM for many series at once with O(1) work per reading.
+
+    Each (series, channel) learns its reference mean and variance online
+    (Welford) from its first `warmup` readings, then only updates the two CUSUM
+    statistics. After an alarm it learns a new baseline, so a persistent shift
+    raises one alarm rather than a stream of them.
+    """
+
+    def __init__(self, n_series, n_channels=len(SENSOR_CHANNELS), warmup=DEFAULT_WARMUP,
+                 slack=CUSUM_SLACK, threshold=CUSUM_THRESHOLD):
+        self.warmup = warmup
+        self.slack = slack
+        self.threshold = threshold
+        shape = (n_series, n_channels)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.positive = np.zeros(shape)
+        self.negative = np.zeros(shape)
+
+    def _step(self, rows, values):
+        count = self.count[rows]
+        mean = self.mean[rows]
+        m2 = self.m2[rows]
+        positive = self.positive[rows]
+        negative = self.negative[rows]
+
+        # Welford update where the baseline is still being learned
+        warming = count < self.warmup
+        new_count = np.where(warming, count + 1, count)
+        delta = values - mean
+        new_mean = np.where(warming, mean + delta / np.maximum(new_count, 1), mean)
+        m2 = np.where(warming, m2 + delta * (values - new_mean), m2)
+
+        std = np.maximum(np.sqrt(m2 / max(self.warmup - 1, 1)), MIN_STD)
+        z = np.nan_to_num((values - new_mean) / std)
+        positive = np.where(warming, 0, np.maximum(0, positive + z - self.slack))
+        negative = np.where(warming, 0, np.maximum(0, negative - z - self.slack))
+
+        direction = np.where(positive > self.threshold, 1,
+                             np.where(negative > self.threshold, -1, 0)).astype(np.int8)
+        fired = direction != 0
+
+        # Fired channels start learning a new baseline from the next reading
+        self.count[rows] = np.where(fired, 0, new_count)
+        self.mean[rows] = np.where(fired, 0, new_mean)
+        self.m2[rows] = np.where(fired, 0, m2)
+        self.positive[rows] = np.where(fired, 0, positive)
+        self.negative[rows] = np.where(fired, 0, negative)
+        return direction
+
+    def update(self, values):
+        """One reading per series, shaped (n_series, n_channels); returns directions (1 up, -1 down, 0 none)"""
+        return self._step(slice(None), np.asarray(values, dtype=np.float64))
+
+    def update_one(self, series, values):
+        """A single series' reading; returns a per-channel direction array"""
+        return self._step(series, np.asarray(values, dtype=np.float64))
+
+def drift_severity(shift):
+    return 'High' if abs(shift) >= 3 else 'Medium'
+
+def drift_alert(equipment_id, channel, direction, shift, onset_time=None):
+    """Typed maintenance alert dict for a detected drift"""
+    trend = 'increase' if direction > 0 else 'decrease'
+    since = f" since {pd.Timestamp(onset_time):%Y-%m-%d %H:%M}" if onset_time is not None else ''
+    return {
+        'equipment_id': equipment_id,
+        'alert_type': f"Drift: {channel.replace('_', ' ')} {trend}",
+        'severity': drift_severity(shift),
+        'description': (
+            f"{channel.replace('_', ' ').title()} shifted {shift:+.1f}σ from its baseline{since} (CUSUM)"
+        )
+    }
+
+def detect_sensor_drift(readings_df, warmup=DEFAULT_WARMUP, slack=CUSUM_SLACK, threshold=CUSUM_THRESHOLD):
+    """Run batch drift detection over a readings frame and return typed alert dicts"""
+    ids, timestamps, values = stack_sensor_readings(readings_df)
+    alerts = []
+    for series, channel, direction, onset, _, shift in detect_drift_batch(values, warmup, slack, threshold):
+        alerts.append(drift_alert(ids[series], SENSOR_CHANNELS[channel], direction, shift,
+                                  timestamps[series, onset]))
+    return alerts
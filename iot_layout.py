@@ -1,46 +1,31 @@
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
-from datetime import datetime, timedelta
 import random
+import numpy as np
 import pandas as pd
-from iot_data import (
-    generate_sensor_data,
-    predict_maintenance_needs,
-    calculate_health_scores
+from collections import deque
+from models import (
+    get_sensor_readings, get_sensor_readings_since, get_alert_groups, search_maintenance_alerts,
+    resolve_equipment_alerts, get_last_maintenance
 )
+from alert_pipeline import submit_alerts
+from utils import load_stored_result, load_task_result, render_faceted_search
+from sections import Panel, Source, render_panels
+from tasks import run_task
+from rul import estimate_fleet_rul, get_fleet_rul, format_hours
+from sensor_registry import SensorRegistry, get_sensor_registry
 
-def render_iot_dashboard():
-    st.header("IoT Monitoring & Predictive Maintenance Dashboard")
-
-    # Generate sample data
-    readings_df, sensors_df = generate_sensor_data()
-    health_scores = calculate_health_scores(readings_df)
-    maintenance_predictions = predict_maintenance_needs(readings_df)
-
-    # Equipment Health Overview
-    st.subheader("Equipment Health Status")
-    health_cols = st.columns(len(health_scores))
-    for idx, (equipment_id, score) in enumerate(health_scores.items()):
-        with health_cols[idx]:
-            st.metric(
-                equipment_id,
-                f"{score:.1f}%",
-                delta=f"{random.uniform(-2, 2):.1f}%"
-            )
-
-    # Real-time Monitoring
-    st.subheader("Real-time Sensor Readings")
-    selected_equipment = st.selectbox(
-        "Select Equipment",
-        options=readings_df['equipment_id'].unique()
-    )
-
-    # Filter data for selected equipment
-    equipment_data = readings_df[readings_df['equipment_id'] == selected_equipment].copy()
-    equipment_data['timestamp'] = pd.to_datetime(equipment_data['timestamp'])
+LIVE_REFRESH_SECONDS = 5
+LIVE_WINDOW_POINTS = 24 * 60  # One day of per-minute readings per equipment
+LIVE_COLUMNS = ['timestamp', 'temperature', 'vibration', 'pressure', 'power_consumption']
+FLEET_PAGE_SIZE = 25
+WORST_COUNT = 10
+# Larger fleets get a per-band summary instead of one tile per piece of equipment
+MAX_HEALTH_TILES = 8
 
-    # Create multi-metric visualization
+def build_sensor_figure(equipment_id, equipment_data):
+    """Multi-axis temperature, vibration and pressure chart for one piece of equipment"""
     fig = go.Figure()
 
     # Temperature trend
@@ -71,27 +56,222 @@ def render_iot_dashboard():
 
     # Update layout for multiple y-axes
     fig.update_layout(
-        title=f'Sensor Readings for {selected_equipment}',
-        yaxis=dict(title='Temperature (°C)', titlefont=dict(color='red')),
+        title=f'Sensor Readings for {equipment_id}',
+        yaxis=dict(title=dict(text='Temperature (°C)', font=dict(color='red'))),
         yaxis2=dict(
-            title='Vibration',
-            titlefont=dict(color='blue'),
+            title=dict(text='Vibration', font=dict(color='blue')),
             overlaying='y',
             side='right'
         ),
         yaxis3=dict(
-            title='Pressure',
-            titlefont=dict(color='green'),
+            title=dict(text='Pressure', font=dict(color='green')),
             overlaying='y',
             side='right',
             position=0.85
         ),
         height=400
     )
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+def load_fleet_registry(fleet, health):
+    """Registry of the stored sensor fleet, or of the sample fleet while no sensors are registered"""
+    # Keyed on the scores themselves, so an inline recompute with no new readings reuses the registry
+    registry = get_sensor_registry(health, hash(tuple(health.items())))
+    if len(registry):
+        return registry
+    return SensorRegistry(fleet['sensors'], fleet['health_scores'])
+
+def render_fleet_browser(registry):
+    """Fleet filters, a paged worst-first table and equipment selection; returns the selected equipment id"""
+    filter_cols = st.columns(4)
+    with filter_cols[0]:
+        location = st.selectbox("Location", ['All'] + registry.locations, key='iot_fleet_location')
+    with filter_cols[1]:
+        equipment_type = st.selectbox("Equipment type", ['All'] + registry.equipment_types, key='iot_fleet_type')
+    with filter_cols[2]:
+        band = st.selectbox("Health band", ['All'] + registry.bands, key='iot_fleet_band')
+    with filter_cols[3]:
+        prefix = st.text_input("Search ID", key='iot_fleet_search', placeholder="e.g. Pump_12")
+
+    positions = registry.select(
+        location=None if location == 'All' else location,
+        equipment_type=None if equipment_type == 'All' else equipment_type,
+        band=None if band == 'All' else band,
+        prefix=prefix.strip() or None
+    )
+    if not len(positions):
+        st.info("No equipment matches these filters")
+        return None
+
+    pages = -(-len(positions) // FLEET_PAGE_SIZE)
+    page_col, caption_col = st.columns([1, 3])
+    with page_col:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, key='iot_fleet_page')
+    with caption_col:
+        st.caption(f"{len(positions):,} of {len(registry):,} sensors match · page {page} of {pages}, worst health first")
+    page_frame = registry.page(positions, int(page) - 1, FLEET_PAGE_SIZE)
+    st.dataframe(
+        page_frame.rename(columns={
+            'equipment_id': 'Equipment', 'sensor_id': 'Sensor', 'equipment_type': 'Type',
+            'location': 'Location', 'health_score': 'Health', 'health_band': 'Band'
+        }).round({'Health': 1}),
+        hide_index=True, use_container_width=True
+    )
+    if len(positions) > FLEET_PAGE_SIZE:
+        with st.expander(f"{WORST_COUNT} worst across the filtered fleet"):
+            st.dataframe(registry.frame(registry.worst(WORST_COUNT, positions)).round({'health_score': 1}),
+                         hide_index=True, use_container_width=True)
+
+    return st.selectbox("Select Equipment", options=page_frame['equipment_id'].tolist())
+
+def load_equipment_readings(equipment_id, record, readings_df, hours=24):
+    """Readings of one piece of equipment from the sample fleet, else from the stored readings"""
+    equipment_data = readings_df[readings_df['equipment_id'] == equipment_id].copy()
+    if equipment_data.empty and record is not None:
+        stored = get_sensor_readings(record['sensor_id'], hours)
+        equipment_data = pd.DataFrame(stored, columns=[
+            'id', 'sensor_id', 'temperature', 'vibration', 'pressure', 'power_consumption', 'timestamp'
+        ]).iloc[::-1]
+    equipment_data['timestamp'] = pd.to_datetime(equipment_data['timestamp'])
+    return equipment_data
+
+def get_live_buffer(window_points):
+    """Session-held rolling buffer of live readings, one deque per equipment"""
+    buffer = st.session_state.get('iot_live_buffer')
+    if buffer is None or buffer['window_points'] != window_points:
+        buffer = {
+            'watermark': None,
+            'window_points': window_points,
+            'series': {},
+            'versions': {},
+            'figures': {}
+        }
+        st.session_state.iot_live_buffer = buffer
+    return buffer
+
+def poll_live_readings(buffer, hours=24):
+    """Append readings newer than the buffer's high-watermark; returns the number added"""
+    rows = get_sensor_readings_since(buffer['watermark'], hours)
+    for row in rows:
+        equipment_id = row[2]
+        if equipment_id not in buffer['series']:
+            buffer['series'][equipment_id] = deque(maxlen=buffer['window_points'])
+        buffer['series'][equipment_id].append((row[7], row[3], row[4], row[5], row[6]))
+        buffer['versions'][equipment_id] = buffer['versions'].get(equipment_id, 0) + 1
+    if rows:
+        buffer['watermark'] = (rows[-1][7], rows[-1][0])
+    return len(rows)
+
+def render_live_readings(equipment_id, refresh_seconds, window_points):
+    """Live chart of the equipment selected in the fleet browser, the one the other sections describe"""
+    # Only this fragment reruns on each tick, not the whole dashboard
+    @st.fragment(run_every=refresh_seconds)
+    def live_readings():
+        buffer = get_live_buffer(window_points)
+        new_points = poll_live_readings(buffer)
+
+        if equipment_id not in buffer['series']:
+            st.info(f"No live readings received for {equipment_id} yet. They will appear here as they arrive.")
+            return
+
+        # Rebuild the figure only when this equipment received new points
+        version = buffer['versions'][equipment_id]
+        cached = buffer['figures'].get(equipment_id)
+        if cached is None or cached[0] != version:
+            equipment_data = pd.DataFrame(list(buffer['series'][equipment_id]), columns=LIVE_COLUMNS)
+            equipment_data['timestamp'] = pd.to_datetime(equipment_data['timestamp'])
+            cached = (version, build_sensor_figure(equipment_id, equipment_data))
+            buffer['figures'][equipment_id] = cached
+
+        st.caption(f"{new_points} new readings this tick · last reading {buffer['watermark'][0]} UTC")
+        st.plotly_chart(cached[1], use_container_width=True, key='iot_live_chart')
+
+    live_readings()
+
+def iot_sources(stored_fleet, health_scores):
+    """Sample fleet, sensor registry and stored-history RUL as panel sources"""
+    return [
+        Source('fleet', lambda: stored_fleet if stored_fleet is not None else run_task('iot_fleet')),
+        Source('registry', lambda fleet: load_fleet_registry(fleet, health_scores), ['fleet']),
+        Source('stored_rul', get_fleet_rul)
+    ]
+
+def render_health_overview(registry):
+    # Equipment Health Overview
+    st.subheader("Equipment Health Status")
+    if not len(registry):
+        st.info("No sensors registered")
+    elif len(registry) <= MAX_HEALTH_TILES:
+        # Tiles show the same fleet the browser pages through
+        tiles = registry.frame(np.arange(len(registry)))
+        health_cols = st.columns(len(tiles))
+        for idx, (equipment_id, score) in enumerate(zip(tiles['equipment_id'], tiles['health_score'])):
+            with health_cols[idx]:
+                st.metric(
+                    equipment_id,
+                    "n/a" if np.isnan(score) else f"{score:.1f}%",
+                    delta=None if np.isnan(score) else f"{random.uniform(-2, 2):.1f}%"
+                )
+    else:
+        band_counts = registry.band_counts()
+        band_cols = st.columns(len(band_counts))
+        for idx, (band, count) in enumerate(band_counts.items()):
+            with band_cols[idx]:
+                st.metric(band, f"{count:,}")
+
+def render_iot_dashboard():
+    st.header("IoT Monitoring & Predictive Maintenance Dashboard")
+
+    # Health scores come from the cached sensor list, so they are read on the script thread
+    health_scores = load_task_result('fleet_health')['health_scores']
+    stored_fleet = load_stored_result('iot_fleet')
+
+    # The sample fleet and the stored-history RUL load concurrently; the sections below
+    # follow the fleet browser's selection and are drawn in order once it is made
+    data, _ = render_panels(iot_sources(stored_fleet, health_scores), [
+        Panel("equipment health", render_health_overview, ['registry'])
+    ])
+    if 'registry' not in data:
+        return
+    fleet = data['fleet']
+    registry = data['registry']
+    readings_df = fleet['readings']
+    maintenance_predictions = fleet['maintenance_predictions']
+    drift_alerts = fleet.get('drift_alerts', [])
+
+    # Prefer estimates from stored history; the sample fleet covers an empty database
+    rul = data.get('stored_rul')
+    if rul is None or rul.empty:
+        rul = fleet['rul'] if 'rul' in fleet else estimate_fleet_rul(readings_df)
+
+    # Real-time Monitoring
+    st.subheader("Real-time Sensor Readings")
+    live_mode = st.toggle("Live mode", key='iot_live_mode',
+                          help="Poll stored sensor readings and append only new points")
+    if live_mode:
+        refresh_seconds = st.number_input(
+            "Refresh interval (seconds)", min_value=1, max_value=300,
+            value=LIVE_REFRESH_SECONDS, key='iot_live_refresh'
+        )
+    selected_equipment = render_fleet_browser(registry)
+    selected_record = registry.record(selected_equipment) if selected_equipment else None
+
+    if live_mode and selected_equipment:
+        render_live_readings(selected_equipment, refresh_seconds, LIVE_WINDOW_POINTS)
+    elif selected_equipment:
+        # Create multi-metric visualization
+        equipment_data = load_equipment_readings(selected_equipment, selected_record, readings_df)
+        fig = build_sensor_figure(selected_equipment, equipment_data)
+        st.plotly_chart(fig, use_container_width=True)
 
     # Maintenance Alerts
     st.subheader("Maintenance Alerts")
+    alert_summary = load_task_result('active_alert_summary')
+    if alert_summary['total']:
+        severity_counts = ', '.join(
+            f"{severity}: {count}" for severity, count in sorted(alert_summary['by_severity'].items())
+        )
+        st.caption(f"{alert_summary['total']} unresolved alerts across the fleet ({severity_counts})")
     if maintenance_predictions:
         for pred in maintenance_predictions:
             if pred['equipment_id'] == selected_equipment:
@@ -106,12 +286,82 @@ def render_iot_dashboard():
     else:
         st.success("No maintenance alerts for selected equipment")
 
+    equipment_drift = [alert for alert in drift_alerts if alert['equipment_id'] == selected_equipment]
+    if equipment_drift:
+        st.markdown("**Sensor drift**")
+        st.dataframe(
+            pd.DataFrame(equipment_drift)[['alert_type', 'severity', 'description']],
+            hide_index=True, use_container_width=True
+        )
+    equipment_alerts = equipment_drift + [
+        pred for pred in maintenance_predictions if pred['equipment_id'] == selected_equipment
+    ]
+    if equipment_alerts and st.button("Record alerts", key='iot_record_alerts',
+                                      help="Repeats of open alerts are counted instead of stored again"):
+        outcome = submit_alerts(equipment_alerts)
+        if outcome.get('failed'):
+            st.error("Failed to record alerts")
+        else:
+            st.success(
+                f"{outcome['inserted']} new, {outcome['merged']} merged into open alerts, "
+                f"{outcome['suppressed']} suppressed by the storm limit"
+            )
+    if selected_equipment and st.button("Resolve after maintenance", key='iot_resolve_alerts',
+                                        help="Resolve this equipment's open alerts; its RUL trend restarts from now"):
+        resolved = resolve_equipment_alerts(selected_equipment)
+        if resolved is False:
+            st.error("Failed to resolve alerts")
+        elif resolved:
+            st.success(f"{resolved} open alerts resolved for {selected_equipment}")
+        else:
+            st.info(f"{selected_equipment} has no open alerts to resolve")
+
+    alert_groups = get_alert_groups()
+    if alert_groups:
+        with st.expander(f"Open alert groups ({len(alert_groups)} most recent)"):
+            st.dataframe(
+                pd.DataFrame(alert_groups, columns=[
+                    'Group', 'First Seen', 'Last Seen', 'Alerts', 'Occurrences',
+                    'Equipment', 'Severity', 'Types'
+                ]).assign(Severity=lambda df: df['Severity'].map({3: 'High', 2: 'Medium', 1: 'Low'})),
+                hide_index=True, use_container_width=True
+            )
+
+    render_faceted_search(
+        'alert_search', "Search alerts", search_maintenance_alerts,
+        [('severity', 'severity', "Severity"), ('alert_type', 'alert_type', "Alert type"),
+         ('equipment', 'equipment_id', "Equipment")],
+        ['ID', 'Created', 'Equipment', 'Type', 'Severity', 'Description', 'Status'],
+        placeholder="e.g. vibration bearing"
+    )
+
+    # Remaining Useful Life
+    st.subheader("Remaining Useful Life")
+    st.dataframe(
+        pd.DataFrame({
+            'Equipment': rul['equipment_id'],
+            'Limiting Sensor': rul['limiting_channel'].str.replace('_', ' '),
+            'Time to Threshold': rul['hours_to_threshold'].map(format_hours),
+            'Trend per Day': rul['trend_per_day'].round(4),
+            'Current': rul['current'].round(2),
+            'Threshold': rul['threshold'].round(2)
+        }),
+        hide_index=True, use_container_width=True
+    )
+    selected_rul = rul[rul['equipment_id'] == selected_equipment]
+
     # Equipment Details
-    with st.expander("Equipment Details"):
-        st.json({
-            'Equipment ID': selected_equipment,
-            'Location': sensors_df[sensors_df['equipment_id'] == selected_equipment]['location'].iloc[0],
-            'Health Score': f"{health_scores[selected_equipment]:.1f}%",
-            'Last Maintenance': (datetime.now() - timedelta(days=random.randint(5, 30))).strftime('%Y-%m-%d'),
-            'Sensor ID': sensors_df[sensors_df['equipment_id'] == selected_equipment]['sensor_id'].iloc[0]
-        })
\ No newline at end of file
+    if selected_record is not None:
+        with st.expander("Equipment Details"):
+            st.json({
+                'Equipment ID': selected_equipment,
+                'Location': selected_record['location'],
+                'Health Score': (
+                    f"{selected_record['health_score']:.1f}%" if pd.notna(selected_record['health_score']) else 'Unknown'
+                ),
+                'Last Maintenance': get_last_maintenance().get(selected_equipment, 'Unknown'),
+                'Time to Threshold': (
+                    format_hours(selected_rul['hours_to_threshold'].iloc[0]) if not selected_rul.empty else 'Unknown'
+                ),
+                'Sensor ID': selected_record['sensor_id']
+            })
\ No newline at end of file
@@ -0,0 +1,188 @@
+import json
+import pickle
+import sqlite3
+
+
+def init_job_tables():
+    conn = sqlite3.connect('guardian_io.db')
+    c = conn.cursor()
+
+    # Create jobs table used as a local work queue for the worker pool
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task TEXT NOT NULL,
+            params TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'queued',
+            result BLOB,
+            error TEXT,
+            worker TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_jobs_task ON jobs (task, params, id)')
+
+    conn.commit()
+    conn.close()
+
+def _encode_params(params):
+    return json.dumps(params or {}, sort_keys=True)
+
+def enqueue_job(task, params=None):
+    """Queue a task, reusing an identical job that is still queued or running"""
+    conn = sqlite3.connect('guardian_io.db')
+    c = conn.cursor()
+    encoded = _encode_params(params)
+
+    try:
+        c.execute('BEGIN IMMEDIATE')
+        c.execute('''
+            SELECT id FROM jobs
+            WHERE task = ? AND params = ? AND status IN ('queued', 'running')
+            ORDER BY id DESC LIMIT 1
+        ''', (task, encoded))
+        existing = c.fetchone()
+        if existing:
+            job_id = existing[0]
+        else:
+            c.execute('INSERT INTO jobs (task, params) VALUES (?, ?)', (task, encoded))
+            job_id = c.lastrowid
+        conn.commit()
+        return job_id
+    except sqlite3.Error:
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+def claim_next_job(worker):
+    """Atomically move the oldest queued job to running and return it"""
+    conn = sqlite3.connect('guardian_io.db', timeout=30)
+    c = conn.cursor()
+
+    try:
+        c.execute('BEGIN IMMEDIATE')
+        c.execute("SELECT id, task, params FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1")
+        job = c.fetchone()
+        if job is None:
+            conn.commit()
+            return None
+        c.execute('''
+            UPDATE jobs SET status = 'running', worker = ?, started_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (worker, job[0]))
+        conn.commit()
+        return {'id': job[0], 'task': job[1], 'params': json.loads(job[2])}
+    except sqlite3.Error:
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+def complete_job(job_id, result):
+    conn = sqlite3.connect('guardian_io.db', timeout=30)
+    c = conn.cursor()
+
+    c.execute('''
+        UPDATE jobs SET status = 'done', result = ?, finished_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', (pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), job_id))
+    conn.commit()
+    conn.close()
+
+def fail_job(job_id, error):
+    conn = sqlite3.connect('guardian_io.db', timeout=30)
+    c = conn.cursor()
+
+    c.execute('''
+        UPDATE jobs SET status = 'failed', error = ?, finished_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', (error, job_id))
+    conn.commit()
+    conn.close()
+
+def requeue_stale_jobs(max_runtime_minutes=30):
+    """Put jobs left running by a crashed worker back on the queue"""
+    conn = sqlite3.connect('guardian_io.db', timeout=30)
+    c = conn.cursor()
+
+    c.execute('''
+        UPDATE jobs SET status = 'queued', worker = NULL, started_at = NULL
+        WHERE status = 'running' AND started_at < datetime('now', ?)
+    ''', (f'-{max_runtime_minutes} minutes',))
+    requeued = c.rowcount
+    conn.commit()
+    conn.close()
+
+    return requeued
+
+def get_latest_job(task, params=None):
+    """Return the most recent job for a task, preferring the newest finished result"""
+    conn = sqlite3.connect('guardian_io.db')
+    c = conn.cursor()
+
+    c.execute('''
+        SELECT id, status, result, error, created_at, finished_at,
+               CAST(strftime('%s', 'now') - strftime('%s', COALESCE(finished_at, created_at)) AS INTEGER)
+        FROM jobs
+        WHERE task = ? AND params = ?
+        ORDER BY (status = 'done') DESC, id DESC
+        LIMIT 1
+    ''', (task, _encode_params(params)))
+    job = c.fetchone()
+
+    pending = None
+    if job and job[1] == 'done':
+        c.execute('''
+            SELECT status FROM jobs
+            WHERE task = ? AND params = ? AND id > ? AND status IN ('queued', 'running')
+            ORDER BY id DESC LIMIT 1
+        ''', (task, _encode_params(params), job[0]))
+        pending = c.fetchone()
+    conn.close()
+
+    if job is None:
+        return None
+    return {
+        'id': job[0],
+        'status': job[1],
+        'result': pickle.loads(job[2]) if job[2] is not None else None,
+        'error': job[3],
+        'created_at': job[4],
+        'finished_at': job[5],
+        'age_seconds': job[6],
+        'refresh_status': pending[0] if pending else None
+    }
+
+def get_job_counts():
+    conn = sqlite3.connect('guardian_io.db')
+    c = conn.cursor()
+
+    c.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status')
+    counts = dict(c.fetchall())
+    conn.close()
+
+    return counts
+
+def purge_finished_jobs(keep_per_task=5):
+    """Drop old finished jobs, keeping the most recent results for each task"""
+    conn = sqlite3.connect('guardian_io.db', timeout=30)
+    c = conn.cursor()
+
+    c.execute('''
+        DELETE FROM jobs
+        WHERE status IN ('done', 'failed') AND id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY task, params ORDER BY id DESC) AS rn
+                FROM jobs WHERE status IN ('done', 'failed')
+            ) WHERE rn <= ?
+        )
+    ''', (keep_per_task,))
+    purged = c.rowcount
+    conn.commit()
+    conn.close()
+
+    return purged
@@ -0,0 +1,168 @@
+"""Precomputed rolling statistics and correlations for daily KPI drill-down.
+
+KpiAnalytics keeps running sums of each metric, its square and the pairwise
+products of the correlation metrics. Rolling means, standard deviations and
+correlations for every window are differences of those sums, so the whole
+table is built in one vectorized pass and appending a day only computes the
+new day's row. Drill-down reads are lookups by date and metric.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+ROLLING_WINDOWS = (7, 30, 90)
+MANUFACTURING_METRICS = [
+    'production_output', 'machine_efficiency', 'quality_rate',
+    'energy_consumption', 'maintenance_incidents'
+]
+MANUFACTURING_CORRELATION_METRICS = [
+    'production_output', 'machine_efficiency', 'quality_rate', 'energy_consumption'
+]
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def row_hashes(data, columns):
+    """Per-row content hashes; a dataset whose hashes extend a cached one is an append"""
+    return pd.util.hash_pandas_object(data[['date'] + list(columns)], index=False).to_numpy()
+
+class KpiAnalytics:
+    def __init__(self, metrics, correlation_metrics=None, windows=ROLLING_WINDOWS):
+        self.metrics = list(metrics)
+        self.correlation_metrics = list(correlation_metrics or metrics)
+        self.windows = tuple(windows)
+        self._corr_index = [self.metrics.index(m) for m in self.correlation_metrics]
+
+        n_metrics, n_corr = len(self.metrics), len(self.correlation_metrics)
+        self.dates = np.empty(0, dtype='datetime64[ns]')
+        self.values = np.empty((0, n_metrics))
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self._shift = None
+        # Running sums with a leading zero row, so a window sum is cum[end] - cum[start]
+        self._sum = np.zeros((1, n_metrics))
+        self._sum_sq = np.zeros((1, n_metrics))
+        self._sum_cross = np.zeros((1, n_corr, n_corr))
+        self.rolling_mean = {w: np.empty((0, n_metrics)) for w in self.windows}
+        self.rolling_std = {w: np.empty((0, n_metrics)) for w in self.windows}
+        self.rolling_corr = {w: np.empty((0, n_corr, n_corr)) for w in self.windows}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def extend(self, data):
+        """Append rows (later dates than any already held) and compute only their statistics"""
+        if data.empty:
+            return self
+        new_values = data[self.metrics].to_numpy(dtype=np.float64)
+        if self._shift is None:
+            # Sums of values shifted by the first row keep variances free of cancellation
+            self._shift = new_values[0].copy()
+        centred = new_values - self._shift
+        corr_values = centred[:, self._corr_index]
+
+        start = len(self)
+        self._sum = np.concatenate([self._sum, self._sum[-1] + np.cumsum(centred, axis=0)])
+        self._sum_sq = np.concatenate([self._sum_sq, self._sum_sq[-1] + np.cumsum(centred ** 2, axis=0)])
+        cross = np.einsum('ti,tj->tij', corr_values, corr_values)
+        self._sum_cross = np.concatenate([self._sum_cross, self._sum_cross[-1] + np.cumsum(cross, axis=0)])
+
+        self.dates = np.concatenate([self.dates, data['date'].to_numpy(dtype='datetime64[ns]')])
+        self.values = np.concatenate([self.values, new_values])
+        self.hashes = np.concatenate([self.hashes, row_hashes(data, self.metrics)])
+
+        ends = np.arange(start, len(self)) + 1
+        for window in self.windows:
+            mean, std, corr = self._window_stats(ends, window)
+            self.rolling_mean[window] = np.concatenate([self.rolling_mean[window], mean])
+            self.rolling_std[window] = np.concatenate([self.rolling_std[window], std])
+            self.rolling_corr[window] = np.concatenate([self.rolling_corr[window], corr])
+        return self
+
+    def _window_stats(self, ends, window):
+        """Rolling statistics for windows ending at the given running-sum rows (NaN until full)"""
+        full = ends >= window
+        begins = np.where(full, ends - window, 0)
+        count = np.where(full, window, np.nan)[:, None]
+
+        total = self._sum[ends] - self._sum[begins]
+        total_sq = self._sum_sq[ends] - self._sum_sq[begins]
+        mean = total / count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = np.maximum(total_sq - total * mean, 0) / (count - 1)
+
+            corr_total = total[:, self._corr_index]
+            cross = self._sum_cross[ends] - self._sum_cross[begins]
+            covariance = cross - np.einsum('ti,tj->tij', corr_total, corr_total) / count[:, :, None]
+            scale = np.sqrt(np.einsum('tii->ti', covariance))
+            corr = covariance / (scale[:, :, None] * scale[:, None, :])
+        return mean + self._shift, np.sqrt(variance), corr
+
+    def index_of(self, date):
+        position = int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date), 'ns')))
+        if position >= len(self) or self.dates[position] != np.datetime64(pd.Timestamp(date), 'ns'):
+            raise KeyError(f"No KPI data for {date}")
+        return position
+
+    def rolling_series(self, metric, window):
+        return pd.Series(self.rolling_mean[window][:, self.metrics.index(metric)],
+                         index=pd.DatetimeIndex(self.dates), name=metric)
+
+    def correlation_matrix(self, window=None, date=None):
+        """Full-period correlation, or the rolling correlation of the window ending at `date`"""
+        if window is None:
+            corr = self._window_stats(np.array([len(self)]), len(self))[2][0]
+        else:
+            corr = self.rolling_corr[window][self.index_of(date)]
+        return pd.DataFrame(corr, index=self.correlation_metrics, columns=self.correlation_metrics)
+
+    def lookup(self, date, metric):
+        """Precomputed drill-down summary for one metric on one day"""
+        row = self.index_of(date)
+        column = self.metrics.index(metric)
+        value = self.values[row, column]
+        summary = {
+            'value': value,
+            'change': value - self.values[row - 1, column] if row else np.nan,
+            'windows': {}
+        }
+        for window in self.windows:
+            mean = self.rolling_mean[window][row, column]
+            std = self.rolling_std[window][row, column]
+            entry = {
+                'mean': mean,
+                'std': std,
+                'z_score': (value - mean) / std if std > 0 else np.nan
+            }
+            if metric in self.correlation_metrics:
+                corr_row = self.rolling_corr[window][row, self.correlation_metrics.index(metric)]
+                entry['correlations'] = dict(zip(self.correlation_metrics, corr_row))
+            summary['windows'][window] = entry
+        return summary
+
+def build_kpi_analytics(data, metrics, correlation_metrics=None, windows=ROLLING_WINDOWS):
+    ordered = data.sort_values('date', kind='stable')
+    return KpiAnalytics(metrics, correlation_metrics, windows).extend(ordered)
+
+def get_kpi_analytics(name, data, metrics, correlation_metrics=None, windows=ROLLING_WINDOWS):
+    """
+    Analytics for a dataset, reused while its rows are unchanged and extended in
+    place when only new days have been appended since the last call.
+    """
+    ordered = data.sort_values('date', kind='stable')
+    hashes = row_hashes(ordered, metrics)
+    with _cache_lock:
+        analytics = _cache.get(name)
+        reusable = (
+            analytics is not None
+            and analytics.metrics == list(metrics)
+            and analytics.windows == tuple(windows)
+            and len(analytics) <= len(hashes)
+            and np.array_equal(analytics.hashes, hashes[:len(analytics)])
+        )
+        if reusable:
+            analytics.extend(ordered.iloc[len(analytics):])
+        else:
+            analytics = KpiAnalytics(metrics, correlation_metrics, windows).extend(ordered)
+            _cache[name] = analytics
+        return analytics
@@ -0,0 +1,231 @@
+"""Persisted manufacturing and healthcare KPI history.
+
+KPIs live in each industry tenant's database in long format, in kpi_hourly
+and kpi_daily keyed by (metric, time). Loading hourly data also refreshes
+the daily rollup for the days it touched.
+
+    python kpi_store.py backfill --tenant Manufacturing --years 3
+    python kpi_store.py load kpis.parquet --tenant Healthcare --grain hourly
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_generator import generate_hourly_kpis
+from tenancy import CURRENT_TENANT, TENANTS, get_connection, resolve_tenant
+
+# How each metric rolls up from hourly to daily values
+KPI_METRICS = {
+    'Manufacturing': {
+        'production_output': 'SUM',
+        'machine_efficiency': 'AVG',
+        'quality_rate': 'AVG',
+        'energy_consumption': 'SUM',
+        'maintenance_incidents': 'SUM'
+    },
+    'Healthcare': {
+        'patient_satisfaction': 'AVG',
+        'bed_occupancy': 'AVG',
+        'average_wait_time': 'AVG',
+        'staff_availability': 'AVG',
+        'equipment_utilization': 'AVG'
+    }
+}
+GRAINS = {
+    # grain: (table, time column, frame column, strftime format)
+    'hourly': ('kpi_hourly', 'hour', 'timestamp', '%Y-%m-%d %H:%M:%S'),
+    'daily': ('kpi_daily', 'day', 'date', '%Y-%m-%d')
+}
+DEFAULT_CHUNK_ROWS = 50_000
+# Dashboards show the latest year unless another range is selected
+DEFAULT_WINDOW_DAYS = 365
+
+def ingest_kpi_frame(frame, grain='daily', tenant=CURRENT_TENANT, metrics=None):
+    """
+    Upsert a wide frame (one time column plus metric columns) into the KPI tables.
+    Returns the number of (metric, time) values written.
+    """
+    table, time_column, frame_column, time_format = GRAINS[grain]
+    metrics = [m for m in (metrics or frame.columns) if m != frame_column]
+    times = pd.to_datetime(frame[frame_column])
+    if grain == 'daily':
+        times = times.dt.normalize()
+    keys = times.dt.strftime(time_format).to_numpy()
+
+    # One column-major pass builds every (metric, time, value) row without a per-row loop
+    values = frame[metrics].to_numpy(dtype=np.float64).T.ravel()
+    present = ~np.isnan(values)
+    rows = list(zip(
+        np.repeat(np.array(metrics, dtype=object), len(frame))[present].tolist(),
+        np.tile(keys, len(metrics))[present].tolist(),
+        values[present].tolist()
+    ))
+
+    conn = get_connection(tenant)
+    c = conn.cursor()
+
+    try:
+        c.executemany(f'''
+            INSERT INTO {table} (metric, {time_column}, value) VALUES (?, ?, ?)
+            ON CONFLICT (metric, {time_column}) DO UPDATE SET value = excluded.value
+        ''', rows)
+        if grain == 'hourly' and len(frame):
+            _rollup_daily(c, metrics, keys.min()[:10], keys.max()[:10], tenant)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return len(rows)
+
+def _rollup_daily(c, metrics, first_day, last_day, tenant):
+    """Recompute daily values for the touched days from the hourly table"""
+    aggregations = _aggregations(tenant)
+    for metric in metrics:
+        aggregate = aggregations.get(metric, 'AVG')
+        c.execute(f'''
+            INSERT INTO kpi_daily (metric, day, value)
+            SELECT metric, date(hour), {aggregate}(value)
+            FROM kpi_hourly
+            WHERE metric = ? AND hour >= ? AND hour < date(?, '+1 day')
+            GROUP BY metric, date(hour)
+            ON CONFLICT (metric, day) DO UPDATE SET value = excluded.value
+        ''', (metric, first_day, last_day))
+
+def _aggregations(tenant):
+    return KPI_METRICS.get(resolve_tenant(tenant), {})
+
+def _read_chunks(path, chunk_rows):
+    """Yield DataFrame chunks of a CSV or Parquet file"""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Loading Parquet files requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+def load_kpi_file(path, grain='daily', tenant=CURRENT_TENANT, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Stream a CSV or Parquet file into the KPI store chunk by chunk; returns values written"""
+    written = 0
+    for chunk in _read_chunks(path, chunk_rows):
+        written += ingest_kpi_frame(chunk, grain, tenant)
+    return written
+
+def get_kpi_history(tenant, start=None, end=None, metrics=None, grain='daily'):
+    """
+    Stored KPIs from start through the end date as a wide frame with a 'date'
+    column, or 'timestamp' for hourly grain. Empty when nothing is stored.
+    """
+    table, time_column, frame_column, time_format = GRAINS[grain]
+    metrics = list(metrics or KPI_METRICS.get(tenant, {}))
+    conditions = [f"metric IN ({', '.join('?' * len(metrics))})"]
+    params = list(metrics)
+    if start is not None:
+        conditions.append(f'{time_column} >= ?')
+        params.append(pd.Timestamp(start).strftime(time_format))
+    if end is not None:
+        # An end date includes all of that day's hours
+        conditions.append(f'{time_column} < ?')
+        params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).strftime(time_format))
+
+    conn = get_connection(tenant)
+    c = conn.cursor()
+
+    try:
+        c.execute(f'''
+            SELECT metric, {time_column}, value FROM {table}
+            WHERE {' AND '.join(conditions)}
+        ''', params)
+        rows = c.fetchall()
+    except sqlite3.OperationalError:
+        # KPI tables not initialised yet
+        rows = []
+    finally:
+        conn.close()
+
+    if not rows:
+        return pd.DataFrame(columns=[frame_column] + metrics)
+    long = pd.DataFrame(rows, columns=['metric', frame_column, 'value'])
+    wide = long.pivot(index=frame_column, columns='metric', values='value')
+    wide.index = pd.to_datetime(wide.index)
+    return wide.reindex(columns=[m for m in metrics if m in wide.columns]).sort_index().reset_index()
+
+def get_kpi_date_range(tenant, grain='daily'):
+    """(first, last) stored timestamps for a tenant, or None when nothing is stored"""
+    table, time_column, _, _ = GRAINS[grain]
+    conn = get_connection(tenant)
+    c = conn.cursor()
+
+    try:
+        c.execute(f'SELECT MIN({time_column}), MAX({time_column}) FROM {table}')
+        first, last = c.fetchone()
+    except sqlite3.OperationalError:
+        first = last = None
+    finally:
+        conn.close()
+
+    if first is None:
+        return None
+    return pd.Timestamp(first), pd.Timestamp(last)
+
+def default_kpi_window(tenant, days=DEFAULT_WINDOW_DAYS):
+    """The last `days` of stored daily history as (start, end), or None when nothing is stored"""
+    stored = get_kpi_date_range(tenant)
+    if stored is None:
+        return None
+    first, last = stored
+    return max(first, last - pd.Timedelta(days=days - 1)), last
+
+def backfill(tenant, years=3, end=None, chunk_days=30, seed=None):
+    """Synthesize and load `years` of hourly KPIs ending at `end`, one chunk of days at a time"""
+    end = pd.Timestamp(end or pd.Timestamp.now().normalize())
+    start = end - pd.Timedelta(days=round(365.25 * years))
+    rng = np.random.default_rng(seed)
+    written = 0
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + pd.Timedelta(days=chunk_days), end)
+        frame = generate_hourly_kpis(tenant, chunk_start, chunk_end, seed=rng.integers(2**32))
+        written += ingest_kpi_frame(frame, 'hourly', tenant)
+        chunk_start = chunk_end
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description='Guardian-IO KPI store loader')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    backfill_parser = commands.add_parser('backfill', help='load synthetic hourly history')
+    backfill_parser.add_argument('--tenant', choices=TENANTS, nargs='+', default=TENANTS)
+    backfill_parser.add_argument('--years', type=float, default=3)
+    backfill_parser.add_argument('--seed', type=int)
+
+    load_parser = commands.add_parser('load', help='load a CSV or Parquet file')
+    load_parser.add_argument('path')
+    load_parser.add_argument('--tenant', choices=TENANTS, required=True)
+    load_parser.add_argument('--grain', choices=list(GRAINS), default='daily')
+    load_parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+
+    args = parser.parse_args()
+
+    from models import init_kpi_tables
+    tenants = args.tenant if args.command == 'backfill' else [args.tenant]
+    for tenant in tenants:
+        init_kpi_tables(tenant)
+        started = time.perf_counter()
+        if args.command == 'backfill':
+            written = backfill(tenant, args.years, seed=args.seed)
+        else:
+            if not os.path.exists(args.path):
+                parser.error(f"No such file: {args.path}")
+            written = load_kpi_file(args.path, args.grain, tenant, args.chunk_rows)
+        elapsed = time.perf_counter() - started
+        print(f"{tenant}: {written:,} values in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f}/s)")
+
+if __name__ == '__main__':
+    main()
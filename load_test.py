@@ -0,0 +1,418 @@
+"""Load test of the dashboard with concurrent simulated users.
+
+    python load_test.py --users 8 --iterations 3
+    python load_test.py --users 16 --ramp 10 --think 0.5 --json load.json --max-p95-ms 3000
+
+Every virtual user is a Streamlit AppTest session of main.py in its own
+thread of this process, so users share caches, connection pools and the data
+plane the way sessions of one server process do. Each user logs in, then
+cycles through the Dashboard, Supply Chain and IoT Monitoring views and
+picks another piece of equipment on the IoT page.
+
+The report gives latency percentiles per step, the process's CPU and memory
+while the users run, and the time spent in SQLite calls. The part of a call
+not spent on the calling thread's CPU is reported as off-CPU time: busy-timeout
+sleeps on a locked database, disk I/O and waiting for the GIL behind other
+users. Lock waits that outlast the busy timeout are counted as 'database is
+locked' errors. CPU and memory use psutil when installed. Runs in a fresh
+temporary database with generated accounts unless --workdir is given.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+VIEWS = ['Dashboard', 'Supply Chain', 'IoT Monitoring']
+INDUSTRIES = ['Manufacturing', 'Healthcare']
+PASSWORD = 'load-test'
+PERCENTILES = [50, 90, 95, 99]
+RESOURCE_INTERVAL = 0.25
+
+class SqliteMonitor:
+    """Times every statement and commit made through sqlite3.connect"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.locked_errors = 0
+        self._connect = None
+
+    def install(self):
+        monitor = self
+
+        class TimedCursor(sqlite3.Cursor):
+            def execute(self, sql, *args):
+                return monitor.timed(_statement_kind(sql), super().execute, sql, *args)
+
+            def executemany(self, sql, *args):
+                return monitor.timed(_statement_kind(sql), super().executemany, sql, *args)
+
+            def executescript(self, script):
+                return monitor.timed('write', super().executescript, script)
+
+        class TimedConnection(sqlite3.Connection):
+            def cursor(self, factory=TimedCursor):
+                return super().cursor(factory)
+
+            def execute(self, sql, *args):
+                return self.cursor().execute(sql, *args)
+
+            def executemany(self, sql, *args):
+                return self.cursor().executemany(sql, *args)
+
+            def commit(self):
+                return monitor.timed('commit', super().commit)
+
+        self._connect = sqlite3.connect
+
+        def connect(*args, **kwargs):
+            kwargs.setdefault('factory', TimedConnection)
+            return monitor._connect(*args, **kwargs)
+
+        sqlite3.connect = connect
+
+    def reset(self):
+        with self.lock:
+            self.calls = {}
+            self.locked_errors = 0
+
+    def uninstall(self):
+        if self._connect is not None:
+            sqlite3.connect = self._connect
+            self._connect = None
+
+    def timed(self, kind, call, *args):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            return call(*args)
+        except sqlite3.OperationalError as error:
+            if 'locked' in str(error) or 'busy' in str(error):
+                with self.lock:
+                    self.locked_errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - wall
+            waited = max(elapsed - (time.thread_time() - cpu), 0.0)
+            with self.lock:
+                self.calls.setdefault(kind, []).append((elapsed, waited))
+
+    def report(self):
+        rows = []
+        with self.lock:
+            calls = {kind: list(values) for kind, values in self.calls.items()}
+        for kind, values in sorted(calls.items()):
+            elapsed = np.array([value[0] for value in values])
+            waited = np.array([value[1] for value in values])
+            rows.append({
+                'kind': kind,
+                'calls': len(values),
+                'total_ms': elapsed.sum() * 1000,
+                'off_cpu_ms': waited.sum() * 1000,
+                'off_cpu_p95_ms': np.percentile(waited, 95) * 1000,
+                'off_cpu_max_ms': waited.max() * 1000
+            })
+        return {'statements': rows, 'locked_errors': self.locked_errors}
+
+def _statement_kind(sql):
+    keyword = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+    return 'read' if keyword in ('SELECT', 'WITH', 'PRAGMA', 'EXPLAIN') else 'write'
+
+class ResourceMonitor:
+    """Samples this process's CPU use and resident memory in a background thread"""
+
+    def __init__(self, interval=RESOURCE_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='load-test-resources', daemon=True)
+        self._process = psutil.Process() if psutil is not None else None
+
+    def _cpu_seconds(self):
+        if self._process is not None:
+            times = self._process.cpu_times()
+        else:
+            times = os.times()
+        return times.user + times.system
+
+    def _rss(self):
+        if self._process is not None:
+            return self._process.memory_info().rss
+        try:
+            with open('/proc/self/statm') as handle:
+                return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            return None
+
+    def _run(self):
+        last_wall, last_cpu = time.perf_counter(), self._cpu_seconds()
+        while not self._stop.wait(self.interval):
+            wall, cpu = time.perf_counter(), self._cpu_seconds()
+            self.samples.append(((cpu - last_cpu) / (wall - last_wall) * 100, self._rss()))
+            last_wall, last_cpu = wall, cpu
+
+    def start(self):
+        self.start_rss = self._rss()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def report(self):
+        cpu = [sample[0] for sample in self.samples]
+        rss = [sample[1] for sample in self.samples if sample[1] is not None]
+        return {
+            'cpu_mean_percent': float(np.mean(cpu)) if cpu else None,
+            'cpu_peak_percent': float(np.max(cpu)) if cpu else None,
+            'cores': os.cpu_count(),
+            'rss_start_mb': self.start_rss / 1e6 if self.start_rss else None,
+            'rss_peak_mb': max(rss) / 1e6 if rss else None,
+            'source': 'psutil' if psutil is not None else 'os.times and /proc'
+        }
+
+@contextmanager
+def shared_app_test_runtime():
+    """
+    Let AppTest sessions run concurrently. Each AppTest run installs a mock
+    Runtime and clears it when it finishes, which would pull the runtime out
+    from under users still running; here clearing is ignored until the load
+    test ends, and the config patch each run applies is undone once.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test
+
+    class KeepInstance(type):
+        @property
+        def _instance(cls):
+            return Runtime._instance
+
+        @_instance.setter
+        def _instance(cls, value):
+            if value is not None:
+                Runtime._instance = value
+
+    class SharedRuntime(Runtime, metaclass=KeepInstance):
+        pass
+
+    get_option = config.get_option
+    app_test.Runtime = SharedRuntime
+    try:
+        yield
+    finally:
+        app_test.Runtime = Runtime
+        Runtime._instance = None
+        config.get_option = get_option
+
+class VirtualUser:
+    def __init__(self, index, username, script, iterations, think, timeout, record):
+        self.index = index
+        self.username = username
+        self.script = script
+        self.iterations = iterations
+        self.think = think
+        self.timeout = timeout
+        self.record = record
+        self.random = random.Random(index)
+
+    def step(self, name, app, prepare=None):
+        """Apply a widget change and rerun the script, recording its latency and errors"""
+        if prepare is not None and prepare(app) is False:
+            self.record(self.index, name, None, 'skipped: widget not on the page')
+            return
+        start = time.perf_counter()
+        app.run(timeout=self.timeout)
+        elapsed = time.perf_counter() - start
+        errors = [str(exception.value) for exception in app.exception]
+        self.record(self.index, name, elapsed, errors[0] if errors else None)
+        if self.think:
+            time.sleep(self.think * self.random.uniform(0.5, 1.5))
+
+    def login(self, app):
+        app.text_input[0].set_value(self.username)
+        app.text_input[1].set_value(PASSWORD)
+        app.button[0].click()
+
+    def select_equipment(self, app):
+        boxes = [box for box in app.selectbox if box.label == 'Select Equipment']
+        if not boxes or not boxes[0].options:
+            return False
+        box = boxes[0]
+        box.set_value(box.options[(box.options.index(box.value) + 1) % len(box.options)])
+
+    def run(self):
+        from streamlit.testing.v1 import AppTest
+
+        app = AppTest.from_file(self.script, default_timeout=self.timeout)
+        try:
+            self.step('open', app)
+            self.step('login', app, self.login)
+            for _ in range(self.iterations):
+                for view in VIEWS:
+                    self.step(f'view: {view}', app, lambda app, view=view: app.radio(key='current_view').set_value(view))
+                    if view == 'IoT Monitoring':
+                        self.step('select equipment', app, self.select_equipment)
+        except Exception as error:
+            # A timed-out or broken session ends this user; the others carry on
+            self.record(self.index, 'aborted', None, f'{type(error).__name__}: {error}')
+
+def create_accounts(users):
+    from models import create_user
+
+    names = []
+    for index in range(users):
+        name = f'loadtest_{index}'
+        create_user(name, PASSWORD, 'analyst', INDUSTRIES[index % len(INDUSTRIES)])
+        names.append(name)
+    return names
+
+def run_users(names, script, iterations, think, ramp, timeout):
+    """Run one thread per user, started evenly over ramp seconds; returns (results, seconds)"""
+    results = []
+    results_lock = threading.Lock()
+
+    def record(user, step, seconds, error):
+        with results_lock:
+            results.append({'user': user, 'step': step, 'seconds': seconds, 'error': error})
+
+    threads = []
+    start = time.perf_counter()
+    for index, name in enumerate(names):
+        user = VirtualUser(index, name, script, iterations, think, timeout, record)
+        thread = threading.Thread(target=user.run, name=f'load-test-user-{index}')
+        threads.append(thread)
+        thread.start()
+        if ramp and index < len(names) - 1:
+            time.sleep(ramp / (len(names) - 1))
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+def step_report(results):
+    steps = {}
+    for row in results:
+        steps.setdefault(row['step'], []).append(row)
+    report = []
+    for name, rows in steps.items():
+        seconds = np.array([row['seconds'] for row in rows if row['seconds'] is not None])
+        errors = [row['error'] for row in rows if row['error']]
+        entry = {'step': name, 'count': len(rows), 'errors': len(errors), 'first_error': errors[0] if errors else None}
+        if len(seconds):
+            entry.update({f'p{p}_ms': float(np.percentile(seconds, p) * 1000) for p in PERCENTILES})
+            entry['max_ms'] = float(seconds.max() * 1000)
+        report.append(entry)
+    return report
+
+def print_report(args, steps, elapsed, completed, resources, database, query_cache):
+    print(f"{args.users} users x {args.iterations} iterations in {elapsed:.1f}s "
+          f"({completed / elapsed:.2f} steps/s)")
+    header = ''.join(f"{f'p{p} ms':>9}" for p in PERCENTILES)
+    print(f"\n{'step':<26} {'count':>6} {'errors':>6}{header}{'max ms':>9}")
+    for row in steps:
+        values = ''.join(f"{row.get(f'p{p}_ms', float('nan')):>9.0f}" for p in PERCENTILES)
+        print(f"{row['step']:<26} {row['count']:>6} {row['errors']:>6}{values}{row.get('max_ms', float('nan')):>9.0f}")
+    for row in steps:
+        if row['first_error']:
+            print(f"  {row['step']}: {row['first_error'][:120]}")
+
+    print(f"\nCPU mean {resources['cpu_mean_percent'] or 0:.0f}% / peak {resources['cpu_peak_percent'] or 0:.0f}% "
+          f"of one core ({resources['cores']} cores) · RSS {resources['rss_start_mb'] or 0:.0f} MB -> "
+          f"peak {resources['rss_peak_mb'] or 0:.0f} MB ({resources['source']})")
+
+    print(f"\n{'sqlite':<8} {'calls':>8} {'total ms':>10} {'off-CPU ms':>11} {'p95/call ms':>12} {'max/call ms':>12}")
+    for row in database['statements']:
+        print(f"{row['kind']:<8} {row['calls']:>8,} {row['total_ms']:>10.0f} {row['off_cpu_ms']:>11.0f} "
+              f"{row['off_cpu_p95_ms']:>12.2f} {row['off_cpu_max_ms']:>12.1f}")
+    print(f"'database is locked' errors: {database['locked_errors']}")
+
+    if query_cache['functions']:
+        print(f"\n{'query cache':<26} {'hits':>8} {'misses':>8} {'hit rate':>9}")
+        for name, row in query_cache['functions'].items():
+            print(f"{name:<26} {row['hits']:>8} {row['misses']:>8} {row['hit_rate']:>9.1%}")
+        print(f"{query_cache['entries']} entries, {query_cache['bytes'] / 1024 / 1024:.1f} MB, "
+              f"{query_cache['evictions']} evictions")
+
+def main():
+    parser = argparse.ArgumentParser(description='Guardian-IO concurrent user load test')
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=2, help='passes over the views per user')
+    parser.add_argument('--ramp', type=float, default=0.0, help='seconds over which users are started')
+    parser.add_argument('--think', type=float, default=0.0, help='mean pause between steps in seconds')
+    parser.add_argument('--timeout', type=float, default=120.0, help='seconds allowed for one script run')
+    parser.add_argument('--no-warmup', action='store_true',
+                        help='skip the single-user pass that fills caches before measuring')
+    parser.add_argument('--workdir', help='directory holding the databases (default: a fresh temporary one)')
+    parser.add_argument('--json', help='write the report as JSON')
+    parser.add_argument('--max-p95-ms', type=float,
+                        help='exit with status 1 if any step has errors or a p95 above this')
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.join(root, 'main.py')
+    sys.path.insert(0, root)
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix='guardian_load_'))
+    from job_queue import init_job_tables
+    from models import init_db, init_tenant_databases
+    from query_cache import clear_query_cache, query_cache_stats
+    from results_store import init_results_tables
+    init_db()
+    init_tenant_databases()
+    init_job_tables()
+    init_results_tables()
+    names = create_accounts(args.users)
+
+    # Installed first so pooled connections opened during the warmup are timed too
+    database = SqliteMonitor()
+    database.install()
+    resources = ResourceMonitor()
+    try:
+        with shared_app_test_runtime():
+            if not args.no_warmup:
+                run_users(names[:1], script, 1, 0, 0, args.timeout)
+                database.reset()
+                clear_query_cache()
+            resources.start()
+            try:
+                results, elapsed = run_users(names, script, args.iterations, args.think, args.ramp, args.timeout)
+            finally:
+                resources.stop()
+    finally:
+        database.uninstall()
+
+    steps = step_report(results)
+    completed = sum(1 for row in results if row['seconds'] is not None)
+    report = {
+        'users': args.users, 'iterations': args.iterations, 'ramp': args.ramp, 'think': args.think,
+        'seconds': elapsed, 'steps_per_second': completed / elapsed, 'steps': steps,
+        'resources': resources.report(), 'sqlite': database.report(), 'query_cache': query_cache_stats()
+    }
+    print_report(args, steps, elapsed, completed, report['resources'], report['sqlite'], report['query_cache'])
+    if json_path:
+        with open(json_path, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.max_p95_ms is not None:
+        failed = [
+            row['step'] for row in steps
+            if row['errors'] or row.get('p95_ms', 0) > args.max_p95_ms
+        ]
+        if failed:
+            print(f"\nFAILED: {', '.join(failed)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -4,12 +4,15 @@ from supply_chain_layout import render_supply_chain_dashboard
 from iot_layout import render_iot_dashboard
 from utils import initialize_session_state, render_sidebar
 from auth_pages import init_session_state, render_login_page, render_signup_page, render_logout_button, check_authentication
-from models import init_db, init_supply_chain_tables, init_iot_tables
+from models import init_db, init_tenant_databases
+from job_queue import init_job_tables
+from results_store import init_results_tables
 
 # Initialize database
 init_db()
-init_supply_chain_tables()
-init_iot_tables()
+init_tenant_databases()
+init_job_tables()
+init_results_tables()
 
 # Page configuration
 st.set_page_config(
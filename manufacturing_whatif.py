@@ -0,0 +1,140 @@
+"""What-if sensitivity of manufacturing KPIs to operating changes.
+
+The baseline is the mean of the predict_metric forecasts over the next
+horizon_days. Three levers change it, each as a percentage:
+
+- efficiency_change scales machine efficiency (capped at 100%), and output
+  with it at the same energy use;
+- energy_price_change scales the price paid per kWh;
+- incident_rate_change scales maintenance incidents, each of which costs a
+  share of a day's output and energy and lowers the quality rate.
+
+evaluate_whatif broadcasts the lever grids against each other, so every
+combination is computed in one pass of array operations, and keeps recent
+results keyed by baseline and grid.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from data_generator import predict_metric
+
+WHATIF_LEVERS = {
+    'efficiency_change': 'Machine Efficiency Change (%)',
+    'energy_price_change': 'Energy Price Change (%)',
+    'incident_rate_change': 'Incident Rate Change (%)'
+}
+WHATIF_METRICS = {
+    'production_output': 'Production Output (units/day)',
+    'good_units': 'Good Units (units/day)',
+    'quality_rate': 'Quality Rate (%)',
+    'energy_consumption': 'Energy Consumption (kWh/day)',
+    'energy_cost': 'Energy Cost ($/day)',
+    'energy_cost_per_good_unit': 'Energy Cost per Good Unit ($)'
+}
+# Metrics where a decrease is the improvement
+LOWER_IS_BETTER = {'energy_consumption', 'energy_cost', 'energy_cost_per_good_unit'}
+FORECAST_METRICS = ['production_output', 'machine_efficiency', 'quality_rate', 'energy_consumption',
+                    'maintenance_incidents']
+ENERGY_PRICE = 0.12
+# Share of a day's output and energy lost per maintenance incident
+INCIDENT_DOWNTIME = 0.015
+# Quality rate points lost per maintenance incident
+INCIDENT_QUALITY_LOSS = 0.25
+MAX_CACHED_GRIDS = 32
+
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+def whatif_baseline(data, horizon_days=30, energy_price=ENERGY_PRICE):
+    """Daily KPI levels the levers act on: forecast means over the horizon plus model constants"""
+    baseline = {
+        metric: float(predict_metric(data, metric, horizon_days)[f'predicted_{metric}'].mean())
+        for metric in FORECAST_METRICS
+    }
+    baseline['machine_efficiency'] = min(baseline['machine_efficiency'], 100.0)
+    baseline['maintenance_incidents'] = max(baseline['maintenance_incidents'], 0.0)
+    baseline.update(
+        energy_price=energy_price,
+        incident_downtime=INCIDENT_DOWNTIME,
+        incident_quality_loss=INCIDENT_QUALITY_LOSS
+    )
+    return baseline
+
+def _grid(values):
+    return np.atleast_1d(np.asarray(values, dtype=np.float64)) / 100
+
+def _evaluate(baseline, efficiency_change, energy_price_change, incident_rate_change):
+    # Lever axes (efficiency, energy price, incidents) broadcast to one cell per combination
+    efficiency_change = efficiency_change[:, None, None]
+    energy_price_change = energy_price_change[None, :, None]
+    incident_rate_change = incident_rate_change[None, None, :]
+    shape = (efficiency_change.size, energy_price_change.size, incident_rate_change.size)
+
+    efficiency = np.minimum(baseline['machine_efficiency'] * (1 + efficiency_change), 100)
+    extra_incidents = baseline['maintenance_incidents'] * incident_rate_change
+    uptime = np.maximum(1 - baseline['incident_downtime'] * extra_incidents, 0)
+
+    production = baseline['production_output'] * (efficiency / baseline['machine_efficiency']) * uptime
+    quality = np.clip(baseline['quality_rate'] - baseline['incident_quality_loss'] * extra_incidents, 0, 100)
+    good_units = production * quality / 100
+    energy = baseline['energy_consumption'] * uptime
+    energy_cost = energy * (baseline['energy_price'] * (1 + energy_price_change))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cost_per_unit = np.where(good_units > 0, energy_cost / good_units, np.nan)
+
+    results = {
+        'production_output': production,
+        'good_units': good_units,
+        'quality_rate': quality,
+        'energy_consumption': energy,
+        'energy_cost': energy_cost,
+        'energy_cost_per_good_unit': cost_per_unit
+    }
+    for metric, values in results.items():
+        values = np.broadcast_to(values, shape).copy()
+        values.flags.writeable = False
+        results[metric] = values
+    return results
+
+def evaluate_whatif(baseline, efficiency_change=0, energy_price_change=0, incident_rate_change=0):
+    """
+    Every metric in WHATIF_METRICS for all combinations of the lever values
+    (percent changes), as read-only arrays shaped
+    (efficiency, energy price, incidents)
+    """
+    grids = tuple(_grid(values) for values in (efficiency_change, energy_price_change, incident_rate_change))
+    key = (tuple(sorted(baseline.items())),) + tuple(grid.tobytes() for grid in grids)
+    with _results_lock:
+        cached = _results.get(key)
+        if cached is not None:
+            _results.move_to_end(key)
+            return cached
+
+    results = _evaluate(baseline, *grids)
+    with _results_lock:
+        _results[key] = results
+        while len(_results) > MAX_CACHED_GRIDS:
+            _results.popitem(last=False)
+    return results
+
+def sensitivity_surface(baseline, metric, x_lever, x_values, y_lever, y_values, fixed=None):
+    """
+    Percent change of a metric against the baseline over an (y, x) grid of two
+    levers, with the third lever held at its value in fixed (default 0)
+    """
+    if x_lever == y_lever:
+        raise ValueError("The two axes need different levers")
+    levers = {lever: (fixed or {}).get(lever, 0) for lever in WHATIF_LEVERS}
+    levers[x_lever], levers[y_lever] = x_values, y_values
+    values = evaluate_whatif(baseline, **levers)[metric]
+
+    axes = list(WHATIF_LEVERS)
+    surface = values.reshape([np.size(levers[lever]) for lever in axes])
+    # Drop the fixed axis and put y on rows, x on columns
+    surface = np.moveaxis(surface, [axes.index(y_lever), axes.index(x_lever)], [0, 1]).reshape(
+        np.size(y_values), np.size(x_values)
+    )
+    base = evaluate_whatif(baseline)[metric].item()
+    return (surface / base - 1) * 100
@@ -1,14 +1,90 @@
+import re
 import sqlite3
-from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from datetime import datetime, timedelta
 import hashlib
 import secrets
 import streamlit as st
 import numpy as np
 from sklearn.ensemble import IsolationForest
+from event_log import event_log_enabled, append_event
+from query_cache import cached_query, invalidates
+from shards import (
+    sharding_enabled, utc_now, shard_key, ensure_shard, shards_between, query_shards, merge_shards,
+    list_shards
+)
+from tenancy import (
+    TENANTS, CURRENT_TENANT, get_connection, current_tenant, resolve_tenant, tenant_shard_dir
+)
+
+# Full-text indexed columns of the searchable tables
+SEARCH_INDEXES = {
+    'supply_chain_events': ['event_type', 'severity', 'supplier_id', 'description'],
+    'maintenance_alerts': ['equipment_id', 'alert_type', 'severity', 'description']
+}
+SEARCH_TOKEN = re.compile(r'\w+')
+# bm25 ranking reads every match; larger result sets are listed newest first
+SEARCH_RANK_LIMIT = 20000
+# Facets are counted over at most this many of the newest matches
+SEARCH_FACET_LIMIT = 20000
+
+def create_search_index(c, table):
+    """
+    FTS5 index over a table's text columns, kept in sync by triggers so every
+    insert, edit and delete (including retention) reaches it. The index
+    stores only tokens; column values are read from the table itself.
+    """
+    columns = SEARCH_INDEXES[table]
+    fts = f'{table}_fts'
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,))
+    exists = c.fetchone() is not None
+
+    c.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {', '.join(columns)}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+        )
+    ''')
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {names}) VALUES (new.id, {new_values});
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts} (rowid, {names}) VALUES (new.id, {new_values});
+        END
+    ''')
+    if not exists:
+        # Index rows written before the index existed
+        c.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+def search_query(text):
+    """
+    FTS5 query matching every word of free text, the last one as a prefix so
+    results follow typing. Words are quoted, so FTS syntax in the input has no effect.
+    """
+    tokens = [f'"{token}"' for token in SEARCH_TOKEN.findall(text.lower())]
+    if not tokens:
+        return ''
+    tokens[-1] += '*'
+    return ' '.join(tokens)
 
 def init_db():
     conn = sqlite3.connect('guardian_io.db')
     c = conn.cursor()
+
+    # Let retention reclaim space incrementally (only takes effect on a new database file)
+    c.execute('PRAGMA auto_vacuum = INCREMENTAL')
     
     # Create users table
     c.execute('''
@@ -67,10 +143,46 @@ def get_user_role(username):
     return role[0] if role else None
 
 
-def init_supply_chain_tables():
-    conn = sqlite3.connect('guardian_io.db')
+
+def init_tenant_databases():
+    """Create the operational tables in the shared database and every tenant database"""
+    for tenant in [None] + TENANTS:
+        init_supply_chain_tables(tenant)
+        init_iot_tables(tenant)
+        init_kpi_tables(tenant)
+
+def init_kpi_tables(tenant=CURRENT_TENANT):
+    conn = get_connection(tenant)
     c = conn.cursor()
 
+    # Long-format KPI history; the primary key serves metric + time range queries
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS kpi_hourly (
+            metric TEXT NOT NULL,
+            hour TIMESTAMP NOT NULL,
+            value FLOAT,
+            PRIMARY KEY (metric, hour)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS kpi_daily (
+            metric TEXT NOT NULL,
+            day DATE NOT NULL,
+            value FLOAT,
+            PRIMARY KEY (metric, day)
+        ) WITHOUT ROWID
+    ''')
+
+    conn.commit()
+    conn.close()
+
+def init_supply_chain_tables(tenant=CURRENT_TENANT):
+    conn = get_connection(tenant)
+    c = conn.cursor()
+
+    # Only takes effect when this call creates the tenant's database file
+    c.execute('PRAGMA auto_vacuum = INCREMENTAL')
+
     # Create suppliers table
     c.execute('''
         CREATE TABLE IF NOT EXISTS suppliers (
@@ -95,12 +207,15 @@ def init_supply_chain_tables():
             FOREIGN KEY (supplier_id) REFERENCES suppliers (id)
         )
     ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_supply_chain_events_timestamp ON supply_chain_events (timestamp)')
+    create_search_index(c, 'supply_chain_events')
 
     conn.commit()
     conn.close()
 
+@invalidates('suppliers')
 def add_supplier(name, location, risk_score, performance_score):
-    conn = sqlite3.connect('guardian_io.db')
+    conn = get_connection()
     c = conn.cursor()
 
     try:
@@ -115,8 +230,9 @@ def add_supplier(name, location, risk_score, performance_score):
     finally:
         conn.close()
 
+@cached_query('suppliers')
 def get_suppliers():
-    conn = sqlite3.connect('guardian_io.db')
+    conn = get_connection()
     c = conn.cursor()
 
     c.execute('SELECT * FROM suppliers')
@@ -125,8 +241,11 @@ def get_suppliers():
 
     return suppliers
 
+@invalidates('supply_chain_events')
 def add_supply_chain_event(supplier_id, event_type, severity, description):
-    conn = sqlite3.connect('guardian_io.db')
+    if event_log_enabled():
+        return append_event('supply_chain_event', (supplier_id, event_type, severity, description))
+    conn = get_connection()
     c = conn.cursor()
 
     try:
@@ -141,8 +260,9 @@ def add_supply_chain_event(supplier_id, event_type, severity, description):
     finally:
         conn.close()
 
+@cached_query('supply_chain_events', 'suppliers')
 def get_supply_chain_events(days=30):
-    conn = sqlite3.connect('guardian_io.db')
+    conn = get_connection()
     c = conn.cursor()
 
     c.execute('''
@@ -159,23 +279,124 @@ def get_supply_chain_events(days=30):
     return events
 
 
-def init_iot_tables():
-    conn = sqlite3.connect('guardian_io.db')
+def _search(table, text, filters, facets, columns, joins='', limit=20, offset=0):
+    """
+    Rows of table matching text and filters ({column: value}, equal to the
+    table's column), best bm25 rank first or newest first past
+    SEARCH_RANK_LIMIT matches. facets are {name: [expressions]}; each gets
+    (values..., count) rows for its top 20 values, counted over the newest
+    SEARCH_FACET_LIMIT matches.
+    """
+    fts = f'{table}_fts'
+    query = search_query(text)
+    result = {'rows': [], 'total': 0, 'ranked': True, 'facets_complete': True,
+              'facets': {name: [] for name in facets}}
+    if not query:
+        return result
+
+    filters = {column: value for column, value in filters.items() if value is not None}
+    where = ''.join(f' AND t.{column} = ?' for column in filters)
+    params = (query,) + tuple(filters.values())
+
+    conn = get_connection()
     c = conn.cursor()
 
-    # Create IoT sensors table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS iot_sensors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sensor_id TEXT UNIQUE NOT NULL,
-            equipment_id TEXT NOT NULL,
-            sensor_type TEXT NOT NULL,
-            location TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    try:
+        if filters:
+            c.execute(f'''
+                SELECT COUNT(*) FROM {fts} f JOIN {table} t ON t.id = f.rowid
+                WHERE f.{fts} MATCH ?{where}
+            ''', params)
+        else:
+            # Counted in the index alone, without reading the matched rows
+            c.execute(f'SELECT COUNT(*) FROM {fts} WHERE {fts} MATCH ?', (query,))
+        result['total'] = total = c.fetchone()[0]
+        result['ranked'] = total <= SEARCH_RANK_LIMIT
+        result['facets_complete'] = total <= SEARCH_FACET_LIMIT
 
-    # Create sensor readings table
+        c.execute(f'''
+            SELECT {columns}
+            FROM {fts} f
+            JOIN {table} t ON t.id = f.rowid
+            {joins}
+            WHERE f.{fts} MATCH ?{where}
+            ORDER BY {'f.rank' if result['ranked'] else 'f.rowid DESC'}
+            LIMIT ? OFFSET ?
+        ''', params + (limit, offset))
+        result['rows'] = c.fetchall()
+
+        # One grouped pass for all facets, split up below
+        expressions = [expression for group in facets.values() for expression in group]
+        c.execute(f'''
+            SELECT {', '.join(expressions)}, COUNT(*)
+            FROM (
+                SELECT f.rowid FROM {fts} f JOIN {table} t ON t.id = f.rowid
+                WHERE f.{fts} MATCH ?{where}
+                ORDER BY f.rowid DESC LIMIT ?
+            ) m
+            JOIN {table} t ON t.id = m.rowid
+            {joins}
+            GROUP BY {', '.join(str(i + 1) for i in range(len(expressions)))}
+        ''', params + (SEARCH_FACET_LIMIT,))
+        groups = c.fetchall()
+    except sqlite3.Error:
+        return result
+    finally:
+        conn.close()
+
+    position = 0
+    for name, group in facets.items():
+        counts = {}
+        for row in groups:
+            key = row[position:position + len(group)]
+            # Rows without the field (alert storms have no equipment) are no facet value
+            if key[0] is None:
+                continue
+            counts[key] = counts.get(key, 0) + row[-1]
+        position += len(group)
+        result['facets'][name] = sorted(
+            (key + (count,) for key, count in counts.items()), key=lambda row: (-row[-1], str(row[0]))
+        )[:20]
+    return result
+
+def search_supply_chain_events(text, severity=None, event_type=None, supplier_id=None, limit=20, offset=0):
+    """
+    Full-text search over supply chain events. Returns {'rows', 'total', 'ranked',
+    'facets', 'facets_complete'}; rows are (id, timestamp, supplier_id,
+    supplier_name, event_type, severity, description) and facets count matches
+    by severity, event type and supplier, as (value, count) rows or
+    (supplier_id, name, count) for suppliers.
+    """
+    return _search(
+        'supply_chain_events', text,
+        {'severity': severity, 'event_type': event_type, 'supplier_id': supplier_id},
+        {
+            'severity': ['t.severity'],
+            'event_type': ['t.event_type'],
+            'supplier': ['t.supplier_id', "COALESCE(s.name, 'Unknown')"]
+        },
+        't.id, t.timestamp, t.supplier_id, s.name, t.event_type, t.severity, t.description',
+        joins='LEFT JOIN suppliers s ON s.id = t.supplier_id',
+        limit=limit, offset=offset
+    )
+
+def search_maintenance_alerts(text, severity=None, alert_type=None, equipment_id=None, limit=20, offset=0):
+    """
+    Full-text search over maintenance alerts. Returns {'rows', 'total', 'ranked',
+    'facets', 'facets_complete'}; rows are (id, created_at, equipment_id,
+    alert_type, severity, description, status), status being Open, Resolved or
+    Expired, and facets count matches by severity, alert type and equipment.
+    """
+    return _search(
+        'maintenance_alerts', text,
+        {'severity': severity, 'alert_type': alert_type, 'equipment_id': equipment_id},
+        {'severity': ['t.severity'], 'alert_type': ['t.alert_type'], 'equipment': ['t.equipment_id']},
+        't.id, t.created_at, t.equipment_id, t.alert_type, t.severity, t.description, '
+        "CASE WHEN t.is_resolved THEN 'Resolved' WHEN t.expired_at IS NOT NULL THEN 'Expired' ELSE 'Open' END",
+        limit=limit, offset=offset
+    )
+
+def create_sensor_readings_table(c):
     c.execute('''
         CREATE TABLE IF NOT EXISTS sensor_readings (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -188,12 +409,75 @@ def init_iot_tables():
             FOREIGN KEY (sensor_id) REFERENCES iot_sensors (sensor_id)
         )
     ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_sensor_readings_timestamp ON sensor_readings (timestamp, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_sensor_readings_sensor ON sensor_readings (sensor_id, timestamp)')
+
+def add_missing_columns(c, table, columns):
+    """Add columns introduced after a table was first created; returns the names added"""
+    c.execute(f'PRAGMA table_info({table})')
+    existing = {row[1] for row in c.fetchall()}
+    added = []
+    for name, definition in columns.items():
+        if name not in existing:
+            c.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+            added.append(name)
+    return added
 
-    # Create maintenance_alerts table
+def drop_not_null(c, table, column):
+    """
+    Let a column created NOT NULL hold NULLs. SQLite cannot alter a column, so
+    the table is rebuilt from its own schema with row ids kept, which leaves
+    external-content search indexes valid; callers recreate indexes and triggers.
+    """
+    c.execute(f'PRAGMA table_info({table})')
+    if not any(row[1] == column and row[3] for row in c.fetchall()):
+        return
+    c.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    schema = re.sub(rf'\b({column}\s+\w+)\s+NOT NULL', r'\1', c.fetchone()[0], count=1)
+    c.execute(schema.replace(table, f'{table}_rebuild', 1))
+    c.execute(f'INSERT INTO {table}_rebuild SELECT * FROM {table}')
+    c.execute(f'DROP TABLE {table}')
+    c.execute(f'ALTER TABLE {table}_rebuild RENAME TO {table}')
+
+def init_sensor_readings_shard(path):
+    """Create the sensor_readings schema inside a time-partitioned shard file"""
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+
+    # WAL lets dashboard reads proceed while the current shard is being written
+    c.execute('PRAGMA journal_mode = WAL')
+    create_sensor_readings_table(c)
+
+    conn.commit()
+    conn.close()
+
+def init_iot_tables(tenant=CURRENT_TENANT):
+    conn = get_connection(tenant)
+    c = conn.cursor()
+
+    # Only takes effect when this call creates the tenant's database file
+    c.execute('PRAGMA auto_vacuum = INCREMENTAL')
+
+    # Create IoT sensors table
     c.execute('''
-        CREATE TABLE IF NOT EXISTS maintenance_alerts (
+        CREATE TABLE IF NOT EXISTS iot_sensors (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sensor_id TEXT UNIQUE NOT NULL,
             equipment_id TEXT NOT NULL,
+            sensor_type TEXT NOT NULL,
+            location TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create sensor readings table
+    create_sensor_readings_table(c)
+
+    # Create maintenance_alerts table; alert storms have a location but no equipment
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            equipment_id TEXT,
             alert_type TEXT NOT NULL,
             severity TEXT NOT NULL,
             description TEXT,
@@ -201,12 +485,55 @@ def init_iot_tables():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    drop_not_null(c, 'maintenance_alerts', 'equipment_id')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_maintenance_alerts_created ON maintenance_alerts (created_at)')
+    added = add_missing_columns(c, 'maintenance_alerts', {
+        'fingerprint': 'TEXT',
+        'occurrences': 'INTEGER DEFAULT 1',
+        'last_seen': 'TIMESTAMP',
+        'group_id': 'INTEGER',
+        'resolved_at': 'TIMESTAMP',
+        'expired_at': 'TIMESTAMP',
+        'location': 'TEXT'
+    })
+    if 'location' in added:
+        # Alert storms used to store their location as the equipment
+        c.execute('''
+            UPDATE maintenance_alerts SET location = equipment_id, equipment_id = NULL
+            WHERE alert_type = 'Alert Storm'
+        ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_maintenance_alerts_open ON maintenance_alerts (is_resolved, fingerprint)')
+    # Serves the latest-maintenance lookups of RUL and its cache probe
+    c.execute('CREATE INDEX IF NOT EXISTS idx_maintenance_alerts_resolved ON maintenance_alerts (resolved_at)')
+    # With the id and resolved_at lookups, serve get_alert_version without a table scan
+    c.execute('CREATE INDEX IF NOT EXISTS idx_maintenance_alerts_last_seen ON maintenance_alerts (last_seen)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_maintenance_alerts_expired ON maintenance_alerts (expired_at)')
+    create_search_index(c, 'maintenance_alerts')
+
+    # Create hourly rollup of sensor readings, kept longer than the raw readings
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sensor_readings_hourly (
+            sensor_id TEXT NOT NULL,
+            hour TIMESTAMP NOT NULL,
+            reading_count INTEGER NOT NULL,
+            temperature_sum FLOAT, temperature_min FLOAT, temperature_max FLOAT,
+            vibration_sum FLOAT, vibration_min FLOAT, vibration_max FLOAT,
+            pressure_sum FLOAT, pressure_min FLOAT, pressure_max FLOAT,
+            power_consumption_sum FLOAT, power_consumption_min FLOAT, power_consumption_max FLOAT,
+            PRIMARY KEY (sensor_id, hour)
+        )
+    ''')
 
     conn.commit()
     conn.close()
 
+    if sharding_enabled():
+        shard_dir = tenant_shard_dir(resolve_tenant(tenant))
+        ensure_shard(shard_key(utc_now()), init_sensor_readings_shard, shard_dir)
+
+@invalidates('iot_sensors')
 def register_sensor(sensor_id, equipment_id, sensor_type, location):
-    conn = sqlite3.connect('guardian_io.db')
+    conn = get_connection()
     c = conn.cursor()
 
     try:
@@ -221,8 +548,33 @@ def register_sensor(sensor_id, equipment_id, sensor_type, location):
     finally:
         conn.close()
 
+@invalidates('iot_sensors')
+def register_sensors(sensors):
+    """Register many (sensor_id, equipment_id, sensor_type, location) rows; existing sensor ids are skipped"""
+    conn = get_connection()
+    c = conn.cursor()
+
+    try:
+        before = conn.total_changes
+        c.executemany(
+            'INSERT OR IGNORE INTO iot_sensors (sensor_id, equipment_id, sensor_type, location) VALUES (?, ?, ?, ?)',
+            sensors
+        )
+        conn.commit()
+        return conn.total_changes - before
+    except sqlite3.Error:
+        return 0
+    finally:
+        conn.close()
+
 def add_sensor_reading(sensor_id, temperature, vibration, pressure, power_consumption):
-    conn = sqlite3.connect('guardian_io.db')
+    if event_log_enabled():
+        return append_event('sensor_reading', (sensor_id, temperature, vibration, pressure, power_consumption))
+    if sharding_enabled():
+        shard_dir = tenant_shard_dir(current_tenant())
+        conn = sqlite3.connect(ensure_shard(shard_key(utc_now()), init_sensor_readings_shard, shard_dir))
+    else:
+        conn = get_connection()
     c = conn.cursor()
 
     try:
@@ -238,20 +590,127 @@ def add_sensor_reading(sensor_id, temperature, vibration, pressure, power_consum
         conn.close()
 
 def get_sensor_readings(sensor_id, hours=24):
-    conn = sqlite3.connect('guardian_io.db')
-    c = conn.cursor()
-
-    c.execute('''
+    query = '''
         SELECT * FROM sensor_readings 
         WHERE sensor_id = ? AND timestamp >= datetime('now', ?) 
         ORDER BY timestamp DESC
-    ''', (sensor_id, f'-{hours} hours'))
+    '''
+    params = (sensor_id, f'-{hours} hours')
+
+    if sharding_enabled():
+        # Newest shard first keeps the concatenated rows in descending time order
+        shard_dir = tenant_shard_dir(current_tenant())
+        keys = shards_between(utc_now() - timedelta(hours=hours), directory=shard_dir)
+        return query_shards(reversed(keys), query, params, shard_dir)
+
+    conn = get_connection()
+    c = conn.cursor()
+
+    c.execute(query, params)
 
     readings = c.fetchall()
     conn.close()
 
     return readings
 
+def iter_fleet_readings(hours=1, chunk_sensors=500):
+    """
+    The last `hours` of every sensor's readings from one streamed query,
+    yielded as {sensor_id: rows} chunks of at most chunk_sensors sensors.
+    Rows match get_sensor_readings: all columns, newest first.
+    """
+    query = '''
+        SELECT * FROM sensor_readings
+        WHERE timestamp >= datetime('now', ?)
+        ORDER BY sensor_id, timestamp DESC
+    '''
+    params = (f'-{hours} hours',)
+
+    if sharding_enabled():
+        # Newest shard first keeps each sensor's merged rows in descending time order
+        shard_dir = tenant_shard_dir(current_tenant())
+        keys = shards_between(utc_now() - timedelta(hours=hours), directory=shard_dir)
+        rows = merge_shards(reversed(keys), query, params, itemgetter(1), shard_dir)
+        yield from _chunk_by_sensor(rows, chunk_sensors)
+        return
+
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute(query, params)
+        yield from _chunk_by_sensor(c, chunk_sensors)
+    finally:
+        conn.close()
+
+def _chunk_by_sensor(rows, chunk_sensors):
+    chunk = {}
+    for sensor_id, sensor_rows in groupby(rows, key=itemgetter(1)):
+        if len(chunk) == chunk_sensors:
+            yield chunk
+            chunk = {}
+        chunk[sensor_id] = list(sensor_rows)
+    if chunk:
+        yield chunk
+
+def get_sensor_readings_since(watermark=None, hours=1, limit=10000):
+    """
+    Fetch readings newer than a (timestamp, id) high-watermark, oldest first.
+    Without a watermark the last `hours` of readings are returned.
+    """
+    if sharding_enabled():
+        return _get_sharded_readings_since(watermark, hours, limit)
+
+    conn = get_connection()
+    c = conn.cursor()
+
+    query = '''
+        SELECT r.id, r.sensor_id, COALESCE(s.equipment_id, r.sensor_id),
+               r.temperature, r.vibration, r.pressure, r.power_consumption, r.timestamp
+        FROM sensor_readings r
+        LEFT JOIN iot_sensors s ON s.sensor_id = r.sensor_id
+    '''
+    if watermark is None:
+        c.execute(query + '''
+            WHERE r.timestamp >= datetime('now', ?)
+            ORDER BY r.timestamp, r.id LIMIT ?
+        ''', (f'-{hours} hours', limit))
+    else:
+        c.execute(query + '''
+            WHERE (r.timestamp, r.id) > (?, ?)
+            ORDER BY r.timestamp, r.id LIMIT ?
+        ''', (*watermark, limit))
+
+    readings = c.fetchall()
+    conn.close()
+
+    return readings
+
+def _get_sharded_readings_since(watermark, hours, limit):
+    query = '''
+        SELECT id, sensor_id, sensor_id, temperature, vibration, pressure, power_consumption, timestamp
+        FROM sensor_readings
+    '''
+    shard_dir = tenant_shard_dir(current_tenant())
+    if watermark is None:
+        keys = shards_between(utc_now() - timedelta(hours=hours), directory=shard_dir)
+        query += "WHERE timestamp >= datetime('now', ?) ORDER BY timestamp, id LIMIT ?"
+        params = (f'-{hours} hours', limit)
+    else:
+        keys = shards_between(datetime.strptime(watermark[0], '%Y-%m-%d %H:%M:%S'), directory=shard_dir)
+        query += 'WHERE (timestamp, id) > (?, ?) ORDER BY timestamp, id LIMIT ?'
+        params = (*watermark, limit)
+
+    # Shards partition by time, so oldest-first concatenation stays ordered
+    readings = query_shards(keys, query, params, shard_dir)[:limit]
+
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('SELECT sensor_id, equipment_id FROM iot_sensors')
+    equipment = dict(c.fetchall())
+    conn.close()
+
+    return [(r[0], r[1], equipment.get(r[1], r[1])) + r[3:] for r in readings]
+
 def detect_anomalies(sensor_readings, contamination=0.1):
     """
     Detect anomalies in sensor readings using Isolation Forest
@@ -269,8 +728,11 @@ def detect_anomalies(sensor_readings, contamination=0.1):
     # Return indices of anomalies
     return [i for i, pred in enumerate(yhat) if pred == -1]
 
+@invalidates('maintenance_alerts')
 def create_maintenance_alert(equipment_id, alert_type, severity, description):
-    conn = sqlite3.connect('guardian_io.db')
+    if event_log_enabled():
+        return append_event('maintenance_alert', (equipment_id, alert_type, severity, description))
+    conn = get_connection()
     c = conn.cursor()
 
     try:
@@ -285,17 +747,305 @@ def create_maintenance_alert(equipment_id, alert_type, severity, description):
     finally:
         conn.close()
 
+@invalidates('maintenance_alerts')
+def create_maintenance_alerts(alerts):
+    """Insert many alert dicts (equipment_id, alert_type, severity, description) in one transaction"""
+    if event_log_enabled():
+        for a in alerts:
+            append_event('maintenance_alert', (a['equipment_id'], a['alert_type'], a['severity'], a['description']))
+        return True
+    conn = get_connection()
+    c = conn.cursor()
+
+    try:
+        c.executemany(
+            'INSERT INTO maintenance_alerts (equipment_id, alert_type, severity, description) VALUES (?, ?, ?, ?)',
+            [(a['equipment_id'], a['alert_type'], a['severity'], a['description']) for a in alerts]
+        )
+        conn.commit()
+        return True
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+@cached_query('maintenance_alerts')
 def get_active_alerts():
-    conn = sqlite3.connect('guardian_io.db')
+    conn = get_connection()
     c = conn.cursor()
 
     c.execute('''
         SELECT * FROM maintenance_alerts 
-        WHERE is_resolved = FALSE 
+        WHERE is_resolved = FALSE AND expired_at IS NULL
         ORDER BY created_at DESC
     ''')
 
     alerts = c.fetchall()
     conn.close()
 
-    return alerts
\ No newline at end of file
+    return alerts
+
+@invalidates('maintenance_alerts')
+def resolve_equipment_alerts(equipment_id):
+    """
+    Resolve an equipment's open alerts after maintenance; its RUL degradation
+    history restarts at this time. Returns the number of alerts resolved, or
+    False on failure.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+
+    try:
+        c.execute('''
+            UPDATE maintenance_alerts
+            SET is_resolved = TRUE, resolved_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+            WHERE equipment_id = ? AND is_resolved = FALSE AND expired_at IS NULL
+        ''', (equipment_id,))
+        conn.commit()
+        return c.rowcount
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+def get_last_maintenance():
+    """Latest maintenance resolution time per equipment, used as the point where degradation restarts"""
+    conn = get_connection()
+    c = conn.cursor()
+
+    # Only resolve_equipment_alerts records resolved_at; expired alerts are not maintenance
+    c.execute('''
+        SELECT equipment_id, substr(MAX(resolved_at), 1, 19) FROM maintenance_alerts
+        WHERE resolved_at IS NOT NULL
+        GROUP BY equipment_id
+    ''')
+
+    maintenance = dict(c.fetchall())
+    conn.close()
+
+    return maintenance
+
+def get_sensor_data_version():
+    """
+    Cheap fingerprint of the readings and maintenance history; changes whenever
+    readings are added or deleted, an alert is raised or maintenance is recorded.
+    Every part is an index lookup, so the probe costs the same at any table size.
+    """
+    # Separate subqueries: SQLite only answers a lone MIN or MAX from the index
+    readings_query = 'SELECT (SELECT MIN(id) FROM sensor_readings), (SELECT MAX(id) FROM sensor_readings)'
+    if sharding_enabled():
+        shard_dir = tenant_shard_dir(current_tenant())
+        readings = tuple(query_shards(list_shards(shard_dir), readings_query, (), shard_dir))
+    else:
+        readings = None
+
+    conn = get_connection()
+    c = conn.cursor()
+
+    if readings is None:
+        c.execute(readings_query)
+        readings = c.fetchone()
+    c.execute('''
+        SELECT (SELECT MAX(id) FROM maintenance_alerts), (SELECT MAX(resolved_at) FROM maintenance_alerts)
+    ''')
+    alerts = c.fetchone()
+    conn.close()
+
+    return (resolve_tenant(), readings, alerts)
+
+@cached_query('iot_sensors')
+def get_sensors():
+    """Registered sensors as (sensor_id, equipment_id, location) rows"""
+    conn = get_connection()
+    c = conn.cursor()
+
+    c.execute('SELECT sensor_id, equipment_id, location FROM iot_sensors ORDER BY sensor_id')
+
+    sensors = c.fetchall()
+    conn.close()
+
+    return sensors
+
+def get_sensor_records():
+    """Registered sensors as (sensor_id, equipment_id, sensor_type, location) rows"""
+    conn = get_connection()
+    c = conn.cursor()
+
+    c.execute('SELECT sensor_id, equipment_id, sensor_type, location FROM iot_sensors ORDER BY sensor_id')
+
+    sensors = c.fetchall()
+    conn.close()
+
+    return sensors
+
+def get_sensor_version():
+    """Cheap fingerprint of iot_sensors; changes whenever a sensor is registered or removed"""
+    conn = get_connection()
+    c = conn.cursor()
+
+    c.execute('SELECT COUNT(*), MAX(id) FROM iot_sensors')
+    version = c.fetchone()
+    conn.close()
+
+    return (resolve_tenant(), version)
+
+def get_sensor_channel_stats(hours=1):
+    """
+    Per-sensor reading count and per-channel sums and sums of squares over the
+    last `hours`, as (sensor_id, count, temperature_sum, temperature_sumsq, ...) rows.
+    """
+    channels = ['temperature', 'vibration', 'pressure', 'power_consumption']
+    query = f'''
+        SELECT sensor_id, COUNT(*),
+               {', '.join(f'SUM({ch}), SUM({ch} * {ch})' for ch in channels)}
+        FROM sensor_readings
+        WHERE timestamp >= datetime('now', ?)
+        GROUP BY sensor_id
+    '''
+    params = (f'-{hours} hours',)
+
+    if sharding_enabled():
+        shard_dir = tenant_shard_dir(current_tenant())
+        keys = shards_between(utc_now() - timedelta(hours=hours), directory=shard_dir)
+        # A window can span shards; sums from each shard add up
+        totals = {}
+        for row in query_shards(keys, query, params, shard_dir):
+            previous = totals.get(row[0])
+            totals[row[0]] = row[1:] if previous is None else tuple(
+                (a or 0) + (b or 0) for a, b in zip(previous, row[1:])
+            )
+        return [(sensor_id,) + values for sensor_id, values in sorted(totals.items())]
+
+    conn = get_connection()
+    c = conn.cursor()
+
+    c.execute(query, params)
+    stats = c.fetchall()
+    conn.close()
+
+    return stats
+
+@cached_query('iot_sensors')
+def get_equipment_locations():
+    conn = get_connection()
+    c = conn.cursor()
+
+    c.execute('SELECT equipment_id, location FROM iot_sensors')
+
+    locations = dict(c.fetchall())
+    conn.close()
+
+    return locations
+
+def get_open_alert_index():
+    """Open alerts as (id, equipment_id, alert_type, fingerprint, group_id, created_at, last_seen) rows"""
+    conn = get_connection()
+    c = conn.cursor()
+
+    c.execute('''
+        SELECT id, equipment_id, alert_type, fingerprint, group_id, created_at,
+               COALESCE(last_seen, created_at)
+        FROM maintenance_alerts
+        WHERE is_resolved = FALSE AND expired_at IS NULL
+    ''')
+
+    alerts = c.fetchall()
+    conn.close()
+
+    return alerts
+
+@invalidates('maintenance_alerts')
+def apply_alert_changes(inserts, merges, expired_ids, expired_at):
+    """
+    Write one alert pipeline batch in a single transaction.
+
+    inserts are dicts with equipment_id, location, alert_type, severity, description,
+    fingerprint, group_id and seen_at, or group_of (the index of an earlier
+    insert whose row starts the group) instead of group_id; merges are (alert_id, occurrences, seen_at,
+    severity) tuples. expired_ids are open alerts that went quiet; they close
+    without being marked resolved. Returns the new row ids in insert order, or None on failure.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+
+    try:
+        c.executemany(
+            'UPDATE maintenance_alerts SET expired_at = ? WHERE id = ?',
+            [(expired_at, alert_id) for alert_id in expired_ids]
+        )
+        c.executemany('''
+            UPDATE maintenance_alerts
+            SET occurrences = COALESCE(occurrences, 1) + ?, last_seen = ?,
+                severity = CASE WHEN ? = 'High' THEN 'High' ELSE severity END
+            WHERE id = ?
+        ''', [(count, seen_at, severity, alert_id) for alert_id, count, seen_at, severity in merges])
+
+        new_ids = []
+        for alert in inserts:
+            c.execute('''
+                INSERT INTO maintenance_alerts
+                    (equipment_id, location, alert_type, severity, description, fingerprint,
+                     occurrences, group_id, created_at, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                alert['equipment_id'], alert.get('location'), alert['alert_type'], alert['severity'],
+                alert['description'],
+                alert['fingerprint'], alert.get('occurrences', 1), alert['group_id'],
+                alert['seen_at'], alert['seen_at']
+            ))
+            new_ids.append(c.lastrowid)
+            if 'group_of' in alert:
+                # Joins a group whose first alert was inserted earlier in this batch
+                c.execute('UPDATE maintenance_alerts SET group_id = ? WHERE id = ?',
+                          (new_ids[alert['group_of']], c.lastrowid))
+        conn.commit()
+        return new_ids
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+def get_alert_version():
+    """
+    Changes whenever an alert is inserted, merged, resolved or expired. Each
+    part is a separate MAX so SQLite answers it from one end of an index.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+
+    c.execute('''
+        SELECT (SELECT MAX(id) FROM maintenance_alerts),
+               (SELECT MAX(last_seen) FROM maintenance_alerts),
+               (SELECT MAX(resolved_at) FROM maintenance_alerts),
+               (SELECT MAX(expired_at) FROM maintenance_alerts)
+    ''')
+
+    version = c.fetchone()
+    conn.close()
+
+    return version
+
+@cached_query('maintenance_alerts')
+def get_alert_groups(limit=20):
+    """Open alerts collapsed into correlated groups, most recently active first"""
+    conn = get_connection()
+    c = conn.cursor()
+
+    c.execute('''
+        SELECT COALESCE(group_id, id) AS group_key,
+               MIN(created_at), MAX(COALESCE(last_seen, created_at)),
+               COUNT(*), SUM(COALESCE(occurrences, 1)),
+               GROUP_CONCAT(DISTINCT equipment_id),
+               MAX(CASE severity WHEN 'High' THEN 3 WHEN 'Medium' THEN 2 ELSE 1 END),
+               GROUP_CONCAT(DISTINCT alert_type)
+        FROM maintenance_alerts
+        WHERE is_resolved = FALSE AND expired_at IS NULL
+        GROUP BY group_key
+        ORDER BY MAX(COALESCE(last_seen, created_at)) DESC
+        LIMIT ?
+    ''', (limit,))
+
+    groups = c.fetchall()
+    conn.close()
+
+    return groups
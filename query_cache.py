@@ -0,0 +1,176 @@
+"""Process-level cache for models.py reads.
+
+@cached_query(*tables) keeps a read function's results per call arguments,
+tenant and role. An entry is served while the version counters of the
+tables it read are unchanged. @invalidates(*tables) bumps those counters for
+the current tenant when a write function succeeds, so only reads of the
+written tables go back to SQLite.
+
+Counters only see writes made by this process. Writes from scheduler.py,
+worker.py or the maintenance CLIs show up once an entry is older than
+QUERY_CACHE_TTL seconds. Entries are evicted least recently used first once
+their estimated size passes QUERY_CACHE_MB. GUARDIAN_IO_QUERY_CACHE=0 turns
+the cache off.
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from tenancy import resolve_tenant
+
+QUERY_CACHE_ENABLED = os.environ.get('GUARDIAN_IO_QUERY_CACHE', '1') != '0'
+QUERY_CACHE_TTL = float(os.environ.get('GUARDIAN_IO_QUERY_CACHE_TTL', '30'))
+QUERY_CACHE_MB = float(os.environ.get('GUARDIAN_IO_QUERY_CACHE_MB', '64'))
+# Items measured when estimating the size of a result
+SIZE_SAMPLE = 64
+
+_versions = {}
+_entries = OrderedDict()
+_bytes = 0
+_stats = {}
+_evictions = 0
+_lock = threading.Lock()
+
+def current_role():
+    if st.runtime.exists():
+        return st.session_state.get('role')
+    return None
+
+def bump_tables(tables, tenant=None):
+    """Mark tables of a tenant as written, invalidating cached reads of them"""
+    with _lock:
+        for table in tables:
+            _versions[(tenant, table)] = _versions.get((tenant, table), 0) + 1
+
+def table_versions(tables, tenant=None):
+    with _lock:
+        return tuple(_versions.get((tenant, table), 0) for table in tables)
+
+def estimate_bytes(value):
+    """Approximate memory held by a result, measuring a sample of large containers"""
+    if isinstance(value, dict):
+        items = list(value.items())
+    elif isinstance(value, (list, tuple)):
+        items = value
+    else:
+        return sys.getsizeof(value)
+    size = sys.getsizeof(value)
+    if not items:
+        return size
+    step = max(len(items) // SIZE_SAMPLE, 1)
+    sample = items[::step]
+    return size + len(items) * sum(estimate_bytes(item) for item in sample) // len(sample)
+
+def _copy(result):
+    # Callers get their own container; rows are tuples and stay shared
+    if isinstance(result, list):
+        return list(result)
+    if isinstance(result, dict):
+        return dict(result)
+    return result
+
+def _store(key, entry):
+    global _bytes, _evictions
+    limit = QUERY_CACHE_MB * 1024 * 1024
+    if entry['bytes'] > limit:
+        return
+    old = _entries.pop(key, None)
+    if old is not None:
+        _bytes -= old['bytes']
+    _entries[key] = entry
+    _bytes += entry['bytes']
+    while _bytes > limit:
+        _, evicted = _entries.popitem(last=False)
+        _bytes -= evicted['bytes']
+        _evictions += 1
+
+def _drop(key):
+    global _bytes
+    entry = _entries.pop(key, None)
+    if entry is not None:
+        _bytes -= entry['bytes']
+
+def cached_query(*tables):
+    """Cache a read of tables until one of them is written (or QUERY_CACHE_TTL passes)"""
+    def decorator(func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not QUERY_CACHE_ENABLED:
+                return func(*args, **kwargs)
+            tenant = resolve_tenant()
+            key = (name, args, tuple(sorted(kwargs.items())), tenant, current_role())
+            # Taken before the query, so a write racing with it invalidates the result
+            versions = table_versions(tables, tenant)
+            now = time.monotonic()
+            with _lock:
+                stats = _stats.setdefault(name, {'hits': 0, 'misses': 0, 'invalidated': 0, 'expired': 0})
+                entry = _entries.get(key)
+                if entry is not None:
+                    if entry['versions'] != versions:
+                        stats['invalidated'] += 1
+                        _drop(key)
+                    elif now - entry['stored_at'] > QUERY_CACHE_TTL:
+                        stats['expired'] += 1
+                        _drop(key)
+                    else:
+                        _entries.move_to_end(key)
+                        stats['hits'] += 1
+                        return _copy(entry['result'])
+                stats['misses'] += 1
+
+            result = func(*args, **kwargs)
+            entry = {'result': _copy(result), 'versions': versions, 'stored_at': now,
+                     'bytes': estimate_bytes(result)}
+            with _lock:
+                _store(key, entry)
+            return result
+
+        wrapper.cached_tables = tables
+        return wrapper
+    return decorator
+
+def invalidates(*tables):
+    """Bump the version of tables for the current tenant after a write, unless it returned False"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            if result is not False:
+                bump_tables(tables, resolve_tenant())
+            return result
+        return wrapper
+    return decorator
+
+def query_cache_stats():
+    """Hit rates per cached function and the cache's size"""
+    with _lock:
+        functions = {}
+        for name, stats in _stats.items():
+            lookups = stats['hits'] + stats['misses']
+            functions[name] = dict(stats, hit_rate=stats['hits'] / lookups if lookups else None)
+        hits = sum(stats['hits'] for stats in _stats.values())
+        lookups = hits + sum(stats['misses'] for stats in _stats.values())
+        return {
+            'enabled': QUERY_CACHE_ENABLED,
+            'entries': len(_entries),
+            'bytes': _bytes,
+            'limit_bytes': int(QUERY_CACHE_MB * 1024 * 1024),
+            'evictions': _evictions,
+            'hit_rate': hits / lookups if lookups else None,
+            'functions': functions
+        }
+
+def clear_query_cache():
+    global _bytes, _evictions
+    with _lock:
+        _entries.clear()
+        _stats.clear()
+        _bytes = 0
+        _evictions = 0
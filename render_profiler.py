@@ -0,0 +1,338 @@
+"""Headless render-cost profiler for the dashboard pages.
+
+    python render_profiler.py
+    python render_profiler.py --pages iot supply_chain --enable-toggles --collapsed render.folded
+
+Replaces the streamlit module with a recording stub, runs each page's render
+function and captures every figure passed to st.plotly_chart. For each figure
+it reports the time spent in Plotly calls that built it, the time and size of
+its JSON serialization and the number of plotted points. Time outside Plotly
+is the page's data work.
+
+--collapsed writes sampled stacks in the collapsed format read by
+flamegraph.pl and speedscope. Runs in a fresh temporary database unless
+--workdir is given.
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+PAGES = {
+    'manufacturing': ('industry_layouts', 'render_manufacturing_dashboard'),
+    'healthcare': ('industry_layouts', 'render_healthcare_dashboard'),
+    'supply_chain': ('supply_chain_layout', 'render_supply_chain_dashboard'),
+    'iot': ('iot_layout', 'render_iot_dashboard')
+}
+SAMPLE_INTERVAL = 0.001
+
+class _SessionState(dict):
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+class _Element:
+    """Stand-in for containers and elements; widget calls are forwarded to the stub"""
+
+    def __init__(self, stub):
+        self._stub = stub
+
+    def __getattr__(self, name):
+        return getattr(self._stub, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        return iter(())
+
+class StreamlitStub:
+    """Records figures passed to plotly_chart; widgets return their default values"""
+
+    def __init__(self, enable_toggles=False):
+        self.enable_toggles = enable_toggles
+        self.session_state = _SessionState()
+        self.figures = []
+        self.runtime = type('Runtime', (), {'exists': staticmethod(lambda: False)})()
+        self.sidebar = _Element(self)
+
+    def __getattr__(self, name):
+        # Anything not modelled below (text, metrics, tables, notices) is a no-op element
+        return lambda *args, **kwargs: _Element(self)
+
+    def plotly_chart(self, figure, *args, **kwargs):
+        self.figures.append(figure)
+        return None
+
+    def columns(self, spec, *args, **kwargs):
+        return [_Element(self) for _ in range(spec if isinstance(spec, int) else len(spec))]
+
+    def tabs(self, labels):
+        return [_Element(self) for _ in labels]
+
+    def _widget(self, key, value):
+        if key is not None:
+            value = self.session_state.setdefault(key, value)
+        return value
+
+    def selectbox(self, label, options=(), index=0, *args, key=None, **kwargs):
+        options = list(options)
+        return self._widget(key, options[index] if options and index is not None else None)
+
+    radio = selectbox
+
+    def multiselect(self, label, options=(), default=None, *args, key=None, **kwargs):
+        return self._widget(key, list(default or []))
+
+    def slider(self, label, min_value=None, max_value=None, value=None, *args, key=None, **kwargs):
+        return self._widget(key, value if value is not None else min_value)
+
+    def select_slider(self, label, options=(), value=None, *args, key=None, **kwargs):
+        return self._widget(key, value if value is not None else list(options)[0])
+
+    def number_input(self, label, min_value=None, max_value=None, value=None, *args, key=None, **kwargs):
+        return self._widget(key, value if value is not None else (min_value or 0))
+
+    def date_input(self, label, value=None, *args, key=None, **kwargs):
+        return self._widget(key, value)
+
+    def text_input(self, label, value='', *args, key=None, **kwargs):
+        return self._widget(key, value)
+
+    def toggle(self, label, value=False, *args, key=None, **kwargs):
+        return self._widget(key, value or self.enable_toggles)
+
+    checkbox = toggle
+
+    def button(self, *args, **kwargs):
+        return False
+
+    def fragment(self, func=None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+    def cache_data(self, func=None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+    cache_resource = cache_data
+
+    def rerun(self):
+        pass
+
+    experimental_rerun = rerun
+
+class _PlotlyTimer:
+    """Attributes time spent in outermost Plotly calls to the figure they build"""
+
+    def __init__(self):
+        self.build_seconds = Counter()
+        self._local = threading.local()
+
+    def wrap(self, func, figure_of):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            depth = getattr(self._local, 'depth', 0)
+            self._local.depth = depth + 1
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                self._local.depth = depth
+            if depth == 0:
+                figure = figure_of(args, result)
+                if figure is not None:
+                    self.build_seconds[id(figure)] += time.perf_counter() - start
+            return result
+        return timed
+
+    def install(self):
+        import plotly.express as px
+        import plotly.graph_objects as go
+
+        for name in ('__init__', 'add_trace', 'add_traces', 'update_layout', 'update_traces',
+                     'update_xaxes', 'update_yaxes', 'add_shape', 'add_annotation',
+                     'add_hline', 'add_vline', 'add_hrect', 'add_vrect'):
+            if hasattr(go.Figure, name):
+                setattr(go.Figure, name, self.wrap(getattr(go.Figure, name), lambda args, result: args[0]))
+        for name in dir(px):
+            func = getattr(px, name)
+            if callable(func) and not name.startswith('_') and not isinstance(func, type):
+                setattr(px, name, self.wrap(
+                    func, lambda args, result: result if isinstance(result, go.Figure) else None
+                ))
+
+class StackSampler:
+    """Samples every thread's Python stack into collapsed-stack counts"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.prefix = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            prefix = self.prefix
+            if prefix is None:
+                continue
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[';'.join([prefix, names.get(ident, 'thread')] + stack[::-1])] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w') as handle:
+            for stack, count in sorted(self.stacks.items()):
+                handle.write(f"{stack} {count}\n")
+
+def figure_stats(figure):
+    """Title, trace count and plotted point count of a figure"""
+    points = 0
+    for trace in figure.data:
+        sizes = [
+            len(values) for attr in ('x', 'y', 'z', 'values', 'lat', 'r')
+            if (values := getattr(trace, attr, None)) is not None and hasattr(values, '__len__')
+        ]
+        points += max(sizes, default=0)
+    title = figure.layout.title.text or ', '.join(sorted({trace.type for trace in figure.data}))
+    return title, len(figure.data), points
+
+def profile_page(page, stub, timer, sampler=None):
+    import importlib
+    module_name, function_name = PAGES[page]
+    render = getattr(importlib.import_module(module_name), function_name)
+
+    stub.figures.clear()
+    if sampler is not None:
+        sampler.prefix = page
+    start = time.perf_counter()
+    render()
+    wall = time.perf_counter() - start
+
+    rows = []
+    for figure in stub.figures:
+        serialize_start = time.perf_counter()
+        if sampler is not None:
+            sampler.prefix = f'{page};serialize'
+        payload = figure.to_json()
+        serialize = time.perf_counter() - serialize_start
+        title, traces, points = figure_stats(figure)
+        rows.append({
+            'page': page,
+            'figure': title,
+            'traces': traces,
+            'points': points,
+            'build_ms': timer.build_seconds.pop(id(figure), 0.0) * 1000,
+            'serialize_ms': serialize * 1000,
+            'json_kb': len(payload) / 1024
+        })
+    if sampler is not None:
+        sampler.prefix = None
+
+    build_ms = sum(row['build_ms'] for row in rows)
+    summary = {
+        'page': page,
+        'render_ms': wall * 1000,
+        'figures': len(rows),
+        'build_ms': build_ms,
+        'data_ms': wall * 1000 - build_ms,
+        'serialize_ms': sum(row['serialize_ms'] for row in rows),
+        'json_kb': sum(row['json_kb'] for row in rows),
+        'points': sum(row['points'] for row in rows)
+    }
+    return summary, rows
+
+def print_report(summaries, rows):
+    print(f"{'page':<14} {'render ms':>10} {'data ms':>9} {'build ms':>9} {'json ms':>8} "
+          f"{'json KB':>9} {'figures':>8} {'points':>9}")
+    for s in summaries:
+        print(f"{s['page']:<14} {s['render_ms']:>10.1f} {s['data_ms']:>9.1f} {s['build_ms']:>9.1f} "
+              f"{s['serialize_ms']:>8.1f} {s['json_kb']:>9.1f} {s['figures']:>8} {s['points']:>9}")
+    print()
+    print(f"{'page':<14} {'figure':<44} {'traces':>6} {'points':>8} {'build ms':>9} {'json ms':>8} {'json KB':>8}")
+    for r in rows:
+        print(f"{r['page']:<14} {r['figure'][:44]:<44} {r['traces']:>6} {r['points']:>8} "
+              f"{r['build_ms']:>9.1f} {r['serialize_ms']:>8.1f} {r['json_kb']:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Guardian-IO headless render-cost profiler')
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=list(PAGES))
+    parser.add_argument('--enable-toggles', action='store_true',
+                        help='turn on optional panels such as the Monte Carlo scenarios')
+    parser.add_argument('--industry', default='Manufacturing', help='session industry (tenant)')
+    parser.add_argument('--workdir', help='directory holding the databases (default: a fresh temporary one)')
+    parser.add_argument('--collapsed', help='write sampled stacks in collapsed (flamegraph) format')
+    parser.add_argument('--json', help='write the report as JSON')
+    args = parser.parse_args()
+    collapsed_path = os.path.abspath(args.collapsed) if args.collapsed else None
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    # The stub must be in place before anything imports streamlit
+    stub = StreamlitStub(enable_toggles=args.enable_toggles)
+    stub.session_state['industry'] = args.industry
+    sys.modules['streamlit'] = stub
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix='guardian_render_'))
+    from job_queue import init_job_tables
+    from models import init_db, init_tenant_databases
+    from results_store import init_results_tables
+    from tenancy import tenant_scope
+    init_db()
+    init_tenant_databases()
+    init_job_tables()
+    init_results_tables()
+
+    timer = _PlotlyTimer()
+    timer.install()
+    sampler = StackSampler() if collapsed_path else None
+    if sampler is not None:
+        sampler.start()
+
+    summaries, rows = [], []
+    with tenant_scope(args.industry):
+        for page in args.pages:
+            summary, page_rows = profile_page(page, stub, timer, sampler)
+            summaries.append(summary)
+            rows.extend(page_rows)
+
+    if sampler is not None:
+        sampler.stop()
+        sampler.write(collapsed_path)
+    print_report(summaries, rows)
+    if json_path:
+        with open(json_path, 'w') as handle:
+            json.dump({'pages': summaries, 'figures': rows}, handle, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import pickle
+import sqlite3
+
+
+def init_results_tables():
+    conn = sqlite3.connect('guardian_io.db')
+    c = conn.cursor()
+
+    # Create versioned store for precomputed dashboard artifacts
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS precomputed_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            artifact TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            payload BLOB NOT NULL,
+            compute_seconds FLOAT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (artifact, version)
+        )
+    ''')
+
+    conn.commit()
+    conn.close()
+
+def save_result(artifact, payload, compute_seconds=None, keep_versions=3):
+    """Publish a new version of an artifact in one transaction and prune old versions"""
+    blob = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    conn = sqlite3.connect('guardian_io.db', timeout=30)
+    c = conn.cursor()
+
+    try:
+        c.execute('BEGIN IMMEDIATE')
+        c.execute('SELECT COALESCE(MAX(version), 0) + 1 FROM precomputed_results WHERE artifact = ?',
+                  (artifact,))
+        version = c.fetchone()[0]
+        c.execute(
+            'INSERT INTO precomputed_results (artifact, version, payload, compute_seconds) VALUES (?, ?, ?, ?)',
+            (artifact, version, blob, compute_seconds)
+        )
+        c.execute('DELETE FROM precomputed_results WHERE artifact = ? AND version <= ?',
+                  (artifact, version - keep_versions))
+        conn.commit()
+        return version
+    except sqlite3.Error:
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+def get_latest_result(artifact):
+    conn = sqlite3.connect('guardian_io.db')
+    c = conn.cursor()
+
+    try:
+        c.execute('''
+            SELECT version, payload, created_at,
+                   CAST(strftime('%s', 'now') - strftime('%s', created_at) AS INTEGER)
+            FROM precomputed_results
+            WHERE artifact = ?
+            ORDER BY version DESC
+            LIMIT 1
+        ''', (artifact,))
+        result = c.fetchone()
+    except sqlite3.OperationalError:
+        # Store not initialised yet
+        result = None
+    finally:
+        conn.close()
+
+    if result is None:
+        return None
+    return {
+        'version': result[0],
+        'payload': pickle.loads(result[1]),
+        'created_at': result[2],
+        'age_seconds': result[3]
+    }
+
+def get_latest_result_info(artifact):
+    """Version and age of the latest stored artifact, without loading its payload"""
+    conn = sqlite3.connect('guardian_io.db')
+    c = conn.cursor()
+
+    try:
+        c.execute('''
+            SELECT version, created_at,
+                   CAST(strftime('%s', 'now') - strftime('%s', created_at) AS INTEGER)
+            FROM precomputed_results
+            WHERE artifact = ?
+            ORDER BY version DESC
+            LIMIT 1
+        ''', (artifact,))
+        result = c.fetchone()
+    except sqlite3.OperationalError:
+        result = None
+    finally:
+        conn.close()
+
+    if result is None:
+        return None
+    return {'version': result[0], 'created_at': result[1], 'age_seconds': result[2]}
+
+def get_result_payload(artifact, version):
+    """The payload of one stored version, or None if it has been pruned"""
+    conn = sqlite3.connect('guardian_io.db')
+    c = conn.cursor()
+
+    try:
+        c.execute('SELECT payload FROM precomputed_results WHERE artifact = ? AND version = ?',
+                  (artifact, version))
+        result = c.fetchone()
+    except sqlite3.OperationalError:
+        result = None
+    finally:
+        conn.close()
+
+    return pickle.loads(result[0]) if result else None
+
+def get_result_versions():
+    """Latest version, timestamp and compute time for every stored artifact"""
+    conn = sqlite3.connect('guardian_io.db')
+    c = conn.cursor()
+
+    c.execute('''
+        SELECT artifact, version, created_at, compute_seconds
+        FROM precomputed_results p
+        WHERE version = (SELECT MAX(version) FROM precomputed_results WHERE artifact = p.artifact)
+        ORDER BY artifact
+    ''')
+    versions = c.fetchall()
+    conn.close()
+
+    return versions
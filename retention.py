@@ -0,0 +1,288 @@
+"""Retention, archival and compaction for the shared and per-tenant databases.
+
+    python retention.py                  # apply RETENTION_POLICIES
+    python retention.py --dry-run        # count expired rows only
+    python retention.py --convert-auto-vacuum
+
+Expired rows are written to gzip CSV partitions under archive/[<tenant>/]<table>/<day>.csv.gz
+and then deleted in small batches, each in its own short transaction, so
+dashboard writers are never blocked for long. Raw sensor readings are folded
+into sensor_readings_hourly before they are removed. When readings are sharded
+(see shards.py), expired shard files are rolled up, gzipped and deleted whole.
+"""
+import argparse
+import csv
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from datetime import timedelta
+
+from shards import (
+    sharding_enabled, utc_now, list_shards, shard_bounds, shard_path, forget_shard
+)
+from tenancy import TENANTS, tenant_db_path, tenant_shard_dir, tenant_slug
+
+ARCHIVE_DIR = 'archive'
+
+SENSOR_CHANNELS = ['temperature', 'vibration', 'pressure', 'power_consumption']
+
+RETENTION_POLICIES = {
+    'sensor_readings': {
+        'time_column': 'timestamp',
+        'keep_days': 7,
+        'rollup': True
+    },
+    'sensor_readings_hourly': {
+        'time_column': 'hour',
+        'keep_days': 365,
+        'archive': False
+    },
+    'supply_chain_events': {
+        'time_column': 'timestamp',
+        'keep_days': 365
+    },
+    'maintenance_alerts': {
+        'time_column': 'created_at',
+        'keep_days': 90,
+        # Open alerts are kept however old they are
+        'condition': '(is_resolved = TRUE OR expired_at IS NOT NULL)'
+    }
+}
+
+def _database_size(c):
+    c.execute('PRAGMA page_size')
+    page_size = c.fetchone()[0]
+    c.execute('PRAGMA page_count')
+    page_count = c.fetchone()[0]
+    c.execute('PRAGMA freelist_count')
+    freelist_count = c.fetchone()[0]
+    return page_count * page_size, freelist_count * page_size
+
+def _rollup_sensor_readings(c, where, params, source='sensor_readings'):
+    aggregates = ', '.join(f'SUM({ch}), MIN({ch}), MAX({ch})' for ch in SENSOR_CHANNELS)
+    columns = ', '.join(f'{ch}_sum, {ch}_min, {ch}_max' for ch in SENSOR_CHANNELS)
+    updates = ', '.join(
+        f'{ch}_sum = {ch}_sum + excluded.{ch}_sum, '
+        f'{ch}_min = MIN({ch}_min, excluded.{ch}_min), '
+        f'{ch}_max = MAX({ch}_max, excluded.{ch}_max)'
+        for ch in SENSOR_CHANNELS
+    )
+    c.execute(f'''
+        INSERT INTO sensor_readings_hourly (sensor_id, hour, reading_count, {columns})
+        SELECT sensor_id, strftime('%Y-%m-%d %H:00:00', timestamp), COUNT(*), {aggregates}
+        FROM {source}
+        WHERE {where}
+        GROUP BY sensor_id, strftime('%Y-%m-%d %H:00:00', timestamp)
+        ON CONFLICT (sensor_id, hour) DO UPDATE SET
+            reading_count = reading_count + excluded.reading_count, {updates}
+    ''', params)
+
+def _archive_rows(archive_dir, table, columns, rows, time_index):
+    """Append rows to per-day gzip partitions (a gzip file may hold several members)"""
+    partitions = {}
+    for row in rows:
+        day = str(row[time_index])[:10]
+        partitions.setdefault(day, []).append(row)
+
+    table_dir = os.path.join(archive_dir, table)
+    os.makedirs(table_dir, exist_ok=True)
+    for day, day_rows in partitions.items():
+        path = os.path.join(table_dir, f'{day}.csv.gz')
+        is_new = not os.path.exists(path)
+        with gzip.open(path, 'at', newline='') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(columns)
+            writer.writerows(day_rows)
+            f.flush()
+            os.fsync(f.fileno())
+    return sorted(partitions)
+
+def apply_policy(conn, table, policy, batch_size=1000, pause_seconds=0.01, dry_run=False,
+                 archive_dir=ARCHIVE_DIR):
+    """Archive and delete expired rows of one table, one small transaction per batch"""
+    c = conn.cursor()
+    cutoff_row = c.execute("SELECT datetime('now', ?)", (f"-{policy['keep_days']} days",)).fetchone()
+    cutoff = cutoff_row[0]
+    time_column = policy['time_column']
+    where = f'{time_column} < ?'
+    if policy.get('condition'):
+        where += f" AND {policy['condition']}"
+
+    stats = {'table': table, 'cutoff': cutoff, 'rows_deleted': 0, 'rows_archived': 0, 'batches': 0}
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    if c.fetchone() is None:
+        return stats
+    if dry_run:
+        c.execute(f'SELECT COUNT(*) FROM {table} WHERE {where}', (cutoff,))
+        stats['rows_expired'] = c.fetchone()[0]
+        return stats
+
+    # sensor_readings_hourly has no id column, so batches are keyed on rowid
+    key = 'id' if table != 'sensor_readings_hourly' else 'rowid'
+    while True:
+        c.execute(f'SELECT {key}, * FROM {table} WHERE {where} ORDER BY {key} LIMIT ?',
+                  (cutoff, batch_size))
+        rows = c.fetchall()
+        if not rows:
+            break
+        columns = [d[0] for d in c.description][1:]
+        keys = [row[0] for row in rows]
+        rows = [row[1:] for row in rows]
+
+        # Archive first: a crash before the delete commits only duplicates archive rows
+        if policy.get('archive', True):
+            _archive_rows(archive_dir, table, columns, rows, columns.index(time_column))
+            stats['rows_archived'] += len(rows)
+
+        c.execute('BEGIN IMMEDIATE')
+        if policy.get('rollup'):
+            _rollup_sensor_readings(c, 'id BETWEEN ? AND ? AND timestamp < ?', (keys[0], keys[-1], cutoff))
+        placeholders = ', '.join('?' * len(keys))
+        c.execute(f'DELETE FROM {table} WHERE {key} IN ({placeholders})', keys)
+        conn.commit()
+
+        stats['rows_deleted'] += len(keys)
+        stats['batches'] += 1
+        # Give waiting writers a chance to take the lock between batches
+        time.sleep(pause_seconds)
+
+    return stats
+
+def expire_reading_shards(conn, keep_days, shard_dir, archive_dir=ARCHIVE_DIR):
+    """Roll up, archive and drop whole reading shards that ended before the cutoff"""
+    cutoff = utc_now() - timedelta(days=keep_days)
+    stats = {'table': 'sensor_readings shards', 'cutoff': str(cutoff), 'rows_deleted': 0,
+             'rows_archived': 0, 'batches': 0, 'shards_dropped': []}
+    c = conn.cursor()
+
+    for key in list_shards(shard_dir):
+        if shard_bounds(key)[1] > cutoff:
+            continue
+        path = shard_path(key, shard_dir)
+
+        # Fold any WAL content back into the shard so the file alone is complete
+        shard_conn = sqlite3.connect(path, timeout=30)
+        shard_conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        shard_conn.execute('PRAGMA journal_mode = DELETE')
+        shard_conn.close()
+
+        c.execute('ATTACH DATABASE ? AS shard', (path,))
+        c.execute('BEGIN IMMEDIATE')
+        c.execute('SELECT COUNT(*) FROM shard.sensor_readings')
+        row_count = c.fetchone()[0]
+        _rollup_sensor_readings(c, '1 = 1', (), source='shard.sensor_readings')
+        conn.commit()
+        c.execute('DETACH DATABASE shard')
+
+        shard_archive = os.path.join(archive_dir, 'sensor_readings', 'shards')
+        os.makedirs(shard_archive, exist_ok=True)
+        with open(path, 'rb') as src, gzip.open(os.path.join(shard_archive, os.path.basename(path) + '.gz'), 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        forget_shard(key, shard_dir)
+
+        stats['rows_deleted'] += row_count
+        stats['rows_archived'] += row_count
+        stats['batches'] += 1
+        stats['shards_dropped'].append(key)
+
+    return stats
+
+def run_retention(policies=None, batch_size=1000, dry_run=False, tenant=None):
+    """Apply all retention policies to one tenant database, then reclaim free pages"""
+    policies = policies or RETENTION_POLICIES
+    db_path = tenant_db_path(tenant)
+    archive_dir = ARCHIVE_DIR if tenant is None else os.path.join(ARCHIVE_DIR, tenant_slug(tenant))
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    c = conn.cursor()
+
+    size_before, _ = _database_size(c)
+    report = {'tables': [], 'size_before': size_before}
+
+    if sharding_enabled() and not dry_run and 'sensor_readings' in policies:
+        shard_started = time.perf_counter()
+        stats = expire_reading_shards(conn, policies['sensor_readings']['keep_days'],
+                                      tenant_shard_dir(tenant), archive_dir)
+        stats['seconds'] = time.perf_counter() - shard_started
+        report['tables'].append(stats)
+
+    for table, policy in policies.items():
+        table_started = time.perf_counter()
+        stats = apply_policy(conn, table, policy, batch_size, dry_run=dry_run, archive_dir=archive_dir)
+        stats['seconds'] = time.perf_counter() - table_started
+        report['tables'].append(stats)
+
+    if not dry_run:
+        maintenance_started = time.perf_counter()
+        c.execute('PRAGMA auto_vacuum')
+        report['auto_vacuum'] = {0: 'none', 1: 'full', 2: 'incremental'}[c.fetchone()[0]]
+        _, report['freelist_before_vacuum'] = _database_size(c)
+        # executescript steps the pragma to completion; execute() frees a single page
+        conn.executescript('PRAGMA incremental_vacuum;')
+        c.execute('ANALYZE')
+        report['maintenance_seconds'] = time.perf_counter() - maintenance_started
+
+    report['size_after'], report['freelist_after'] = _database_size(c)
+    report['reclaimed_bytes'] = report['size_before'] - report['size_after']
+    report['seconds'] = time.perf_counter() - started
+    conn.close()
+
+    return report
+
+def convert_to_incremental_vacuum(db_path):
+    """One-off full VACUUM so an existing database supports incremental_vacuum"""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+    mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+    conn.close()
+    return mode == 2
+
+def print_report(report):
+    for stats in report['tables']:
+        if 'rows_expired' in stats:
+            print(f"{stats['table']:<24} expired={stats['rows_expired']:<10} cutoff={stats['cutoff']}")
+        else:
+            print(f"{stats['table']:<24} deleted={stats['rows_deleted']:<10} "
+                  f"archived={stats['rows_archived']:<10} batches={stats['batches']:<6} {stats['seconds']:.2f}s")
+    if 'auto_vacuum' in report:
+        print(f"auto_vacuum={report['auto_vacuum']} "
+              f"freelist before vacuum={report['freelist_before_vacuum'] / 1024:.1f} KiB")
+        if report['auto_vacuum'] != 'incremental':
+            print("Run with --convert-auto-vacuum once to let retention shrink the file")
+    print(f"size {report['size_before'] / 1024:.1f} KiB -> {report['size_after'] / 1024:.1f} KiB "
+          f"(reclaimed {report['reclaimed_bytes'] / 1024:.1f} KiB) in {report['seconds']:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description='Guardian-IO data retention and compaction')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--dry-run', action='store_true', help='only count expired rows')
+    parser.add_argument('--convert-auto-vacuum', action='store_true',
+                        help='switch an existing database to incremental auto-vacuum (runs a full VACUUM)')
+    for table, policy in RETENTION_POLICIES.items():
+        parser.add_argument(f'--keep-{table.replace("_", "-")}-days', type=int,
+                            default=policy['keep_days'], dest=f'keep_{table}')
+    args = parser.parse_args()
+
+    policies = {
+        table: dict(policy, keep_days=getattr(args, f'keep_{table}'))
+        for table, policy in RETENTION_POLICIES.items()
+    }
+    for tenant in [None] + TENANTS:
+        db_path = tenant_db_path(tenant)
+        if not os.path.exists(db_path):
+            continue
+        print(f"== {db_path}")
+        if args.convert_auto_vacuum:
+            converted = convert_to_incremental_vacuum(db_path)
+            print("auto_vacuum is now incremental" if converted else "Could not enable incremental auto_vacuum")
+        print_report(run_retention(policies, args.batch_size, args.dry_run, tenant))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Remaining-useful-life estimates from sensor degradation trends.
+
+Every equipment's readings since its last maintenance are stacked into one
+(equipment, time, channel) array and a linear trend is fitted to all of them
+at once with closed-form least squares. The time to threshold is how long the
+fitted trend takes to reach the channel's failure limit, and an equipment's
+RUL is the shortest of its channels.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from iot_data import stack_sensor_readings
+from models import get_last_maintenance, get_sensor_data_version, get_sensor_readings_since
+from schemas import apply_schema
+
+# Failure limits as multiples of the level just after maintenance
+DEGRADATION_LIMITS = {
+    'temperature': 1.25,
+    'vibration': 2.0,
+    'power_consumption': 1.3
+}
+RUL_HORIZON_HOURS = 90 * 24
+MIN_FIT_POINTS = 30
+HISTORY_HOURS = 7 * 24
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _epoch_seconds(moments):
+    """datetime64 array as float seconds, with NaT as NaN"""
+    return np.where(np.isnat(moments), np.nan, moments.astype('datetime64[s]').astype(np.int64)).astype(np.float64)
+
+def fit_degradation_trends(timestamps, values, reset_times=None):
+    """
+    Least-squares line per (equipment, channel) over readings after each reset time.
+
+    timestamps is (equipment, time) and values is (equipment, time, channel), as
+    returned by stack_sensor_readings. Returns the slope (units per hour), level
+    at the latest reading, level at the start of the fit window, point count and
+    window length in hours, each shaped (equipment, channel).
+    """
+    seconds = _epoch_seconds(timestamps)
+    latest = np.nanmax(seconds, axis=1)
+    hours = (seconds - latest[:, None]) / 3600.0
+
+    used = ~np.isnan(values) & ~np.isnan(hours)[..., None]
+    if reset_times is not None:
+        reset_hours = (_epoch_seconds(reset_times) - latest) / 3600.0
+        # Equipment without a recorded maintenance keeps its whole history
+        used &= (hours > np.nan_to_num(reset_hours, nan=-np.inf)[:, None])[..., None]
+
+    t = np.where(used, hours[..., None], 0.0)
+    y = np.where(used, values, 0.0)
+
+    # Normal equations from running sums; times are small offsets from the latest reading
+    count = used.sum(axis=1, dtype=np.float64)
+    safe_count = np.maximum(count, 1)
+    t_mean = t.sum(axis=1) / safe_count
+    y_mean = y.sum(axis=1) / safe_count
+    sxx = np.einsum('etc,etc->ec', t, t) - count * t_mean ** 2
+    sxy = np.einsum('etc,etc->ec', t, y) - count * t_mean * y_mean
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+    first_hour = np.where(used, hours[..., None], np.inf).min(axis=1)
+    # Channels with no usable readings have no window to speak of
+    first_hour = np.where(count > 0, first_hour, 0.0)
+    return {
+        'slope': slope,
+        # Time zero is the latest reading, so the intercept is the current level
+        'current': y_mean - slope * t_mean,
+        'baseline': y_mean + slope * (first_hour - t_mean),
+        'count': count,
+        'window_hours': -first_hour
+    }
+
+def estimate_fleet_rul(readings_df, last_maintenance=None, limits=DEGRADATION_LIMITS,
+                       horizon_hours=RUL_HORIZON_HOURS):
+    """RUL table for every equipment in a readings frame, most urgent first"""
+    columns = ['equipment_id', 'limiting_channel', 'hours_to_threshold', 'trend_per_day',
+               'current', 'threshold', 'fit_points']
+    if readings_df.empty:
+        return pd.DataFrame(columns=columns)
+
+    channels = list(limits)
+    ids, timestamps, values = stack_sensor_readings(readings_df, channels=channels)
+
+    reset_times = None
+    if last_maintenance:
+        reset_times = pd.to_datetime(
+            pd.Series([last_maintenance.get(equipment_id) for equipment_id in ids])
+        ).to_numpy(dtype='datetime64[ns]')
+
+    fit = fit_degradation_trends(timestamps, values, reset_times)
+    threshold = fit['baseline'] * np.array([limits[channel] for channel in channels])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hours_left = np.where(
+            (fit['slope'] > 0) & (fit['count'] >= MIN_FIT_POINTS),
+            np.maximum(threshold - fit['current'], 0) / fit['slope'],
+            np.inf
+        )
+
+    limiting = np.argmin(hours_left, axis=1)
+    rows = np.arange(len(ids))
+    rul = pd.DataFrame({
+        'equipment_id': ids,
+        'limiting_channel': np.array(channels)[limiting],
+        'hours_to_threshold': np.where(hours_left[rows, limiting] <= horizon_hours,
+                                       hours_left[rows, limiting], np.inf),
+        'trend_per_day': fit['slope'][rows, limiting] * 24,
+        'current': fit['current'][rows, limiting],
+        'threshold': threshold[rows, limiting],
+        'fit_points': fit['count'][rows, limiting].astype(int)
+    })
+    return rul.sort_values('hours_to_threshold', kind='stable', ignore_index=True)
+
+def load_readings_history(hours=HISTORY_HOURS, limit=5_000_000):
+    """Stored readings of the last `hours` as a frame keyed by equipment"""
+    readings = get_sensor_readings_since(hours=hours, limit=limit)
+    frame = pd.DataFrame(readings, columns=[
+        'id', 'sensor_id', 'equipment_id', 'temperature', 'vibration',
+        'pressure', 'power_consumption', 'timestamp'
+    ])
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+    return apply_schema(frame, 'sensor_readings')
+
+def get_fleet_rul(hours=HISTORY_HOURS):
+    """
+    RUL table for the stored fleet history, recomputed only when new readings
+    or maintenance alerts have been written since the cached estimate.
+    """
+    version = (get_sensor_data_version(), hours)
+    tenant = version[0][0]
+    with _cache_lock:
+        cached = _cache.get(tenant)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    rul = estimate_fleet_rul(load_readings_history(hours), get_last_maintenance())
+    with _cache_lock:
+        _cache[tenant] = (version, rul)
+    return rul
+
+def format_hours(hours):
+    if not np.isfinite(hours):
+        return f"> {RUL_HORIZON_HOURS // 24} days"
+    if hours < 48:
+        return f"{hours:.0f} h"
+    return f"{hours / 24:.1f} days"
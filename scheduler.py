@@ -0,0 +1,92 @@
+"""Periodically precompute dashboard artifacts into the results store.
+
+    python scheduler.py --interval 300
+    python scheduler.py --once --artifacts iot_fleet active_alert_summary
+    python scheduler.py --interval 300 --alert-scan
+
+Dashboards read the latest stored version and only compute on demand when an
+artifact has never been published. Only read-only tasks are published; with
+--alert-scan each pass first runs alert_scan for every tenant, which records
+alerts and is therefore not an artifact.
+"""
+import argparse
+import time
+import traceback
+
+from models import init_db, init_tenant_databases
+from results_store import init_results_tables, save_result
+from tasks import TENANT_SCOPED_TASKS, artifact_name, run_task
+from tenancy import TENANTS
+
+# Read-only tasks; computing an artifact must not write operational data
+PRECOMPUTED_ARTIFACTS = [
+    'manufacturing_forecast',
+    'healthcare_forecast',
+    'supply_chain_risk',
+    'iot_fleet',
+    'fleet_health',
+    'active_alert_summary'
+]
+
+def precompute(artifacts, keep_versions=3):
+    """Compute and publish each artifact, returning (artifact, version, seconds) rows"""
+    published = []
+    for task in artifacts:
+        # Tenant-scoped artifacts are published once per tenant database
+        tenants = [None] + TENANTS if task in TENANT_SCOPED_TASKS else [None]
+        for tenant in tenants:
+            artifact = artifact_name(task, tenant)
+            start = time.perf_counter()
+            try:
+                payload = run_task(task, {'tenant': tenant})
+            except Exception:
+                print(f"Failed to compute {artifact}:\n{traceback.format_exc()}")
+                continue
+            elapsed = time.perf_counter() - start
+            version = save_result(artifact, payload, elapsed, keep_versions)
+            published.append((artifact, version, elapsed))
+    return published
+
+def scan_alerts():
+    """Run alert_scan for every tenant database, returning (tenant, outcome) rows"""
+    outcomes = []
+    for tenant in [None] + TENANTS:
+        try:
+            outcomes.append((tenant, run_task('alert_scan', {'tenant': tenant})))
+        except Exception:
+            print(f"Failed to scan alerts for {tenant or 'shared'}:\n{traceback.format_exc()}")
+    return outcomes
+
+def main():
+    parser = argparse.ArgumentParser(description='Guardian-IO dashboard precompute scheduler')
+    parser.add_argument('--interval', type=float, default=300,
+                        help='seconds between precompute runs')
+    parser.add_argument('--artifacts', nargs='+', default=PRECOMPUTED_ARTIFACTS,
+                        choices=PRECOMPUTED_ARTIFACTS)
+    parser.add_argument('--keep-versions', type=int, default=3)
+    parser.add_argument('--once', action='store_true', help='run a single precompute pass and exit')
+    parser.add_argument('--alert-scan', action='store_true',
+                        help='run alert_scan for every tenant before each pass (records alerts)')
+    args = parser.parse_args()
+
+    init_db()
+    init_tenant_databases()
+    init_results_tables()
+
+    while True:
+        started = time.monotonic()
+        if args.alert_scan:
+            # Ahead of the artifacts so active_alert_summary counts the alerts this pass raised
+            for tenant, outcome in scan_alerts():
+                print(f"alert_scan ({tenant or 'shared'}): {outcome}")
+        for artifact, version, elapsed in precompute(args.artifacts, args.keep_versions):
+            print(f"{artifact}: published v{version} in {elapsed:.2f}s")
+        if args.once:
+            break
+        time.sleep(max(0, args.interval - (time.monotonic() - started)))
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,132 @@
+"""Column dtypes for the sensor and supply chain frames.
+
+Generators and DB readers pass their frames through apply_schema() so every
+session holds the same compact layout: float32 measurements, categorical IDs
+and labels (each distinct string stored once), an ordered categorical for
+severity so it sorts Low < Medium < High < Critical, and nanosecond
+timestamps. Columns that are unique per row, such as supplier names, are
+left as strings since a categorical would not save anything.
+
+    python schemas.py                 # memory footprint of the generated frames
+    python schemas.py --sensors 50 --hours 168
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+SEVERITY_LEVELS = ['Low', 'Medium', 'High', 'Critical']
+SEVERITY = pd.CategoricalDtype(SEVERITY_LEVELS, ordered=True)
+MEASUREMENT = np.float32
+TIMESTAMP = 'datetime64[ns]'
+
+SCHEMAS = {
+    'sensor_readings': {
+        'id': np.int64,
+        'sensor_id': 'category',
+        'equipment_id': 'category',
+        'timestamp': TIMESTAMP,
+        'temperature': MEASUREMENT,
+        'vibration': MEASUREMENT,
+        'pressure': MEASUREMENT,
+        'power_consumption': MEASUREMENT
+    },
+    'sensors': {
+        'sensor_id': 'category',
+        'equipment_id': 'category',
+        'sensor_type': 'category',
+        'location': 'category'
+    },
+    'suppliers': {
+        'location': 'category',
+        'risk_score': MEASUREMENT,
+        'performance_score': MEASUREMENT,
+        'delivery_time': np.int16,
+        'quality_score': MEASUREMENT,
+        'cost_variance': MEASUREMENT
+    },
+    'supply_chain_events': {
+        'timestamp': TIMESTAMP,
+        'event_type': 'category',
+        'severity': SEVERITY,
+        'supplier_id': np.int16
+    },
+    'risk_metrics': {
+        'date': TIMESTAMP,
+        'supply_disruption_risk': MEASUREMENT,
+        'quality_risk': MEASUREMENT,
+        'cost_risk': MEASUREMENT,
+        'geopolitical_risk': MEASUREMENT
+    }
+}
+
+def apply_schema(frame, schema):
+    """Cast the columns of a named schema that are present in frame; other columns are left as they are"""
+    dtypes = SCHEMAS[schema]
+    return frame.astype({name: dtype for name, dtype in dtypes.items() if name in frame.columns})
+
+def memory_footprint(frame):
+    """Bytes held by a frame, counting the Python strings it references"""
+    return int(frame.memory_usage(deep=True, index=True).sum())
+
+def _untyped(frame):
+    """The same frame with object strings and 64-bit numbers, as built row by row"""
+    dtypes = {}
+    for name, dtype in frame.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(dtype):
+            dtypes[name] = object
+        elif pd.api.types.is_float_dtype(dtype):
+            dtypes[name] = np.float64
+        elif pd.api.types.is_integer_dtype(dtype):
+            dtypes[name] = np.int64
+    return frame.astype(dtypes)
+
+def memory_report(frames):
+    """
+    Footprint of each named frame against the same data with object strings
+    and float64 columns, as a DataFrame with one row per frame.
+    """
+    rows = []
+    for name, frame in frames.items():
+        untyped = memory_footprint(_untyped(frame))
+        typed = memory_footprint(frame)
+        rows.append({
+            'frame': name,
+            'rows': len(frame),
+            'untyped_bytes': untyped,
+            'bytes': typed,
+            'bytes_per_row': typed / max(len(frame), 1),
+            'reduction': untyped / max(typed, 1)
+        })
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory footprint of the generated frames')
+    parser.add_argument('--sensors', type=int, default=20)
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--suppliers', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=10_000)
+    args = parser.parse_args()
+
+    from iot_data import generate_sensor_data
+    from supply_chain_data import generate_risk_metrics, generate_supplier_data, generate_supply_chain_events
+
+    readings, sensors = generate_sensor_data(args.sensors, args.hours)
+    report = memory_report({
+        'sensor_readings': readings,
+        'sensors': sensors,
+        'suppliers': generate_supplier_data(args.suppliers),
+        'supply_chain_events': generate_supply_chain_events(args.events),
+        'risk_metrics': generate_risk_metrics()
+    })
+
+    print(f"{'frame':<22} {'rows':>9} {'untyped MB':>11} {'typed MB':>9} {'B/row':>7} {'reduction':>9}")
+    for row in report.itertuples():
+        print(f"{row.frame:<22} {row.rows:>9,} {row.untyped_bytes / 1e6:>11.2f} {row.bytes / 1e6:>9.2f} "
+              f"{row.bytes_per_row:>7.1f} {row.reduction:>8.1f}x")
+    total_untyped, total = report['untyped_bytes'].sum(), report['bytes'].sum()
+    print(f"{'total':<22} {'':>9} {total_untyped / 1e6:>11.2f} {total / 1e6:>9.2f} {'':>7} "
+          f"{total_untyped / total:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Concurrent data loading with progressive panel rendering.
+
+A dashboard declares its data sources (functions with the names of the
+sources they depend on) and its panels (render functions with the names of
+the sources they need). render_panels() reserves a placeholder for every panel
+in page order and starts each source once its dependencies are done, running
+independent sources together on a thread pool. Each panel is drawn into its
+placeholder as soon as its data is ready. A panel that raises shows an error
+in its placeholder and does not stop the others.
+
+Source functions run off the script thread and must not call Streamlit; they
+run inside the session's tenant scope. Panels render on the script thread.
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import streamlit as st
+
+from tenancy import current_tenant, tenant_scope
+
+SECTION_WORKERS = int(os.environ.get('GUARDIAN_IO_SECTION_WORKERS', '8'))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+class Source:
+    def __init__(self, name, compute, depends_on=()):
+        self.name = name
+        self.compute = compute
+        self.depends_on = tuple(depends_on)
+
+class Panel:
+    def __init__(self, label, render, needs=()):
+        self.label = label
+        self.render = render
+        self.needs = tuple(needs)
+
+def stored_sources(stored, sources):
+    """
+    Sources serving the values of a stored task result ({name: value}), plus
+    the given sources for any name it lacks, such as fields added after an
+    artifact was written. Without a stored result every source is computed.
+    """
+    if stored is None:
+        return list(sources)
+    return [Source(name, lambda value=value: value) for name, value in stored.items()] + [
+        source for source in sources if source.name not in stored
+    ]
+
+def get_section_executor():
+    """Thread pool shared by all sessions of this server process"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix='section')
+        return _executor
+
+def _run_source(source, tenant, inputs):
+    with tenant_scope(tenant):
+        return source.compute(**inputs)
+
+def render_panels(sources, panels, executor=None):
+    """
+    Compute sources concurrently and draw each panel once the sources it needs
+    are ready. Returns the computed data and per-source timings in seconds.
+    """
+    executor = executor or get_section_executor()
+    sources = {source.name: source for source in sources}
+    tenant = current_tenant()
+
+    slots = []
+    for panel in panels:
+        slot = st.empty()
+        slot.info(f"Loading {panel.label}…")
+        slots.append(slot)
+
+    data, errors, timings = {}, {}, {}
+    running = {}
+    started = {}
+    waiting = dict(sources)
+    pending_panels = list(range(len(panels)))
+
+    def submit_ready():
+        progressed = True
+        while progressed:
+            progressed = False
+            for name, source in list(waiting.items()):
+                failed = [dep for dep in source.depends_on if dep in errors]
+                if failed:
+                    errors[name] = f"depends on {', '.join(failed)}"
+                elif all(dep in data for dep in source.depends_on):
+                    inputs = {dep: data[dep] for dep in source.depends_on}
+                    started[name] = time.perf_counter()
+                    running[executor.submit(_run_source, source, tenant, inputs)] = name
+                else:
+                    continue
+                del waiting[name]
+                progressed = True
+
+    def draw_ready():
+        for index in list(pending_panels):
+            panel = panels[index]
+            failed = [name for name in panel.needs if name in errors]
+            if failed:
+                slots[index].error(f"Could not load {panel.label}: {', '.join(failed)} failed")
+                pending_panels.remove(index)
+            elif all(name in data for name in panel.needs):
+                try:
+                    with slots[index].container():
+                        panel.render(**{name: data[name] for name in panel.needs})
+                except Exception as exc:
+                    # A failing panel replaces its own output; the others still render
+                    slots[index].error(f"Could not render {panel.label}: {exc!r}")
+                pending_panels.remove(index)
+
+    submit_ready()
+    draw_ready()
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            timings[name] = time.perf_counter() - started[name]
+            try:
+                data[name] = future.result()
+            except Exception as exc:
+                errors[name] = repr(exc)
+        submit_ready()
+        draw_ready()
+
+    # Anything still waiting has a dependency that was never declared
+    for index in pending_panels:
+        slots[index].error(f"Could not load {panels[index].label}: missing data source")
+    return data, timings
@@ -0,0 +1,457 @@
+"""Compact binary export and import of sensor reading windows.
+
+    python sensor_export.py export readings.parquet --tenant Manufacturing --days 30
+    python sensor_export.py export synthetic.npz --generate 20 --hours 168
+    python sensor_export.py import readings.npz --tenant Healthcare
+
+Readings are paged out of sensor_readings (or its shards) by (timestamp, id)
+and written chunk by chunk, so memory stays flat however long the window is.
+The format follows the file extension:
+
+- .npz: a zip of .npy members per chunk. Rows are grouped by sensor and
+  delta-encoded: timestamps and ids as int64 differences, channel values as
+  differences of their float32 bit patterns. Needs only NumPy.
+- .arrow / .feather: Arrow IPC file with zstd compression (requires pyarrow).
+- .parquet: Parquet with zstd, byte-stream-split floats and delta-packed
+  timestamps (requires pyarrow).
+
+Text columns such as sensor_id are dictionary-encoded in every format and
+read back as categoricals. Channel values are stored as float32, which keeps
+about seven significant digits.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from models import init_sensor_readings_shard
+from schemas import apply_schema
+from shards import ensure_shard, shard_key, shard_path, shards_between, sharding_enabled, utc_now
+from tenancy import CURRENT_TENANT, TENANTS, get_connection, resolve_tenant, tenant_shard_dir
+
+FORMATS = {'.npz': 'npz', '.arrow': 'arrow', '.feather': 'arrow', '.parquet': 'parquet'}
+DEFAULT_CHUNK_ROWS = 100_000
+NPZ_VERSION = 1
+READING_COLUMNS = [
+    'id', 'sensor_id', 'temperature', 'vibration', 'pressure', 'power_consumption', 'timestamp'
+]
+CHANNELS = ['temperature', 'vibration', 'pressure', 'power_consumption']
+
+def export_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported export format {extension!r}; use one of {', '.join(FORMATS)}")
+    return FORMATS[extension]
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("Arrow and Parquet exports require pyarrow (pip install pyarrow)")
+    return pyarrow
+
+def iter_sensor_readings(start=None, end=None, tenant=CURRENT_TENANT, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Stored readings with start <= timestamp < end as DataFrame chunks, oldest first"""
+    tenant = resolve_tenant(tenant)
+    lower = start.strftime('%Y-%m-%d %H:%M:%S') if start is not None else ''
+    upper = end.strftime('%Y-%m-%d %H:%M:%S') if end is not None else '9999-12-31 23:59:59'
+
+    if sharding_enabled():
+        shard_dir = tenant_shard_dir(tenant)
+        keys = shards_between(start or datetime.min, end, shard_dir)
+        connectors = [lambda key=key: sqlite3.connect(shard_path(key, shard_dir)) for key in keys]
+    else:
+        connectors = [lambda: get_connection(tenant)]
+
+    for connect in connectors:
+        # Keyset paging: each page is an index range scan, never an OFFSET
+        watermark = (lower, 0)
+        while True:
+            conn = connect()
+            c = conn.cursor()
+            try:
+                c.execute(f'''
+                    SELECT {', '.join(READING_COLUMNS)} FROM sensor_readings
+                    WHERE (timestamp, id) > (?, ?) AND timestamp < ?
+                    ORDER BY timestamp, id LIMIT ?
+                ''', (*watermark, upper, chunk_rows))
+                rows = c.fetchall()
+            except sqlite3.OperationalError:
+                rows = []
+            finally:
+                conn.close()
+
+            if not rows:
+                break
+            frame = pd.DataFrame(rows, columns=READING_COLUMNS)
+            frame['timestamp'] = pd.to_datetime(frame['timestamp'], format='ISO8601')
+            yield apply_schema(frame, 'sensor_readings')
+            if len(rows) < chunk_rows:
+                break
+            watermark = (rows[-1][-1], rows[-1][0])
+
+def iter_frame_chunks(frame, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Slices of an in-memory frame, such as the readings from generate_sensor_data"""
+    for begin in range(0, len(frame), chunk_rows):
+        yield frame.iloc[begin:begin + chunk_rows]
+
+def _column_kinds(frame):
+    kinds = []
+    for name, dtype in frame.dtypes.items():
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            kind = 'time'
+        elif pd.api.types.is_integer_dtype(dtype):
+            kind = 'int'
+        elif pd.api.types.is_float_dtype(dtype):
+            kind = 'float'
+        else:
+            kind = 'dictionary'
+        kinds.append((name, kind))
+    return kinds
+
+def _raw_bytes(frame):
+    """Size of the chunk as plain 64-bit columns plus UTF-8 text"""
+    total = 0
+    for name, kind in _column_kinds(frame):
+        if kind == 'dictionary':
+            total += int(frame[name].astype(str).str.len().sum())
+        else:
+            total += 8 * len(frame)
+    return total
+
+class _Dictionary:
+    """Value dictionary that only grows, so codes stay valid for the whole export"""
+
+    def __init__(self):
+        self.values = pd.Index([], dtype=object)
+
+    def encode(self, series):
+        codes = self.values.get_indexer(series)
+        if (codes < 0).any():
+            self.values = self.values.append(pd.Index(pd.unique(series[codes < 0]), dtype=object))
+            codes = self.values.get_indexer(series)
+        return codes.astype(np.int32)
+
+class _Writer:
+    def __init__(self, path, kinds):
+        self.path = path
+        self.kinds = kinds
+        self.dictionaries = {name: _Dictionary() for name, kind in kinds if kind == 'dictionary'}
+        self.chunks = 0
+
+    def write(self, frame):
+        self._write({
+            name: self.dictionaries[name].encode(frame[name]) if kind == 'dictionary' else frame[name].to_numpy()
+            for name, kind in self.kinds
+        })
+        self.chunks += 1
+
+def _deltas(values):
+    # In-place subtraction keeps the dtype, so int32 differences wrap instead of widening
+    deltas = values.copy()
+    deltas[1:] -= values[:-1]
+    return deltas
+
+class _NpzWriter(_Writer):
+    def __init__(self, path, kinds):
+        super().__init__(path, kinds)
+        self.archive = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+        self.rows = 0
+        dictionary_columns = [name for name, kind in kinds if kind == 'dictionary']
+        self.group_by = 'sensor_id' if 'sensor_id' in dictionary_columns else next(iter(dictionary_columns), None)
+        self.order_by = next((name for name, kind in kinds if kind == 'time'), None)
+
+    def _member(self, name, array):
+        with self.archive.open(name, 'w', force_zip64=True) as member:
+            np.lib.format.write_array(member, np.ascontiguousarray(array), allow_pickle=False)
+
+    def _write(self, columns):
+        # Grouping each series' rows together keeps consecutive deltas small
+        keys = [columns[name] for name in (self.order_by, self.group_by) if name is not None]
+        order = np.lexsort(keys) if keys else slice(None)
+
+        for name, kind in self.kinds:
+            values = columns[name][order]
+            if kind == 'time':
+                stored = _deltas(values.astype('datetime64[ns]').view(np.int64))
+            elif kind == 'int':
+                stored = _deltas(values.astype(np.int64))
+            elif kind == 'float':
+                stored = _deltas(values.astype(np.float32).view(np.int32))
+            else:
+                stored = values
+            self._member(f'chunk_{self.chunks:06d}/{name}.npy', stored)
+        self.rows += len(next(iter(columns.values())))
+
+    def close(self):
+        for name, dictionary in self.dictionaries.items():
+            self._member(f'dictionaries/{name}.npy', np.asarray(dictionary.values.astype(str), dtype=str))
+        self.archive.writestr('meta.json', json.dumps({
+            'version': NPZ_VERSION,
+            'columns': self.kinds,
+            'chunks': self.chunks,
+            'rows': self.rows
+        }))
+        self.archive.close()
+
+class _ArrowWriter(_Writer):
+    def __init__(self, path, kinds):
+        super().__init__(path, kinds)
+        pa = _require_pyarrow()
+        types = {
+            'time': pa.timestamp('ns'),
+            'int': pa.int64(),
+            'float': pa.float32(),
+            'dictionary': pa.dictionary(pa.int32(), pa.string())
+        }
+        self.schema = pa.schema([(name, types[kind]) for name, kind in kinds])
+        self._dictionary_arrays = {}
+        self.writer = self._open()
+
+    def _open(self):
+        import pyarrow.ipc as ipc
+        # Dictionaries only grow, so later batches are written as deltas of the first
+        options = ipc.IpcWriteOptions(compression='zstd', emit_dictionary_deltas=True)
+        return ipc.new_file(self.path, self.schema, options=options)
+
+    def _batch(self, columns):
+        import pyarrow as pa
+        arrays = []
+        for name, kind in self.kinds:
+            if kind == 'dictionary':
+                dictionary = self.dictionaries[name].values
+                cached = self._dictionary_arrays.get(name)
+                if cached is None or len(cached) != len(dictionary):
+                    cached = self._dictionary_arrays[name] = pa.array(dictionary.astype(str), pa.string())
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(columns[name], pa.int32()), cached))
+            else:
+                arrays.append(pa.array(columns[name], self.schema.field(name).type))
+        return pa.record_batch(arrays, schema=self.schema)
+
+    def _write(self, columns):
+        self.writer.write_batch(self._batch(columns))
+
+    def close(self):
+        self.writer.close()
+
+class _ParquetWriter(_ArrowWriter):
+    def _open(self):
+        import pyarrow.parquet as pq
+        kinds = dict(self.kinds)
+        encodings = {
+            name: 'DELTA_BINARY_PACKED' if kind in ('time', 'int') else 'BYTE_STREAM_SPLIT'
+            for name, kind in kinds.items() if kind != 'dictionary'
+        }
+        return pq.ParquetWriter(
+            self.path, self.schema, compression='zstd',
+            use_dictionary=[name for name, kind in kinds.items() if kind == 'dictionary'],
+            column_encoding=encodings
+        )
+
+    def _write(self, columns):
+        self.writer.write_batch(self._batch(columns))
+
+WRITERS = {'npz': _NpzWriter, 'arrow': _ArrowWriter, 'parquet': _ParquetWriter}
+
+def export_frames(chunks, path, fmt=None):
+    """
+    Write an iterable of DataFrame chunks (all with the same columns) to path.
+    Returns a report with row count, sizes, compression ratio and throughput.
+    """
+    fmt = fmt or export_format(path)
+    started = time.perf_counter()
+    writer = None
+    rows = raw_bytes = 0
+    try:
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            if writer is None:
+                writer = WRITERS[fmt](path, _column_kinds(chunk))
+            writer.write(chunk)
+            rows += len(chunk)
+            raw_bytes += _raw_bytes(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("No readings to export")
+
+    seconds = time.perf_counter() - started
+    file_bytes = os.path.getsize(path)
+    return {
+        'path': path,
+        'format': fmt,
+        'rows': rows,
+        'chunks': writer.chunks,
+        'raw_bytes': raw_bytes,
+        'file_bytes': file_bytes,
+        'compression_ratio': raw_bytes / file_bytes,
+        'seconds': seconds,
+        'rows_per_second': rows / max(seconds, 1e-9),
+        'mb_per_second': raw_bytes / 1e6 / max(seconds, 1e-9)
+    }
+
+def export_sensor_readings(path, start=None, end=None, tenant=CURRENT_TENANT, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Export stored readings with start <= timestamp < end"""
+    return export_frames(iter_sensor_readings(start, end, tenant, chunk_rows), path)
+
+def export_frame(frame, path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Export an in-memory frame, e.g. readings from generate_sensor_data"""
+    return export_frames(iter_frame_chunks(frame, chunk_rows), path)
+
+def _iter_npz(path):
+    with zipfile.ZipFile(path) as archive:
+        meta = json.loads(archive.read('meta.json'))
+        if meta['version'] != NPZ_VERSION:
+            raise ValueError(f"Unsupported export version {meta['version']}")
+
+        def member(name):
+            with archive.open(name) as handle:
+                return np.lib.format.read_array(handle, allow_pickle=False)
+
+        dictionaries = {
+            name: pd.Index(member(f'dictionaries/{name}.npy'), dtype=object)
+            for name, kind in meta['columns'] if kind == 'dictionary'
+        }
+        for chunk in range(meta['chunks']):
+            data = {}
+            for name, kind in meta['columns']:
+                stored = member(f'chunk_{chunk:06d}/{name}.npy')
+                if kind == 'time':
+                    data[name] = np.cumsum(stored, dtype=np.int64).view('datetime64[ns]')
+                elif kind == 'int':
+                    data[name] = np.cumsum(stored, dtype=np.int64)
+                elif kind == 'float':
+                    data[name] = np.cumsum(stored, dtype=np.int32).view(np.float32).astype(np.float64)
+                else:
+                    data[name] = pd.Categorical.from_codes(stored, dictionaries[name])
+            yield pd.DataFrame(data)
+
+def _iter_arrow(path):
+    pa = _require_pyarrow()
+    import pyarrow.ipc as ipc
+    reader = ipc.open_file(pa.memory_map(path))
+    for index in range(reader.num_record_batches):
+        yield _to_frame(reader.get_batch(index))
+
+def _iter_parquet(path, chunk_rows):
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+        yield _to_frame(batch)
+
+def _to_frame(batch):
+    frame = batch.to_pandas()
+    for name in frame.columns:
+        if frame[name].dtype == np.float32:
+            frame[name] = frame[name].astype(np.float64)
+    return frame
+
+def read_export(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Iterate over the chunks of an exported file as DataFrames"""
+    fmt = export_format(path)
+    if fmt == 'npz':
+        return _iter_npz(path)
+    if fmt == 'arrow':
+        return _iter_arrow(path)
+    return _iter_parquet(path, chunk_rows)
+
+def load_export(path):
+    """A whole exported file as one DataFrame"""
+    return pd.concat(list(read_export(path)), ignore_index=True)
+
+def _insert_readings(conn, rows):
+    c = conn.cursor()
+    try:
+        c.executemany(f'''
+            INSERT INTO sensor_readings (sensor_id, {', '.join(CHANNELS)}, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+def import_sensor_readings(path, tenant=CURRENT_TENANT):
+    """Append the readings of an exported file to sensor_readings; ids are reassigned"""
+    tenant = resolve_tenant(tenant)
+    started = time.perf_counter()
+    written = 0
+    for chunk in read_export(path):
+        chunk = chunk.dropna(subset=['timestamp'])
+        stamps = chunk['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        rows = list(zip(
+            chunk['sensor_id'].astype(str).tolist(),
+            *(chunk[channel].astype(object).where(chunk[channel].notna(), None).tolist() for channel in CHANNELS),
+            stamps.tolist()
+        ))
+        if sharding_enabled():
+            shard_dir = tenant_shard_dir(tenant)
+            days = chunk['timestamp'].dt.normalize().to_numpy()
+            for day in np.unique(days):
+                key = shard_key(pd.Timestamp(day).to_pydatetime())
+                conn = sqlite3.connect(ensure_shard(key, init_sensor_readings_shard, shard_dir))
+                _insert_readings(conn, [row for row, row_day in zip(rows, days) if row_day == day])
+        else:
+            _insert_readings(get_connection(tenant), rows)
+        written += len(rows)
+
+    seconds = time.perf_counter() - started
+    return {'path': path, 'rows': written, 'seconds': seconds, 'rows_per_second': written / max(seconds, 1e-9)}
+
+def print_report(report):
+    print(f"{report['path']}: {report['rows']:,} rows in {report['seconds']:.2f}s "
+          f"({report['rows_per_second']:,.0f} rows/s)")
+    if 'file_bytes' in report:
+        print(f"  {report['raw_bytes'] / 1e6:,.1f} MB raw -> {report['file_bytes'] / 1e6:,.2f} MB "
+              f"{report['format']} ({report['compression_ratio']:.1f}x, {report['mb_per_second']:,.1f} MB/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Guardian-IO sensor reading export and import')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help='write readings to .npz, .arrow/.feather or .parquet')
+    export_parser.add_argument('path')
+    export_parser.add_argument('--tenant', choices=TENANTS)
+    export_parser.add_argument('--days', type=float, help='only the last N days (default: everything stored)')
+    export_parser.add_argument('--generate', type=int, metavar='SENSORS',
+                               help='export synthetic readings from generate_sensor_data instead')
+    export_parser.add_argument('--hours', type=int, default=24, help='hours of synthetic readings')
+    export_parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+
+    import_parser = commands.add_parser('import', help='append an exported file to sensor_readings')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--tenant', choices=TENANTS)
+
+    args = parser.parse_args()
+
+    try:
+        export_format(args.path)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    if args.command == 'export':
+        if args.generate:
+            from iot_data import generate_sensor_data
+            readings, _ = generate_sensor_data(args.generate, args.hours)
+            report = export_frame(readings, args.path, args.chunk_rows)
+        else:
+            start = utc_now() - timedelta(days=args.days) if args.days else None
+            try:
+                report = export_sensor_readings(args.path, start, tenant=args.tenant, chunk_rows=args.chunk_rows)
+            except ValueError as exc:
+                parser.error(str(exc))
+    else:
+        if not os.path.exists(args.path):
+            parser.error(f"No such file: {args.path}")
+        report = import_sensor_readings(args.path, args.tenant)
+    print_report(report)
+
+if __name__ == '__main__':
+    main()
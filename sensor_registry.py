@@ -0,0 +1,192 @@
+"""In-memory index of the registered sensor fleet.
+
+SensorRegistry holds iot_sensors as column arrays with position indexes by
+location, equipment type and health band, plus sorted keys for prefix
+search over equipment and sensor ids. Filters intersect index arrays and
+top-N-worst is a partial sort of the health column, so the IoT dashboard
+can filter and page through 100k sensors without scanning them row by row.
+
+The registry is rebuilt when iot_sensors changes or new health scores are
+published by the fleet_health task.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from iot_data import health_from_moments
+from models import get_sensor_records, get_sensor_version
+from tenancy import resolve_tenant
+
+# Health band names and the upper score bound of each band
+HEALTH_BANDS = [('Critical', 60), ('Poor', 75), ('Fair', 90), ('Good', np.inf)]
+UNKNOWN_BAND = 'Unknown'
+REGISTRY_COLUMNS = ['sensor_id', 'equipment_id', 'sensor_type', 'location']
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def equipment_type(equipment_id):
+    """'Pump_12' -> 'Pump'"""
+    return equipment_id.rsplit('_', 1)[0]
+
+def health_from_channel_stats(stats):
+    """Health score per sensor from get_sensor_channel_stats rows"""
+    if not stats:
+        return {}
+    sensor_ids = [row[0] for row in stats]
+    values = np.array([row[1:] for row in stats], dtype=np.float64)
+    count = values[:, :1]
+    sums, sums_sq = values[:, 1::2], values[:, 2::2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = sums / count
+        variances = np.maximum(sums_sq - sums * means, 0) / (count - 1)
+    return dict(zip(sensor_ids, health_from_moments(means, np.sqrt(variances))))
+
+def _group_positions(values):
+    """{value: sorted row positions} for a column"""
+    codes, uniques = pd.factorize(values, sort=True)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+    return dict(zip(uniques, np.split(order, bounds)))
+
+class SensorRegistry:
+    def __init__(self, sensors, health_scores=None):
+        """
+        sensors: DataFrame or (sensor_id, equipment_id, sensor_type, location) rows.
+        health_scores: {equipment_id or sensor_id: score}.
+        """
+        frame = sensors if isinstance(sensors, pd.DataFrame) else pd.DataFrame(sensors, columns=REGISTRY_COLUMNS)
+        self.sensor_id = frame['sensor_id'].astype(str).to_numpy(dtype=object)
+        self.equipment_id = frame['equipment_id'].astype(str).to_numpy(dtype=object)
+        self.location = frame['location'].astype(str).to_numpy(dtype=object)
+        self.equipment_type = np.array([equipment_type(e) for e in self.equipment_id], dtype=object)
+
+        health_scores = pd.Series(health_scores or {}, dtype=np.float64)
+        by_equipment = health_scores.reindex(self.equipment_id).to_numpy()
+        by_sensor = health_scores.reindex(self.sensor_id).to_numpy()
+        self.health = np.where(np.isnan(by_equipment), by_sensor, by_equipment)
+
+        band = np.searchsorted([upper for _, upper in HEALTH_BANDS[:-1]], self.health, side='right')
+        self.band = np.where(np.isnan(self.health), -1, band)
+
+        self.by_location = _group_positions(self.location)
+        self.by_type = _group_positions(self.equipment_type)
+        self.by_band = {
+            name: np.flatnonzero(self.band == index) for index, (name, _) in enumerate(HEALTH_BANDS)
+        }
+        self.by_band[UNKNOWN_BAND] = np.flatnonzero(self.band == -1)
+        self.by_equipment = dict(zip(self.equipment_id, range(len(self))))
+
+        # Case-insensitive sorted keys for prefix search
+        self._search = []
+        for ids in (self.equipment_id, self.sensor_id):
+            keys = np.array([i.lower() for i in ids], dtype=str)
+            order = np.argsort(keys, kind='stable')
+            self._search.append((keys[order], order))
+        # Paging order: worst health first, unknown last, ties by equipment id
+        self._worst_first = self._search[0][1][
+            np.argsort(np.nan_to_num(self.health[self._search[0][1]], nan=np.inf), kind='stable')
+        ]
+
+    def __len__(self):
+        return len(self.sensor_id)
+
+    @property
+    def locations(self):
+        return list(self.by_location)
+
+    @property
+    def equipment_types(self):
+        return list(self.by_type)
+
+    @property
+    def bands(self):
+        return [name for name, positions in self.by_band.items() if len(positions)]
+
+    def search(self, prefix):
+        """Positions whose equipment or sensor id starts with prefix (case-insensitive)"""
+        prefix = prefix.lower()
+        matches = []
+        for keys, order in self._search:
+            begin = np.searchsorted(keys, prefix, side='left')
+            end = np.searchsorted(keys, prefix + '\U0010ffff', side='left')
+            matches.append(order[begin:end])
+        return np.unique(np.concatenate(matches))
+
+    def select(self, location=None, equipment_type=None, band=None, prefix=None):
+        """Sorted positions matching every given filter"""
+        candidates = []
+        if location is not None:
+            candidates.append(self.by_location.get(location, np.empty(0, dtype=np.intp)))
+        if equipment_type is not None:
+            candidates.append(self.by_type.get(equipment_type, np.empty(0, dtype=np.intp)))
+        if band is not None:
+            candidates.append(self.by_band.get(band, np.empty(0, dtype=np.intp)))
+        if prefix:
+            candidates.append(self.search(prefix))
+        if not candidates:
+            return np.arange(len(self))
+
+        # Intersect smallest first so later steps work on few positions
+        candidates.sort(key=len)
+        positions = candidates[0]
+        for other in candidates[1:]:
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+    def worst(self, n=10, positions=None):
+        """Up to n positions with the lowest known health, worst first"""
+        positions = np.arange(len(self)) if positions is None else np.asarray(positions)
+        positions = positions[~np.isnan(self.health[positions])]
+        if len(positions) > n:
+            positions = positions[np.argpartition(self.health[positions], n - 1)[:n]]
+        return positions[np.argsort(self.health[positions], kind='stable')]
+
+    def page(self, positions, page=0, page_size=25):
+        """One page of positions ordered worst health first, unknown health last"""
+        selected = np.zeros(len(self), dtype=bool)
+        selected[positions] = True
+        ordered = self._worst_first[selected[self._worst_first]]
+        begin = page * page_size
+        return self.frame(ordered[begin:begin + page_size])
+
+    def band_counts(self, positions=None):
+        bands = self.band if positions is None else self.band[positions]
+        counts = np.bincount(bands + 1, minlength=len(HEALTH_BANDS) + 1)
+        return dict(zip([UNKNOWN_BAND] + [name for name, _ in HEALTH_BANDS], counts.tolist()))
+
+    def frame(self, positions):
+        names = np.array([UNKNOWN_BAND] + [name for name, _ in HEALTH_BANDS], dtype=object)
+        return pd.DataFrame({
+            'equipment_id': self.equipment_id[positions],
+            'sensor_id': self.sensor_id[positions],
+            'equipment_type': self.equipment_type[positions],
+            'location': self.location[positions],
+            'health_score': self.health[positions],
+            'health_band': names[self.band[positions] + 1]
+        })
+
+    def record(self, equipment_id):
+        """Registry entry for one piece of equipment, or None"""
+        position = self.by_equipment.get(equipment_id)
+        if position is None:
+            return None
+        return self.frame([position]).iloc[0].to_dict()
+
+def get_sensor_registry(health_scores=None, health_version=None):
+    """
+    Registry of the current tenant's registered sensors, reused until
+    iot_sensors changes or a different health_version is passed.
+    """
+    tenant = resolve_tenant()
+    version = (get_sensor_version(), health_version)
+    with _registries_lock:
+        cached = _registries.get(tenant)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    registry = SensorRegistry(get_sensor_records(), health_scores)
+    with _registries_lock:
+        _registries[tenant] = (version, registry)
+    return registry
@@ -0,0 +1,115 @@
+"""Time-partitioned SQLite shard files for sensor readings.
+
+Enable with GUARDIAN_IO_SHARDING=day or GUARDIAN_IO_SHARDING=week. Readings
+are then written to shards/sensor_readings_<key>.db, one file per day or ISO
+week, so writers to different periods never share a lock and expiring old
+data is a file deletion. Queries fan out over the shards covering the
+requested window. Each tenant database has its own shard directory.
+"""
+import heapq
+import os
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+
+SHARD_MODE = os.environ.get('GUARDIAN_IO_SHARDING', '').lower()
+SHARD_DIR = os.environ.get('GUARDIAN_IO_SHARD_DIR', 'shards')
+SHARD_PREFIX = 'sensor_readings_'
+
+# Shards whose schema has been created by this process
+_initialised_shards = set()
+
+def sharding_enabled():
+    return SHARD_MODE in ('day', 'week')
+
+def utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def shard_key(moment, mode=None):
+    mode = mode or SHARD_MODE
+    if mode == 'week':
+        year, week, _ = moment.isocalendar()
+        return f'{year}W{week:02d}'
+    return moment.strftime('%Y%m%d')
+
+def shard_bounds(key):
+    """Half-open [start, end) datetime range covered by a shard key"""
+    if 'W' in key:
+        year, week = key.split('W')
+        start = date.fromisocalendar(int(year), int(week), 1)
+        end = start + timedelta(days=7)
+    else:
+        start = datetime.strptime(key, '%Y%m%d').date()
+        end = start + timedelta(days=1)
+    return datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+
+def shard_path(key, directory=SHARD_DIR):
+    return os.path.join(directory, f'{SHARD_PREFIX}{key}.db')
+
+def list_shards(directory=SHARD_DIR):
+    """All shard keys on disk, oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    keys = [
+        name[len(SHARD_PREFIX):-3]
+        for name in os.listdir(directory)
+        if name.startswith(SHARD_PREFIX) and name.endswith('.db')
+    ]
+    return sorted(keys)
+
+def shards_between(start, end=None, directory=SHARD_DIR):
+    """Shard keys whose time range overlaps [start, end], oldest first"""
+    selected = []
+    for key in list_shards(directory):
+        shard_start, shard_end = shard_bounds(key)
+        if shard_end > start and (end is None or shard_start <= end):
+            selected.append(key)
+    return selected
+
+def ensure_shard(key, init_schema, directory=SHARD_DIR):
+    """Create the shard file and schema the first time this process touches it"""
+    path = shard_path(key, directory)
+    if path not in _initialised_shards:
+        os.makedirs(directory, exist_ok=True)
+        init_schema(path)
+        _initialised_shards.add(path)
+    return path
+
+def forget_shard(key, directory=SHARD_DIR):
+    _initialised_shards.discard(shard_path(key, directory))
+
+def query_shards(keys, query, params=(), directory=SHARD_DIR):
+    """Run the same query against each shard in order and concatenate the rows"""
+    rows = []
+    for key in keys:
+        conn = sqlite3.connect(shard_path(key, directory))
+        c = conn.cursor()
+        try:
+            c.execute(query, params)
+            rows.extend(c.fetchall())
+        except sqlite3.OperationalError:
+            # Shard created by another process but its schema is not committed yet
+            pass
+        finally:
+            conn.close()
+    return rows
+
+def merge_shards(keys, query, params=(), key=None, directory=SHARD_DIR):
+    """
+    Stream the same query from each shard, merged on key. Each shard's rows
+    must be ordered by key; rows with equal keys keep the order of keys.
+    """
+    conns = []
+    cursors = []
+    try:
+        for shard in keys:
+            conn = sqlite3.connect(shard_path(shard, directory))
+            conns.append(conn)
+            try:
+                cursors.append(conn.execute(query, params))
+            except sqlite3.OperationalError:
+                # Shard created by another process but its schema is not committed yet
+                pass
+        yield from heapq.merge(*cursors, key=key)
+    finally:
+        for conn in conns:
+            conn.close()
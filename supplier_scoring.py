@@ -0,0 +1,155 @@
+"""Weighted multi-criteria ranking of suppliers.
+
+Every supplier is scored on all five criteria from generate_supplier_data,
+each either a benefit (higher is better) or a cost (lower is better), under
+a weight profile. Two methods are offered:
+
+- TOPSIS: closeness of each supplier to the ideal supplier relative to the
+  anti-ideal one, after scaling each criterion by its vector norm.
+- Weighted z-score: the weighted sum of each criterion's standard score,
+  with cost criteria negated.
+
+SupplierScorer does the weight-independent work once per supplier table, so
+a weight change costs two matrix-vector products. Scores are cached per
+weight profile and top-k selection is a partial sort with argpartition.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Criterion -> +1 if higher is better, -1 if lower is better
+CRITERIA = {
+    'risk_score': -1,
+    'performance_score': 1,
+    'delivery_time': -1,
+    'quality_score': 1,
+    'cost_variance': -1
+}
+METHODS = ['topsis', 'zscore']
+WEIGHT_PROFILES = {
+    'Balanced': {'risk_score': 1, 'performance_score': 1, 'delivery_time': 1, 'quality_score': 1, 'cost_variance': 1},
+    'Risk averse': {'risk_score': 4, 'performance_score': 1, 'delivery_time': 1, 'quality_score': 2, 'cost_variance': 1},
+    'Cost focused': {'risk_score': 1, 'performance_score': 1, 'delivery_time': 1, 'quality_score': 1, 'cost_variance': 4},
+    'Fast delivery': {'risk_score': 1, 'performance_score': 2, 'delivery_time': 4, 'quality_score': 1, 'cost_variance': 1},
+    'Quality first': {'risk_score': 1, 'performance_score': 2, 'delivery_time': 1, 'quality_score': 4, 'cost_variance': 1}
+}
+# Score arrays kept per scorer; each holds one float per supplier
+MAX_CACHED_PROFILES = 16
+MAX_CACHED_SCORERS = 4
+
+_scorers = OrderedDict()
+_scorers_lock = threading.Lock()
+
+def normalize_weights(weights):
+    """Weights in CRITERIA order summing to 1; missing criteria weigh 0"""
+    if isinstance(weights, str):
+        weights = WEIGHT_PROFILES[weights]
+    vector = np.array([float(weights.get(name, 0)) for name in CRITERIA], dtype=np.float64)
+    if (vector < 0).any() or vector.sum() <= 0:
+        raise ValueError("Weights must be non-negative with at least one positive")
+    return vector / vector.sum()
+
+def criteria_matrix(suppliers):
+    """(suppliers, criteria) float64 matrix in CRITERIA order"""
+    return np.column_stack([suppliers[name].to_numpy(dtype=np.float64) for name in CRITERIA])
+
+class SupplierScorer:
+    def __init__(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float64)
+        direction = np.array(list(CRITERIA.values()), dtype=np.float64)
+
+        # TOPSIS: with weights w, the distance to the ideal is sqrt(((r - best)^2) @ w^2)
+        norms = np.sqrt((matrix * matrix).sum(axis=0))
+        scaled = matrix / np.where(norms > 0, norms, 1)
+        best = np.where(direction > 0, scaled.max(axis=0), scaled.min(axis=0))
+        worst = np.where(direction > 0, scaled.min(axis=0), scaled.max(axis=0))
+        self._to_ideal = np.square(scaled - best)
+        self._to_anti_ideal = np.square(scaled - worst)
+
+        # Standard scores, oriented so higher is always better
+        std = matrix.std(axis=0)
+        self._zscores = (matrix - matrix.mean(axis=0)) / np.where(std > 0, std, 1) * direction
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def __len__(self):
+        return len(self._zscores)
+
+    def scores(self, weights, method='topsis'):
+        """Score per supplier under a weight profile (name or {criterion: weight}); higher is better"""
+        vector = normalize_weights(weights)
+        key = (method, tuple(vector.round(12)))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats['hits'] += 1
+                return cached
+            self.stats['misses'] += 1
+
+        if method == 'topsis':
+            squared = vector * vector
+            to_ideal = np.sqrt(self._to_ideal @ squared)
+            to_anti_ideal = np.sqrt(self._to_anti_ideal @ squared)
+            total = to_ideal + to_anti_ideal
+            scores = np.divide(to_anti_ideal, total, out=np.full(len(self), 0.5), where=total > 0)
+        elif method == 'zscore':
+            scores = self._zscores @ vector
+        else:
+            raise ValueError(f"Unknown scoring method: {method}")
+        scores.flags.writeable = False
+
+        with self._lock:
+            self._cache[key] = scores
+            while len(self._cache) > MAX_CACHED_PROFILES:
+                self._cache.popitem(last=False)
+        return scores
+
+    def top_k(self, k, weights, method='topsis'):
+        """Positions of the k best suppliers, best first"""
+        scores = self.scores(weights, method)
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        if k < len(scores):
+            positions = np.argpartition(-scores, k - 1)[:k]
+        else:
+            positions = np.arange(len(scores))
+        return positions[np.argsort(-scores[positions], kind='stable')]
+
+
+def get_supplier_scorer(suppliers):
+    """Scorer for a supplier table, reused while the same criteria values are passed again"""
+    # Hash the columns as stored; the float64 matrix is only built on a miss
+    digest = hashlib.blake2b(digest_size=16)
+    for name in CRITERIA:
+        column = np.ascontiguousarray(suppliers[name].to_numpy())
+        digest.update(column.dtype.str.encode())
+        digest.update(memoryview(column).cast('B'))
+    key = digest.digest()
+    with _scorers_lock:
+        scorer = _scorers.get(key)
+        if scorer is not None:
+            _scorers.move_to_end(key)
+            return scorer
+
+    scorer = SupplierScorer(criteria_matrix(suppliers))
+    with _scorers_lock:
+        _scorers[key] = scorer
+        while len(_scorers) > MAX_CACHED_SCORERS:
+            _scorers.popitem(last=False)
+    return scorer
+
+def rank_suppliers(suppliers, weights='Balanced', method='topsis', k=10):
+    """The k best suppliers under a weight profile with their score and rank"""
+    scorer = get_supplier_scorer(suppliers)
+    positions = scorer.top_k(k, weights, method)
+    scores = scorer.scores(weights, method)
+    ranked = suppliers.iloc[positions].copy()
+    ranked.insert(0, 'rank', np.arange(1, len(positions) + 1))
+    ranked['score'] = scores[positions]
+    return ranked.reset_index(drop=True)
@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 from sklearn.preprocessing import MinMaxScaler
 import random
 
+from schemas import apply_schema
+
 def generate_supplier_data(n_suppliers=10):
     """Generate mock supplier data with risk and performance metrics"""
     locations = ['USA', 'China', 'India', 'Germany', 'Brazil', 'Japan', 'Mexico', 'Vietnam', 'Thailand', 'Malaysia']
@@ -22,7 +24,7 @@ def generate_supplier_data(n_suppliers=10):
         }
         suppliers.append(supplier)
     
-    return pd.DataFrame(suppliers)
+    return apply_schema(pd.DataFrame(suppliers), 'suppliers')
 
 def generate_risk_metrics():
     """Generate risk metrics data for visualization"""
@@ -38,7 +40,7 @@ def generate_risk_metrics():
         'geopolitical_risk': 6 + np.random.normal(0, 0.2, len(dates))
     }
     
-    return pd.DataFrame(risk_data)
+    return apply_schema(pd.DataFrame(risk_data), 'risk_metrics')
 
 def generate_supply_chain_events(n_events=50):
     """Generate mock supply chain events for the event log"""
@@ -62,7 +64,7 @@ def generate_supply_chain_events(n_events=50):
     
     df = pd.DataFrame(events)
     df = df.sort_values('timestamp')
-    return df
+    return apply_schema(df, 'supply_chain_events')
 
 def predict_risk_trends(risk_data, days_to_predict=30):
     """Generate predictions for risk metrics"""
@@ -1,20 +1,48 @@
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
+from models import search_supply_chain_events
+from utils import load_stored_result, render_faceted_search
+from sections import Panel, Source, render_panels, stored_sources
 from supply_chain_data import (
     generate_supplier_data, generate_risk_metrics,
     generate_supply_chain_events, predict_risk_trends
 )
+from supply_chain_scenarios import RISK_COLUMNS, get_risk_scenarios
+from supplier_scoring import CRITERIA, WEIGHT_PROFILES, rank_suppliers
+
+def supply_chain_sources(stored=None):
+    """Data sources for the dashboard panels, served from a precomputed artifact when available"""
+    return stored_sources(stored, [
+        Source('supplier_data', generate_supplier_data),
+        Source('risk_metrics', generate_risk_metrics),
+        Source('events_data', generate_supply_chain_events),
+        Source('risk_predictions', lambda risk_metrics: predict_risk_trends(risk_metrics), ['risk_metrics'])
+    ])
 
 def render_supply_chain_dashboard():
     st.header("Supply Chain Risk Management Dashboard")
-    
-    # Generate data
-    supplier_data = generate_supplier_data()
-    risk_metrics = generate_risk_metrics()
-    events_data = generate_supply_chain_events()
-    risk_predictions = predict_risk_trends(risk_metrics)
-    
+
+    stored = load_stored_result('supply_chain_risk')
+    if stored is None:
+        # Sample data is drawn once per session, so widget changes reuse it and its cached scenarios
+        stored = st.session_state.get('supply_chain_sample')
+
+    # Independent sources load concurrently and each panel draws as soon as its data arrives
+    sources = supply_chain_sources(stored)
+    data, _ = render_panels(sources, [
+        Panel("supplier KPIs", render_supplier_kpis, ['supplier_data']),
+        Panel("supplier risk map", render_risk_map, ['supplier_data']),
+        Panel("supplier ranking", render_supplier_ranking, ['supplier_data']),
+        Panel("risk trends", render_risk_trends, ['risk_metrics', 'risk_predictions']),
+        Panel("risk scenarios", render_risk_scenarios, ['risk_metrics', 'supplier_data']),
+        Panel("supply chain events", render_events_log, ['events_data']),
+        Panel("event search", render_event_search)
+    ])
+    if stored is None and len(data) == len(sources):
+        st.session_state.supply_chain_sample = data
+
+def render_supplier_kpis(supplier_data):
     # Top KPIs
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -29,7 +57,8 @@ def render_supply_chain_dashboard():
         st.metric("Active Suppliers", 
                  len(supplier_data),
                  "0")
-    
+
+def render_risk_map(supplier_data):
     # Risk Map
     st.subheader("Supplier Risk Map")
     fig_risk_map = px.scatter(supplier_data,
@@ -41,7 +70,43 @@ def render_supply_chain_dashboard():
                              title='Supplier Risk vs Performance Matrix')
     fig_risk_map.update_layout(height=500)
     st.plotly_chart(fig_risk_map, use_container_width=True)
-    
+
+def render_supplier_ranking(supplier_data):
+    # Multi-criteria supplier ranking
+    st.subheader("Supplier Ranking")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        profile = st.selectbox("Weight profile", list(WEIGHT_PROFILES) + ['Custom'], key='supplier_weight_profile')
+    with col2:
+        method = st.radio("Method", ['topsis', 'zscore'], horizontal=True, key='supplier_rank_method',
+                          format_func=lambda name: {'topsis': 'TOPSIS', 'zscore': 'Weighted z-score'}[name])
+    with col3:
+        top_k = st.number_input("Top suppliers", min_value=1, max_value=100, value=10, key='supplier_top_k')
+
+    weights = WEIGHT_PROFILES['Balanced'] if profile == 'Custom' else WEIGHT_PROFILES[profile]
+    if profile == 'Custom':
+        weight_cols = st.columns(len(CRITERIA))
+        weights = {
+            name: weight_cols[idx].slider(
+                name.replace('_', ' ').title(), min_value=0, max_value=5, value=weights[name],
+                key=f'supplier_weight_{name}'
+            )
+            for idx, name in enumerate(CRITERIA)
+        }
+    if not any(weights.values()):
+        st.warning("Give at least one criterion a positive weight")
+        return
+
+    ranked = rank_suppliers(supplier_data, weights, method, int(top_k))
+    st.caption(f"Top {len(ranked)} of {len(supplier_data):,} suppliers; lower risk, delivery time and "
+               "cost variance rank higher")
+    st.dataframe(
+        ranked.style.format({'score': '{:.3f}'}),
+        use_container_width=True,
+        hide_index=True
+    )
+
+def render_risk_trends(risk_metrics, risk_predictions):
     # Risk Trends with Predictions
     st.subheader("Risk Trends and Forecasts")
     risk_metrics_long = risk_metrics.melt(
@@ -75,7 +140,56 @@ def render_supply_chain_dashboard():
         showlegend=True
     )
     st.plotly_chart(fig_risks, use_container_width=True)
-    
+
+def render_risk_scenarios(risk_metrics, supplier_data):
+    # Monte Carlo Scenarios
+    st.subheader("Monte Carlo Risk Scenarios")
+    if st.toggle("Run scenario simulation", key='run_risk_scenarios'):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            n_paths = st.select_slider("Simulated paths", options=[1000, 10000, 50000, 100000], value=10000)
+        with col2:
+            horizon_days = st.slider("Horizon (days)", min_value=30, max_value=365, value=90, step=30)
+        with col3:
+            scenario_risk = st.selectbox(
+                "Risk metric", RISK_COLUMNS,
+                format_func=lambda risk_type: risk_type.replace('_', ' ').title()
+            )
+
+        # Switching the risk metric or any other widget reuses the simulation
+        scenarios = get_risk_scenarios(risk_metrics, supplier_data, n_paths=n_paths, horizon_days=horizon_days)
+        fan = scenarios['fan_charts'][scenario_risk]
+
+        fig_fan = go.Figure()
+        for lower, upper, opacity in (('p05', 'p95', 0.15), ('p25', 'p75', 0.3)):
+            fig_fan.add_trace(go.Scatter(
+                x=fan['date'], y=fan[upper], line=dict(width=0), showlegend=False, hoverinfo='skip'
+            ))
+            fig_fan.add_trace(go.Scatter(
+                x=fan['date'], y=fan[lower], line=dict(width=0), fill='tonexty',
+                fillcolor=f'rgba(0, 102, 204, {opacity})', name=f'{lower[1:]}–{upper[1:]}th percentile'
+            ))
+        fig_fan.add_trace(go.Scatter(
+            x=fan['date'], y=fan['p50'], name='Median', line=dict(color='#0066cc', width=2)
+        ))
+        fig_fan.update_layout(
+            title=f'{scenario_risk.replace("_", " ").title()} - {n_paths:,} Simulated Paths',
+            height=400
+        )
+        st.plotly_chart(fig_fan, use_container_width=True)
+
+        st.markdown("**Expected loss by supplier over the horizon**")
+        st.dataframe(
+            scenarios['supplier_losses'].style.format({
+                'expected_loss': '${:,.0f}',
+                'loss_p95': '${:,.0f}',
+                'expected_disruptions': '{:.2f}'
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+def render_events_log(events_data):
     # Supply Chain Events Log
     st.subheader("Recent Supply Chain Events")
     events_df = events_data.sort_values('timestamp', ascending=False)
@@ -99,3 +213,14 @@ def render_supply_chain_dashboard():
             """,
             unsafe_allow_html=True
         )
+
+def render_event_search():
+    # Full-text search over stored events
+    st.subheader("Search Supply Chain Events")
+    render_faceted_search(
+        'event_search', "Search event descriptions", search_supply_chain_events,
+        [('severity', 'severity', "Severity"), ('event_type', 'event_type', "Event type"),
+         ('supplier', 'supplier_id', "Supplier")],
+        ['ID', 'Time', 'Supplier ID', 'Supplier', 'Type', 'Severity', 'Description'],
+        placeholder="e.g. port strike"
+    )
@@ -0,0 +1,166 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+RISK_COLUMNS = ['supply_disruption_risk', 'quality_risk', 'cost_risk', 'geopolitical_risk']
+MAX_CACHED_SCENARIOS = 8
+
+_scenarios = OrderedDict()
+_scenarios_lock = threading.Lock()
+
+def fit_risk_dynamics(risk_data):
+    """
+    Fit a mean-reverting AR(1) model per risk column and the covariance of
+    their residuals, so simulated shocks keep the historical cross-correlation
+    """
+    values = risk_data[RISK_COLUMNS].to_numpy(dtype=np.float64)
+    mean = values.mean(axis=0)
+    centred = values - mean
+
+    prev, curr = centred[:-1], centred[1:]
+    phi = (prev * curr).sum(axis=0) / (prev * prev).sum(axis=0)
+    phi = np.clip(phi, -0.999, 0.999)
+
+    residuals = curr - phi * prev
+    covariance = np.cov(residuals, rowvar=False)
+    # Small ridge keeps the Cholesky factorisation stable for near-singular inputs
+    cholesky = np.linalg.cholesky(covariance + 1e-9 * np.eye(len(RISK_COLUMNS)))
+
+    return {
+        'mean': mean,
+        'phi': phi,
+        'cholesky': cholesky,
+        'correlation': np.corrcoef(residuals, rowvar=False),
+        'last': values[-1]
+    }
+
+def supplier_loss_factors(supplier_data, daily_spend=10000.0):
+    """Per-supplier multipliers used to turn simulated risk levels into daily losses"""
+    spend = np.broadcast_to(np.asarray(daily_spend, dtype=np.float64), (len(supplier_data),))
+    return {
+        # Relative likelihood of a disruption compared to the average supplier
+        'disruption_weight': (supplier_data['risk_score'] / supplier_data['risk_score'].mean()).to_numpy(),
+        # A disruption costs the spend for the days needed to re-source the delivery
+        'disruption_cost': spend * supplier_data['delivery_time'].to_numpy(),
+        'cost_exposure': spend * (1 + supplier_data['cost_variance'].to_numpy() / 100),
+        'quality_exposure': spend * (100 - supplier_data['quality_score'].to_numpy()) / 100
+    }
+
+def simulate_risk_scenarios(risk_data, supplier_data, n_paths=10000, horizon_days=365,
+                            quantiles=(0.05, 0.25, 0.5, 0.75, 0.95), daily_spend=10000.0,
+                            base_disruption_rate=0.01, max_chunk_elements=4_000_000, seed=None):
+    """
+    Monte Carlo simulation of the four risk metrics with correlated shocks.
+
+    All paths advance together one day at a time as array operations, and the
+    horizon is processed in chunks of days sized so that no intermediate array
+    exceeds max_chunk_elements. Each chunk's quantiles are exact because every
+    path is present in it, and losses are accumulated per path and supplier.
+
+    Returns a dict with a quantile fan DataFrame per risk column, expected and
+    95th percentile loss per supplier, and the fitted shock correlation matrix.
+    """
+    rng = np.random.default_rng(seed)
+    dynamics = fit_risk_dynamics(risk_data)
+    factors = supplier_loss_factors(supplier_data, daily_spend)
+
+    n_risks = len(RISK_COLUMNS)
+    n_suppliers = len(supplier_data)
+    mean = dynamics['mean'].astype(np.float32)[:, None]
+    phi = dynamics['phi'].astype(np.float32)[:, None]
+    cholesky = dynamics['cholesky'].astype(np.float32)
+    disruption_mean, quality_mean, cost_mean, geo_mean = dynamics['mean']
+
+    disruption_weight = factors['disruption_weight']
+    disruption_scale = base_disruption_rate * disruption_weight
+    max_disruption_scale = disruption_scale.max()
+
+    # Arrays are laid out (day, risk, path) so per-day quantiles over paths run on contiguous memory
+    chunk_days = max(1, min(horizon_days, max_chunk_elements // (n_paths * max(n_risks, n_suppliers))))
+    quantiles = np.asarray(quantiles)
+
+    state = np.repeat(dynamics['last'].astype(np.float32)[:, None] - mean, n_paths, axis=1)
+    fan = np.empty((len(quantiles), horizon_days, n_risks), dtype=np.float32)
+    path_losses = np.zeros((n_paths, n_suppliers), dtype=np.float64)
+    expected_disruptions = np.zeros(n_suppliers, dtype=np.float64)
+
+    for start in range(0, horizon_days, chunk_days):
+        days = min(chunk_days, horizon_days - start)
+        chunk = cholesky @ rng.standard_normal((days, n_risks, n_paths), dtype=np.float32)
+        for day in range(days):
+            state = phi * state + chunk[day]
+            chunk[day] = state
+        chunk += mean
+
+        fan[:, start:start + days] = np.quantile(chunk, quantiles, axis=2)
+
+        # Daily disruption probability scales with the disruption and geopolitical
+        # levels relative to their means and with each supplier's relative risk
+        pressure = np.maximum((chunk[:, 0] / disruption_mean) * (chunk[:, 3] / geo_mean), 0)
+        cost_excess = np.maximum(chunk[:, 2] / cost_mean - 1, 0).sum(axis=0, dtype=np.float64)
+        quality_excess = np.maximum(chunk[:, 1] / quality_mean - 1, 0).sum(axis=0, dtype=np.float64)
+
+        if pressure.max() * max_disruption_scale <= 1:
+            # No probability reaches 1, so losses are linear in the summed pressure
+            probability = np.outer(pressure.sum(axis=0, dtype=np.float64), disruption_scale)
+        else:
+            probability = np.minimum(pressure[..., None] * disruption_scale, 1).sum(axis=0, dtype=np.float64)
+
+        path_losses += (
+            probability * factors['disruption_cost']
+            + np.outer(cost_excess, factors['cost_exposure'])
+            + np.outer(quality_excess, factors['quality_exposure'])
+        )
+        expected_disruptions += probability.mean(axis=0)
+
+    future_dates = pd.date_range(
+        start=risk_data['date'].iloc[-1] + timedelta(days=1),
+        periods=horizon_days,
+        freq='D'
+    )
+    fan_charts = {}
+    for idx, column in enumerate(RISK_COLUMNS):
+        frame = pd.DataFrame({'date': future_dates})
+        for q_idx, q in enumerate(quantiles):
+            frame[f'p{round(q * 100):02d}'] = fan[q_idx, :, idx]
+        fan_charts[column] = frame
+
+    supplier_losses = pd.DataFrame({
+        'name': supplier_data['name'].to_numpy(),
+        'expected_loss': path_losses.mean(axis=0),
+        'loss_p95': np.quantile(path_losses, 0.95, axis=0),
+        'expected_disruptions': expected_disruptions
+    }).sort_values('expected_loss', ascending=False, ignore_index=True)
+
+    return {
+        'fan_charts': fan_charts,
+        'supplier_losses': supplier_losses,
+        'correlation': pd.DataFrame(dynamics['correlation'], index=RISK_COLUMNS, columns=RISK_COLUMNS),
+        'n_paths': n_paths,
+        'horizon_days': horizon_days
+    }
+
+def _frame_key(frame):
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes()
+
+def get_risk_scenarios(risk_data, supplier_data, n_paths=10000, horizon_days=365):
+    """
+    simulate_risk_scenarios for the given inputs, reused until the risk
+    history, suppliers, path count or horizon change
+    """
+    key = (_frame_key(risk_data), _frame_key(supplier_data), n_paths, horizon_days)
+    with _scenarios_lock:
+        cached = _scenarios.get(key)
+        if cached is not None:
+            _scenarios.move_to_end(key)
+            return cached
+
+    scenarios = simulate_risk_scenarios(risk_data, supplier_data, n_paths=n_paths, horizon_days=horizon_days)
+    with _scenarios_lock:
+        _scenarios[key] = scenarios
+        while len(_scenarios) > MAX_CACHED_SCENARIOS:
+            _scenarios.popitem(last=False)
+    return scenarios
@@ -0,0 +1,155 @@
+from data_generator import (
+    generate_manufacturing_data, generate_healthcare_data,
+    get_manufacturing_predictions, get_healthcare_predictions
+)
+from supply_chain_data import (
+    generate_supplier_data, generate_risk_metrics,
+    generate_supply_chain_events, predict_risk_trends
+)
+from iot_data import (
+    generate_sensor_data,
+    predict_maintenance_needs,
+    calculate_health_scores
+)
+from iot_drift import detect_sensor_drift
+from rul import estimate_fleet_rul
+from kpi_store import get_kpi_history, default_kpi_window
+from kpi_analytics import (
+    build_kpi_analytics, MANUFACTURING_METRICS, MANUFACTURING_CORRELATION_METRICS
+)
+from manufacturing_whatif import whatif_baseline
+from models import (
+    get_sensor_readings, iter_fleet_readings, detect_anomalies, get_active_alerts, get_sensors,
+    get_sensor_channel_stats
+)
+from alert_pipeline import anomaly_alerts, submit_alerts
+from anomaly_prefilter import detect_fleet_anomalies
+from sensor_registry import health_from_channel_stats
+from shards import utc_now
+from tenancy import tenant_scope, tenant_slug
+
+def kpi_history(tenant, start, end, generate):
+    """Stored KPI history for the window (the latest year by default), else the sample year"""
+    if start is None and end is None:
+        start, end = default_kpi_window(tenant) or (None, None)
+    data = get_kpi_history(tenant, start, end)
+    return generate() if data.empty else data
+
+def manufacturing_forecast(start=None, end=None):
+    """Historical manufacturing KPIs with their regression forecasts, drill-down analytics and what-if baseline"""
+    data = kpi_history('Manufacturing', start, end, generate_manufacturing_data)
+    return {
+        'data': data,
+        'predictions': get_manufacturing_predictions(data),
+        'analytics': build_kpi_analytics(data, MANUFACTURING_METRICS, MANUFACTURING_CORRELATION_METRICS),
+        'whatif_baseline': whatif_baseline(data)
+    }
+
+def healthcare_forecast(start=None, end=None):
+    """Historical healthcare KPIs with their regression forecasts"""
+    data = kpi_history('Healthcare', start, end, generate_healthcare_data)
+    return {
+        'data': data,
+        'predictions': get_healthcare_predictions(data)
+    }
+
+def supply_chain_risk():
+    """Supplier, risk metric and event data with risk trend forecasts"""
+    risk_metrics = generate_risk_metrics()
+    return {
+        'supplier_data': generate_supplier_data(),
+        'risk_metrics': risk_metrics,
+        'events_data': generate_supply_chain_events(),
+        'risk_predictions': predict_risk_trends(risk_metrics)
+    }
+
+def iot_fleet(num_sensors=5, hours=24):
+    """Sensor readings with fleet health scores and maintenance predictions"""
+    readings_df, sensors_df = generate_sensor_data(num_sensors, hours)
+    return {
+        'readings': readings_df,
+        'sensors': sensors_df,
+        'health_scores': calculate_health_scores(readings_df),
+        'maintenance_predictions': predict_maintenance_needs(readings_df),
+        'drift_alerts': detect_sensor_drift(readings_df),
+        'rul': estimate_fleet_rul(readings_df)
+    }
+
+def sensor_anomalies(sensor_id, hours=24, contamination=0.1):
+    """Isolation Forest anomaly indices for a stored sensor's readings"""
+    readings = get_sensor_readings(sensor_id, hours)
+    return {
+        'readings': readings,
+        'anomalies': detect_anomalies(readings, contamination)
+    }
+
+def alert_scan(hours=1, contamination=0.1, prefilter=True, chunk_sensors=500):
+    """
+    Run anomaly detection over every registered sensor and feed the alert pipeline.
+    Readings are streamed from one query and screened chunk_sensors sensors at
+    a time. With prefilter, each chunk is screened at once and only suspicious
+    sensors are fitted with an Isolation Forest.
+    """
+    sensors = {sensor_id: (equipment_id, location) for sensor_id, equipment_id, location in get_sensors()}
+    alerts = []
+    for readings in iter_fleet_readings(hours, chunk_sensors):
+        # Readings of sensors no longer registered are not scanned
+        readings = {sensor_id: rows for sensor_id, rows in readings.items() if sensor_id in sensors}
+        if prefilter:
+            anomalies = detect_fleet_anomalies(readings, contamination)
+        else:
+            anomalies = {sensor_id: detect_anomalies(rows, contamination) for sensor_id, rows in readings.items()}
+        for sensor_id, indices in anomalies.items():
+            equipment_id, location = sensors[sensor_id]
+            for alert in anomaly_alerts(equipment_id, readings[sensor_id], indices):
+                alerts.append(dict(alert, location=location))
+    return submit_alerts(alerts)
+
+def fleet_health(hours=1):
+    """Health score per registered sensor's equipment from the last `hours` of readings"""
+    scores = health_from_channel_stats(get_sensor_channel_stats(hours))
+    equipment = {sensor_id: equipment_id for sensor_id, equipment_id, _ in get_sensors()} if scores else {}
+    return {
+        'health_scores': {equipment.get(sensor_id, sensor_id): float(score) for sensor_id, score in scores.items()},
+        'computed_at': utc_now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def active_alert_summary():
+    """Counts of unresolved maintenance alerts by severity and equipment"""
+    alerts = get_active_alerts()
+    by_severity = {}
+    by_equipment = {}
+    for alert in alerts:
+        by_severity[alert[3]] = by_severity.get(alert[3], 0) + 1
+        # Alert storms belong to a location, not to equipment
+        if alert[1] is not None:
+            by_equipment[alert[1]] = by_equipment.get(alert[1], 0) + 1
+    return {
+        'total': len(alerts),
+        'by_severity': by_severity,
+        'by_equipment': by_equipment
+    }
+
+TASKS = {
+    'manufacturing_forecast': manufacturing_forecast,
+    'healthcare_forecast': healthcare_forecast,
+    'supply_chain_risk': supply_chain_risk,
+    'iot_fleet': iot_fleet,
+    'sensor_anomalies': sensor_anomalies,
+    'alert_scan': alert_scan,
+    'fleet_health': fleet_health,
+    'active_alert_summary': active_alert_summary
+}
+
+# Tasks that read tenant data; their params carry the tenant they run for
+TENANT_SCOPED_TASKS = {'sensor_anomalies', 'alert_scan', 'fleet_health', 'active_alert_summary'}
+
+def artifact_name(task, tenant=None):
+    return f'{task}@{tenant_slug(tenant)}' if tenant else task
+
+def run_task(task, params=None):
+    if task not in TASKS:
+        raise KeyError(f"Unknown task: {task}")
+    params = dict(params or {})
+    with tenant_scope(params.pop('tenant', None)):
+        return TASKS[task](**params)
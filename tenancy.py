@@ -0,0 +1,129 @@
+"""Tenant resolution and per-tenant SQLite connection pools.
+
+Operational data (suppliers, events, sensors, readings and alerts) lives in one
+database file per industry tenant, e.g. guardian_io_manufacturing.db, so a
+large tenant's tables and locks never slow down a small one. Users, jobs and
+precomputed results stay in the shared guardian_io.db.
+
+The tenant is taken from tenant_scope() when set (workers, scheduler, CLI
+tools) and otherwise from the logged-in user's industry in the Streamlit
+session. Without either, the shared database is used.
+"""
+import contextvars
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import streamlit as st
+
+from shards import SHARD_DIR
+
+SHARED_DB_PATH = 'guardian_io.db'
+TENANTS = ['Manufacturing', 'Healthcare']
+POOL_MAX_IDLE = 4
+
+# Default for functions that act on the session's tenant; None means the shared database
+CURRENT_TENANT = object()
+
+_tenant_override = contextvars.ContextVar('guardian_io_tenant', default=None)
+_pools = {}
+_pools_lock = threading.Lock()
+
+def tenant_slug(tenant):
+    return tenant.strip().lower().replace(' ', '_')
+
+def tenant_db_path(tenant):
+    if tenant is None:
+        return SHARED_DB_PATH
+    root, ext = os.path.splitext(SHARED_DB_PATH)
+    return f'{root}_{tenant_slug(tenant)}{ext}'
+
+def tenant_shard_dir(tenant):
+    if tenant is None:
+        return SHARD_DIR
+    return os.path.join(SHARD_DIR, tenant_slug(tenant))
+
+@contextmanager
+def tenant_scope(tenant):
+    """Scope models.py queries to a tenant outside of a Streamlit session"""
+    token = _tenant_override.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _tenant_override.reset(token)
+
+def current_tenant():
+    tenant = _tenant_override.get()
+    if tenant is not None:
+        return tenant
+    if st.runtime.exists():
+        return st.session_state.get('industry')
+    return None
+
+class ConnectionPool:
+    """Keeps a few idle connections to one database file for reuse across reruns"""
+
+    def __init__(self, path, max_idle=POOL_MAX_IDLE):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        # Connections move between Streamlit session threads, one user at a time
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+class PooledConnection:
+    """sqlite3 connection proxy whose close() hands the connection back to its pool"""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._conn = pool.acquire()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+def get_pool(path):
+    with _pools_lock:
+        if path not in _pools:
+            _pools[path] = ConnectionPool(path)
+        return _pools[path]
+
+def resolve_tenant(tenant=CURRENT_TENANT):
+    return current_tenant() if tenant is CURRENT_TENANT else tenant
+
+def get_connection(tenant=CURRENT_TENANT):
+    """Pooled connection to the current tenant's database, or to an explicit tenant's"""
+    path = tenant_db_path(resolve_tenant(tenant))
+    return PooledConnection(get_pool(path))
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.clear()
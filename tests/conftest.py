@@ -0,0 +1,17 @@
+import pytest
+
+from models import init_db, init_tenant_databases
+from query_cache import clear_query_cache
+from tenancy import close_pools
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Fresh shared and tenant databases in a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    close_pools()
+    clear_query_cache()
+    init_db()
+    init_tenant_databases()
+    yield tmp_path
+    close_pools()
+    clear_query_cache()
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from anomaly_prefilter import detect_fleet_anomalies, screen_sensors
+
+MEANS = np.array([70.0, 0.5, 100.0, 50.0])
+SPREADS = np.array([1.0, 0.05, 2.0, 1.0])
+
+def _rows(sensor_id, values):
+    """get_sensor_readings rows for an (n, 4) array of channel values"""
+    return [(i, sensor_id, *map(float, row), f'2024-01-01 00:{i % 60:02d}:00') for i, row in enumerate(values)]
+
+def _clean_fleet(rng, n_sensors, n_readings):
+    return {
+        f'S{i}': _rows(f'S{i}', rng.normal(MEANS, SPREADS, (n_readings, 4))) for i in range(n_sensors)
+    }
+
+@pytest.mark.parametrize('false_alarm_rate', [0.01, 0.1])
+def test_clean_sensors_are_flagged_at_about_the_false_alarm_rate(false_alarm_rate):
+    fleet = _clean_fleet(np.random.default_rng(0), 1000, 60)
+    screens = screen_sensors(fleet, false_alarm_rate)
+    flagged = sum(bool(screen['flagged']) for screen in screens.values()) / len(fleet)
+    assert flagged <= 2 * false_alarm_rate
+
+def test_spikes_and_level_shifts_are_flagged():
+    rng = np.random.default_rng(1)
+    fleet = _clean_fleet(rng, 20, 60)
+    spike = rng.normal(MEANS, SPREADS, (60, 4))
+    spike[30, 1] += 10 * SPREADS[1]
+    fleet['spike'] = _rows('spike', spike)
+    # The last ten readings move up, as in benchmarks.anomaly_prefilter
+    shift = rng.normal(MEANS, SPREADS, (60, 4))
+    shift[50:, 0] += 4 * SPREADS[0]
+    fleet['shift'] = _rows('shift', shift)
+
+    screens = screen_sensors(fleet)
+    assert 30 in screens['spike']['flagged']
+    assert screens['shift']['flagged']
+    assert min(screens['shift']['flagged']) >= 40
+
+def test_new_sensors_are_scored_against_the_fleet():
+    rng = np.random.default_rng(2)
+    fleet = _clean_fleet(rng, 20, 60)
+    fleet['new'] = _rows('new', rng.normal(MEANS, SPREADS, (5, 4)))
+    broken = rng.normal(MEANS, SPREADS, (5, 4))
+    broken[:, 2] += 20 * SPREADS[2]
+    fleet['broken'] = _rows('broken', broken)
+
+    screens = screen_sensors(fleet)
+    assert screens['new']['flagged'] == []
+    assert screens['broken']['flagged'] == [0, 1, 2, 3, 4]
+
+def test_only_suspicious_sensors_reach_the_isolation_forest():
+    rng = np.random.default_rng(3)
+    fleet = _clean_fleet(rng, 20, 60)
+    spike = rng.normal(MEANS, SPREADS, (60, 4))
+    spike[10] += 10 * SPREADS
+    fleet['spike'] = _rows('spike', spike)
+    broken = rng.normal(MEANS, SPREADS, (5, 4))
+    broken[:, 2] += 20 * SPREADS[2]
+    fleet['broken'] = _rows('broken', broken)
+
+    anomalies = detect_fleet_anomalies(fleet)
+    assert set(anomalies) <= {'spike', 'broken'} | {f'S{i}' for i in range(20)}
+    assert 10 in anomalies['spike']
+    # Too few readings to fit a forest, so the screen's flags are kept
+    assert anomalies['broken'] == [0, 1, 2, 3, 4]
+    assert sum(sensor_id.startswith('S') for sensor_id in anomalies) <= 2
@@ -0,0 +1,87 @@
+import os
+import sqlite3
+
+from event_log import EventLog, apply_records, encode_record, recover_logs
+
+def _readings(path='guardian_io.db'):
+    conn = sqlite3.connect(path)
+    rows = conn.execute('SELECT sensor_id, temperature, timestamp FROM sensor_readings ORDER BY id').fetchall()
+    conn.close()
+    return rows
+
+def _record(sequence, sensor_id='S1', unix_time=1_700_000_000):
+    return (sequence, 'sensor_reading', None, unix_time, [sensor_id, 70.0 + sequence, 0.5, 100.0, 50.0])
+
+def test_apply_records_skips_checkpointed_sequences(db):
+    connections = {}
+    assert apply_records('log-a', [_record(1), _record(2)], connections) == []
+    # A replay of the same records and one new record applies only the new one
+    assert apply_records('log-a', [_record(1), _record(2), _record(3)], connections) == []
+    for conn in connections.values():
+        conn.close()
+
+    assert [row[1] for row in _readings()] == [71.0, 72.0, 73.0]
+    assert _readings()[0][2] == '2023-11-14 22:13:20'
+
+def test_apply_records_checkpoints_each_log_separately(db):
+    connections = {}
+    apply_records('log-a', [_record(1)], connections)
+    apply_records('log-b', [_record(1, 'S2')], connections)
+    for conn in connections.values():
+        conn.close()
+
+    assert [row[0] for row in _readings()] == ['S1', 'S2']
+
+def _write_log(root, name, records, tail=b''):
+    directory = root / name
+    directory.mkdir(parents=True)
+    (directory / 'lock').touch()
+    with open(directory / '00000000000000000001.log', 'wb') as handle:
+        for record in records:
+            handle.write(encode_record(*record))
+        handle.write(tail)
+    return directory
+
+def test_recover_logs_replays_and_removes_orphaned_logs(db):
+    root = db / 'event_log'
+    # A torn record from a crash mid-write ends the segment
+    torn = encode_record(*_record(3))[:-4]
+    directory = _write_log(root, 'dead-1', [_record(1), _record(2)], torn)
+
+    assert recover_logs(str(root)) == 2
+    assert [row[1] for row in _readings()] == [71.0, 72.0]
+    assert not directory.exists()
+
+def test_recover_logs_resumes_after_checkpoint(db):
+    connections = {}
+    apply_records('dead-1', [_record(1)], connections)
+    for conn in connections.values():
+        conn.close()
+    root = db / 'event_log'
+    _write_log(root, 'dead-1', [_record(1), _record(2)])
+
+    recover_logs(str(root))
+    assert [row[1] for row in _readings()] == [71.0, 72.0]
+
+def test_remove_applied_segments_keeps_segments_with_unapplied_records(tmp_path):
+    log = EventLog.__new__(EventLog)
+    log._segments = []
+    for first in (1, 11, 21):
+        path = tmp_path / f'{first:020d}.log'
+        path.touch()
+        log._segments.append((first, str(path)))
+
+    log.applied_sequence = 9
+    log._remove_applied_segments()
+    assert [first for first, _ in log._segments] == [1, 11, 21]
+
+    # Everything before the second segment is applied, so the first can go
+    log.applied_sequence = 10
+    log._remove_applied_segments()
+    assert [first for first, _ in log._segments] == [11, 21]
+    assert not os.path.exists(tmp_path / f'{1:020d}.log')
+
+    # The segment being written is never removed
+    log.applied_sequence = 40
+    log._remove_applied_segments()
+    assert [first for first, _ in log._segments] == [21]
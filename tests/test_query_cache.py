@@ -0,0 +1,76 @@
+import pytest
+
+import query_cache
+from models import get_sensors, register_sensor
+from query_cache import bump_tables, cached_query, clear_query_cache, invalidates, query_cache_stats
+from tenancy import tenant_scope
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_query_cache()
+    yield
+    clear_query_cache()
+
+def _counted_read():
+    calls = []
+
+    @cached_query('widgets')
+    def read_widgets(kind):
+        calls.append(kind)
+        return [(kind, len(calls))]
+    return read_widgets, calls
+
+def test_reads_are_cached_until_a_table_is_written():
+    read_widgets, calls = _counted_read()
+
+    @invalidates('widgets')
+    def write_widgets():
+        return True
+
+    assert read_widgets('a') == read_widgets('a') == [('a', 1)]
+    assert calls == ['a']
+    write_widgets()
+    assert read_widgets('a') == [('a', 2)]
+    stats = query_cache_stats()['functions']['read_widgets']
+    assert (stats['hits'], stats['misses'], stats['invalidated']) == (1, 2, 1)
+
+def test_failed_writes_do_not_invalidate():
+    read_widgets, calls = _counted_read()
+
+    @invalidates('widgets')
+    def write_widgets():
+        return False
+
+    read_widgets('a')
+    write_widgets()
+    read_widgets('a')
+    assert calls == ['a']
+
+def test_entries_are_kept_per_tenant():
+    read_widgets, calls = _counted_read()
+    with tenant_scope('Manufacturing'):
+        read_widgets('a')
+    with tenant_scope('Healthcare'):
+        read_widgets('a')
+    # A write in one tenant leaves the other's entry in place
+    bump_tables(['widgets'], 'Healthcare')
+    with tenant_scope('Manufacturing'):
+        read_widgets('a')
+    assert len(calls) == 2
+
+def test_entries_expire_after_ttl(monkeypatch):
+    read_widgets, calls = _counted_read()
+    read_widgets('a')
+    monkeypatch.setattr(query_cache, 'QUERY_CACHE_TTL', -1)
+    read_widgets('a')
+    assert len(calls) == 2
+
+def test_callers_get_their_own_container():
+    read_widgets, _ = _counted_read()
+    read_widgets('a').append('mutated')
+    assert read_widgets('a') == [('a', 1)]
+
+def test_registering_a_sensor_invalidates_get_sensors(db):
+    assert get_sensors() == []
+    register_sensor('S1', 'Pump_1', 'multi', 'North')
+    assert get_sensors() == [('S1', 'Pump_1', 'North')]
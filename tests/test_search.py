@@ -0,0 +1,50 @@
+import sqlite3
+
+from models import search_maintenance_alerts, search_query
+
+ALERTS = [
+    ('Pump_1', 'Sensor Anomaly', 'High', 'vibration spike on bearing', 0, None),
+    ('Pump_1', 'Sensor Drift', 'Medium', 'vibration drift detected', 1, None),
+    ('Pump_2', 'Sensor Anomaly', 'Medium', 'vibration anomaly near bearing', 0, '2024-01-01 00:00:00'),
+    ('Motor_1', 'Sensor Anomaly', 'High', 'temperature spike', 0, None),
+    (None, 'Alert Storm', 'High', 'vibration alerts suppressed', 0, None)
+]
+
+def _insert_alerts():
+    conn = sqlite3.connect('guardian_io.db')
+    conn.executemany(
+        'INSERT INTO maintenance_alerts (equipment_id, alert_type, severity, description, is_resolved, expired_at) '
+        'VALUES (?, ?, ?, ?, ?, ?)', ALERTS
+    )
+    conn.commit()
+    conn.close()
+
+def test_search_query_quotes_words_and_prefixes_the_last():
+    assert search_query('Vibration bear') == '"vibration" "bear"*'
+    assert search_query('pump OR "x" NEAR(') == '"pump" "or" "x" "near"*'
+    assert search_query(' -*() ') == ''
+
+def test_search_counts_matches_and_facets(db):
+    _insert_alerts()
+    result = search_maintenance_alerts('vibration')
+    assert result['total'] == 4
+    assert dict(result['facets']['severity']) == {'High': 2, 'Medium': 2}
+    # The storm has no equipment, so it is no equipment facet value
+    assert dict(result['facets']['equipment']) == {'Pump_1': 2, 'Pump_2': 1}
+    assert {row[6] for row in result['rows']} == {'Open', 'Resolved', 'Expired'}
+
+def test_search_facets_filter_on_exact_column_values(db):
+    _insert_alerts()
+    result = search_maintenance_alerts('vibration', equipment_id='Pump_1')
+    assert result['total'] == 2
+    assert {row[2] for row in result['rows']} == {'Pump_1'}
+    assert dict(result['facets']['alert_type']) == {'Sensor Anomaly': 1, 'Sensor Drift': 1}
+
+    # Words of a facet value that appear in other columns do not match
+    result = search_maintenance_alerts('vibration', alert_type='Sensor Anomaly', severity='Medium')
+    assert [row[2] for row in result['rows']] == ['Pump_2']
+    assert search_maintenance_alerts('spike', equipment_id='Pump')['total'] == 0
+
+def test_search_without_words_returns_nothing(db):
+    _insert_alerts()
+    assert search_maintenance_alerts('  ')['total'] == 0
@@ -0,0 +1,77 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_export import (
+    READING_COLUMNS, export_frame, export_sensor_readings, import_sensor_readings, load_export
+)
+from tenancy import tenant_db_path
+
+def _frame(rows=50):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'sensor_id': [f'S{i % 3}' for i in range(rows)],
+        'temperature': rng.normal(70, 1, rows),
+        'vibration': rng.normal(0.5, 0.05, rows),
+        'pressure': rng.normal(100, 2, rows),
+        'power_consumption': rng.normal(50, 1, rows),
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='min')
+    })
+    frame.loc[7, 'pressure'] = np.nan
+    return frame
+
+def _sorted(frame):
+    frame = frame.sort_values('id', ignore_index=True)
+    return frame.assign(sensor_id=frame['sensor_id'].astype(str))
+
+@pytest.mark.parametrize('fmt', ['npz', 'arrow', 'parquet'])
+def test_frame_round_trip(tmp_path, fmt):
+    if fmt != 'npz':
+        pytest.importorskip('pyarrow')
+    frame = _frame()
+    path = str(tmp_path / f'readings.{fmt}')
+    report = export_frame(frame, path, chunk_rows=16)
+    assert (report['rows'], report['chunks']) == (50, 4)
+
+    loaded = _sorted(load_export(path))
+    assert loaded.columns.tolist() == READING_COLUMNS
+    assert loaded['id'].tolist() == frame['id'].tolist()
+    assert loaded['sensor_id'].tolist() == frame['sensor_id'].tolist()
+    assert (loaded['timestamp'] == frame['timestamp']).all()
+    # Channels are stored as float32
+    for channel in ['temperature', 'vibration', 'pressure', 'power_consumption']:
+        np.testing.assert_allclose(loaded[channel], frame[channel], rtol=1e-6)
+    assert np.isnan(loaded.loc[7, 'pressure'])
+
+def test_stored_readings_round_trip_between_tenants(db):
+    rows = [
+        (f'S{i % 2}', 70.0 + i, 0.5, 100.0, 50.0, f'2024-01-01 00:{i:02d}:00') for i in range(10)
+    ]
+    conn = sqlite3.connect('guardian_io.db')
+    conn.executemany('''
+        INSERT INTO sensor_readings (sensor_id, temperature, vibration, pressure, power_consumption, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+    path = str(db / 'readings.npz')
+    assert export_sensor_readings(path, tenant=None, chunk_rows=3)['rows'] == 10
+    assert import_sensor_readings(path, tenant='Manufacturing')['rows'] == 10
+
+    conn = sqlite3.connect(tenant_db_path('Manufacturing'))
+    imported = conn.execute('''
+        SELECT sensor_id, temperature, vibration, pressure, power_consumption, timestamp
+        FROM sensor_readings ORDER BY timestamp
+    ''').fetchall()
+    conn.close()
+    assert imported == rows
+
+def test_export_rejects_unknown_formats_and_empty_input(tmp_path):
+    with pytest.raises(ValueError):
+        export_frame(_frame(), str(tmp_path / 'readings.csv'))
+    with pytest.raises(ValueError):
+        export_frame(_frame().iloc[:0], str(tmp_path / 'readings.npz'))
@@ -0,0 +1,52 @@
+import numpy as np
+
+from sensor_registry import SensorRegistry
+
+SENSORS = [
+    ('S1', 'Pump_1', 'multi', 'North'),
+    ('S2', 'Pump_2', 'multi', 'South'),
+    ('S3', 'Motor_1', 'multi', 'North'),
+    ('S4', 'Motor_2', 'multi', 'South'),
+    ('S5', 'Pump_3', 'multi', 'North')
+]
+HEALTH = {'Pump_1': 95.0, 'Pump_2': 50.0, 'Motor_1': 70.0, 'Motor_2': 85.0}
+
+def _registry():
+    return SensorRegistry(SENSORS, HEALTH)
+
+def _equipment(registry, positions):
+    return registry.frame(positions)['equipment_id'].tolist()
+
+def test_select_intersects_filters():
+    registry = _registry()
+    assert _equipment(registry, registry.select()) == ['Pump_1', 'Pump_2', 'Motor_1', 'Motor_2', 'Pump_3']
+    assert _equipment(registry, registry.select(location='North', equipment_type='Pump')) == ['Pump_1', 'Pump_3']
+    assert _equipment(registry, registry.select(band='Critical')) == ['Pump_2']
+    assert _equipment(registry, registry.select(band='Unknown')) == ['Pump_3']
+    assert len(registry.select(location='East')) == 0
+
+def test_select_prefix_matches_equipment_and_sensor_ids():
+    registry = _registry()
+    assert _equipment(registry, registry.select(prefix='motor')) == ['Motor_1', 'Motor_2']
+    assert _equipment(registry, registry.select(prefix='S2')) == ['Pump_2']
+    assert _equipment(registry, registry.select(location='South', prefix='pump')) == ['Pump_2']
+
+def test_page_orders_worst_first_with_unknown_last():
+    registry = _registry()
+    positions = registry.select()
+    assert registry.page(positions, 0, 3)['equipment_id'].tolist() == ['Pump_2', 'Motor_1', 'Motor_2']
+    assert registry.page(positions, 1, 3)['equipment_id'].tolist() == ['Pump_1', 'Pump_3']
+    assert registry.page(registry.select(location='North'), 0, 10)['equipment_id'].tolist() == [
+        'Motor_1', 'Pump_1', 'Pump_3'
+    ]
+
+def test_worst_skips_unknown_health():
+    registry = _registry()
+    assert _equipment(registry, registry.worst(2)) == ['Pump_2', 'Motor_1']
+    assert _equipment(registry, registry.worst(10, registry.select(location='North'))) == ['Motor_1', 'Pump_1']
+
+def test_health_falls_back_to_sensor_scores():
+    registry = SensorRegistry(SENSORS, {'S5': 40.0})
+    assert registry.record('Pump_3')['health_band'] == 'Critical'
+    assert np.isnan(registry.record('Pump_1')['health_score'])
+    assert registry.record('Pump_9') is None
@@ -1,4 +1,17 @@
+import os
+import time
+import pandas as pd
 import streamlit as st
+from data_plane import session_view
+from job_queue import enqueue_job, get_latest_job, get_job_counts
+from results_store import get_latest_result_info, get_result_payload
+from tasks import TENANT_SCOPED_TASKS, artifact_name, run_task
+from tenancy import current_tenant
+
+# Offload scoring and forecasting to the worker pool started by worker.py
+WORKER_MODE = os.environ.get('GUARDIAN_IO_WORKERS') == '1'
+RESULT_MAX_AGE_SECONDS = int(os.environ.get('GUARDIAN_IO_RESULT_MAX_AGE', '300'))
+JOB_POLL_SECONDS = 2
 
 def initialize_session_state():
     if 'current_industry' not in st.session_state:
@@ -37,5 +50,122 @@ def render_sidebar():
         - ESG Compliance Tracking
         """)
 
+        if WORKER_MODE:
+            render_job_status()
+
         st.markdown("---")
-        st.markdown("v1.2.0 - Guardian-IO Dashboard")
\ No newline at end of file
+        st.markdown("v1.2.0 - Guardian-IO Dashboard")
+
+def render_job_status():
+    st.markdown("---")
+    st.subheader("Background Jobs")
+    counts = get_job_counts()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Queued", counts.get('queued', 0))
+        st.metric("Done", counts.get('done', 0))
+    with col2:
+        st.metric("Running", counts.get('running', 0))
+        st.metric("Failed", counts.get('failed', 0))
+
+def load_precomputed_result(task, tenant=None):
+    """Latest artifact published by scheduler.py, or None if it has never been computed"""
+    artifact = artifact_name(task, tenant)
+    stored = get_latest_result_info(artifact)
+    if stored is None:
+        return None
+    # One shared snapshot per version for all sessions instead of a copy each
+    payload = session_view(artifact, stored['version'], lambda: get_result_payload(artifact, stored['version']))
+    if payload is None:
+        return None
+    st.caption(f"Precomputed results v{stored['version']} ({stored['created_at']} UTC)")
+    return payload
+
+def load_stored_result(task, params=None):
+    """
+    Precomputed or worker result of a task, for dashboards that otherwise
+    compute it inline as render_panels sources; None means compute inline
+    """
+    if WORKER_MODE:
+        return load_task_result(task, params)
+    if params:
+        return None
+    return load_precomputed_result(task, current_tenant() if task in TENANT_SCOPED_TASKS else None)
+
+def load_task_result(task, params=None):
+    """Return a task result, preferring the latest precomputed version
+
+    Artifacts published by scheduler.py are served first. Otherwise the result
+    is read from the worker pool when worker mode is on, or computed inline.
+    While the first result is being computed the job status is shown and the
+    page reruns itself until it is ready. Stale results are served while a
+    refresh job runs in the background.
+    """
+    if task in TENANT_SCOPED_TASKS:
+        params = dict(params or {}, tenant=current_tenant())
+
+    if not params or set(params) == {'tenant'}:
+        stored = load_precomputed_result(task, (params or {}).get('tenant'))
+        if stored is not None:
+            return stored
+
+    if not WORKER_MODE:
+        return run_task(task, params)
+
+    job = get_latest_job(task, params)
+    if job and job['status'] == 'done':
+        if job['age_seconds'] > RESULT_MAX_AGE_SECONDS and job['refresh_status'] is None:
+            enqueue_job(task, params)
+        if job['refresh_status']:
+            st.caption(f"Showing results from {job['finished_at']} UTC · refresh {job['refresh_status']}")
+        return job['result']
+
+    if job is None or job['status'] == 'failed':
+        if job is not None:
+            st.warning(f"Previous '{task}' job failed, retrying")
+        enqueue_job(task, params)
+        status = 'queued'
+    else:
+        status = job['status']
+
+    st.info(f"Computing '{task}' in the background (job {status})...")
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
+
+def render_faceted_search(key, label, search, facets, columns, placeholder='', page_size=20):
+    """
+    Search box over a models search function with a filter per facet.
+
+    search(text, limit=..., **filters) returns the dict of models._search;
+    facets are (facet name, filter argument, label) triples and columns name
+    the fields of the result rows. Each filter lists the facet's values with
+    their match counts.
+    """
+    text = st.text_input(label, key=f'{key}_text', placeholder=placeholder)
+    if not text.strip():
+        return None
+
+    # Filters are read before their widgets so their options can show counts for this search
+    filters = {argument: st.session_state.get(f'{key}_{argument}') for _, argument, _ in facets}
+    result = search(text, limit=page_size, **filters)
+
+    filter_cols = st.columns(len(facets))
+    for (name, argument, facet_label), col in zip(facets, filter_cols):
+        rows = result['facets'][name]
+        labels = {row[0]: f"{' · '.join(str(value) for value in row[:-1])} ({row[-1]:,})" for row in rows}
+        options = [None] + list(labels)
+        if filters[argument] is not None and filters[argument] not in labels:
+            options.append(filters[argument])
+        with col:
+            st.selectbox(
+                facet_label, options, key=f'{key}_{argument}',
+                format_func=lambda value, labels=labels: 'All' if value is None else labels.get(value, str(value))
+            )
+
+    order = 'best match first' if result['ranked'] else 'too many to rank, newest first'
+    sampled = '' if result['facets_complete'] else ' · filter counts cover the newest matches'
+    matches = 'match' if result['total'] == 1 else 'matches'
+    st.caption(f"{result['total']:,} {matches} · {order}{sampled}")
+    if result['rows']:
+        st.dataframe(pd.DataFrame(result['rows'], columns=columns), hide_index=True, use_container_width=True)
+    return result
@@ -0,0 +1,83 @@
+"""Worker pool that drains the job queue outside the Streamlit process.
+
+Run alongside the dashboard with:
+
+    python worker.py --processes 4
+
+and start Streamlit with GUARDIAN_IO_WORKERS=1 so dashboards read job results
+instead of computing them inline.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+
+from job_queue import (
+    init_job_tables, claim_next_job, complete_job, fail_job,
+    requeue_stale_jobs, purge_finished_jobs
+)
+
+def worker_loop(worker_name, poll_interval, stop_event):
+    # The parent handles Ctrl+C and signals the workers through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Import lazily so the heavy scientific stack is loaded in each worker only
+    from tasks import run_task
+
+    while not stop_event.is_set():
+        job = claim_next_job(worker_name)
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        try:
+            result = run_task(job['task'], job['params'])
+        except Exception:
+            fail_job(job['id'], traceback.format_exc())
+        else:
+            complete_job(job['id'], result)
+
+def main():
+    parser = argparse.ArgumentParser(description='Guardian-IO background worker pool')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='seconds to wait when the queue is empty')
+    parser.add_argument('--stale-minutes', type=int, default=30,
+                        help='requeue running jobs older than this on startup')
+    args = parser.parse_args()
+
+    init_job_tables()
+    requeued = requeue_stale_jobs(args.stale_minutes)
+    if requeued:
+        print(f"Requeued {requeued} stale job(s)")
+
+    stop_event = multiprocessing.Event()
+    host = socket.gethostname()
+    processes = [
+        multiprocessing.Process(
+            target=worker_loop,
+            args=(f'{host}:{os.getpid()}:{i}', args.poll_interval, stop_event),
+            daemon=True
+        )
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    print(f"Started {len(processes)} worker process(es)")
+
+    try:
+        while any(process.is_alive() for process in processes):
+            time.sleep(60)
+            purge_finished_jobs()
+    except KeyboardInterrupt:
+        print("Stopping workers...")
+        stop_event.set()
+        for process in processes:
+            process.join()
+
+if __name__ == '__main__':
+    main()